@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""
+Builds the BM25 index over a synthetic project and measures build, persistence,
+incremental updates and query latency.
+
+Reports:
+    - cold build time with one process and with every CPU;
+    - save time, size on disk and load time of the persisted index;
+    - update time when nothing changed, after touching files (same content)
+      and after editing files;
+    - query latency (p50, p99) for keyword queries, and how often the file
+      defining a unique identifier comes first when the identifier is queried.
+
+Usage:
+    python3 benchmarks/bench_bm25.py [--files N] [--queries N]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_repo import make_repo, make_vocabulary, marker
+from smart_coding_assistant.modules.bm25_index import BM25Index
+
+
+def timed(func, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--changes", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_bm25_")
+    root = os.path.join(tmp_dir, "project")
+    cache_file = os.path.join(tmp_dir, "index.json")
+    try:
+        paths, elapsed = timed(make_repo, root, args.files)
+        print(f"generated {len(paths)} files in {elapsed:.1f} s ({os.cpu_count()} CPUs)")
+
+        index = BM25Index(root)
+        stats, elapsed = timed(index.update, paths, workers=1)
+        print(f"build, 1 process:        {elapsed:7.2f} s  {stats}")
+        if (os.cpu_count() or 1) > 1:
+            index = BM25Index(root)
+            _, elapsed = timed(index.update, paths)
+            print(f"build, {os.cpu_count()} processes:      {elapsed:7.2f} s")
+        print(f"                         {len(index.vocab)} terms, {len(index._docs)} postings")
+
+        _, elapsed = timed(index.save, cache_file)
+        size = os.path.getsize(cache_file) + os.path.getsize(cache_file[:-len(".json")] + ".npz")
+        print(f"save:                    {elapsed:7.2f} s  {size / 1e6:.1f} MB")
+        index = BM25Index(root)
+        _, elapsed = timed(index.load, cache_file)
+        print(f"load:                    {elapsed:7.2f} s")
+
+        stats, elapsed = timed(index.update, paths)
+        print(f"update, no change:       {elapsed:7.2f} s  {stats}")
+
+        rng = random.Random(1)
+        changed = rng.sample(paths, args.changes)
+        for rel_path in changed[:args.changes // 2]:
+            os.utime(os.path.join(root, rel_path), ns=(time.time_ns(), time.time_ns()))
+        for rel_path in changed[args.changes // 2:]:
+            with open(os.path.join(root, rel_path), "a", encoding="utf-8") as f:
+                f.write("\ndef freshlyEditedFunction():\n    return None\n")
+        stats, elapsed = timed(index.update, paths)
+        print(f"update, {args.changes} changed:      {elapsed:7.2f} s  {stats}")
+        found = index.search("freshly edited function", k=args.changes)
+        print(f"                         edited files found: {len(found)}/{args.changes - args.changes // 2}")
+
+        words = make_vocabulary(5000)
+        latencies = []
+        for _ in range(args.queries):
+            query = " ".join(rng.choice(words[:2000]) for _ in range(rng.randint(3, 6)))
+            _, elapsed = timed(index.search, query, 10)
+            latencies.append(elapsed)
+        print(f"keyword queries:         p50 {percentile(latencies, 0.5) * 1000:6.2f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms")
+
+        first = 0
+        latencies = []
+        for i in rng.sample(range(len(paths)), min(args.queries, len(paths))):
+            results, elapsed = timed(index.search, f"where is {marker(i)} defined", 10)
+            latencies.append(elapsed)
+            first += bool(results) and results[0][0] == paths[i]
+        print(f"identifier queries:      p50 {percentile(latencies, 0.5) * 1000:6.2f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms  defining file first: {first}/{len(latencies)}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
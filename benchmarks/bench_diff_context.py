@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""
+Compares the prompt sent for a change when the changed files are packed whole
+and when only the diff hunks are packed (see diff_context.pack_diff_context).
+
+A git repository with a few large synthetic Python files is committed, then some
+methods are edited in several files and one file is renamed with a small edit.
+For each mode it reports tokens, bytes, estimated input cost and packing time.
+
+Usage:
+    python3 benchmarks/bench_diff_context.py [--files N] [--lines N] [--changed N] [--edits N]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_repo import make_repo
+from smart_coding_assistant.modules.diff_context import pack_diff_context
+from smart_coding_assistant.modules.models import DEFAULT_MODEL
+from smart_coding_assistant.modules.models import request_cost
+from smart_coding_assistant.modules.tokens import TokenCounter
+
+
+def git(root, *args):
+    subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost"] + list(args),
+                   cwd=root, check=True, capture_output=True)
+
+
+def edit_file(path, rng, edits):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    bodies = [i for i, line in enumerate(lines) if line.startswith("        ")]
+    for i in rng.sample(bodies, edits):
+        lines[i] = lines[i].replace(" = self.", " = self._checked_", 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--lines", type=int, default=3000)
+    parser.add_argument("--changed", type=int, default=6)
+    parser.add_argument("--edits", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_diff_")
+    root = os.path.join(tmp_dir, "project")
+    try:
+        paths = make_repo(root, args.files, lines=args.lines)
+        git(root, "init", "-q")
+        git(root, "add", ".")
+        git(root, "commit", "-q", "-m", "initial")
+
+        rng = random.Random(2)
+        changed = rng.sample(paths, args.changed)
+        for rel_path in changed:
+            edit_file(os.path.join(root, rel_path), rng, args.edits)
+        renamed = changed[0][:-len(".py")] + "_renamed.py"
+        git(root, "mv", changed[0], renamed)
+        changed[0] = renamed
+
+        counter = TokenCounter()
+        t0 = time.perf_counter()
+        whole = ""
+        for rel_path in changed:
+            with open(os.path.join(root, rel_path), "r", encoding="utf-8") as f:
+                whole += f"### {rel_path}\n```\n{f.read()}\n```\n"
+        whole_time = time.perf_counter() - t0
+        whole_tokens = counter.count(whole)
+
+        print(f"{args.files} files of {args.lines} lines, {args.changed} changed with {args.edits} edits each "
+              f"(one renamed); model {DEFAULT_MODEL}")
+        print(f"{'mode':<24} {'tokens':>8} {'KiB':>8} {'cost $':>9} {'time':>9} {'ratio':>7}")
+        print(f"{'whole files':<24} {whole_tokens:8d} {len(whole.encode()) / 1024:8.1f} "
+              f"{request_cost(DEFAULT_MODEL, whole_tokens):9.5f} {whole_time * 1000:6.1f} ms {1:7.1f}")
+        for context_lines, headers in ((3, True), (3, False), (10, True), (0, True)):
+            t0 = time.perf_counter()
+            packed = pack_diff_context(root, max_tokens=10 ** 6, context_lines=context_lines, headers=headers,
+                                       count_tokens=counter.count)
+            elapsed = time.perf_counter() - t0
+            assert sorted(packed["files"]) == sorted(changed), packed["files"]
+            name = f"diff -U{context_lines}" + (" + headers" if headers else "")
+            print(f"{name:<24} {packed['tokens']:8d} {packed['bytes'] / 1024:8.1f} "
+                  f"{request_cost(DEFAULT_MODEL, packed['tokens']):9.5f} {elapsed * 1000:6.1f} ms "
+                  f"{whole_tokens / packed['tokens']:7.1f}")
+
+        packed = pack_diff_context(root, max_tokens=400, count_tokens=counter.count)
+        print(f"\nbudget of 400 tokens: {packed['tokens']} tokens, {len(packed['files'])} files "
+              f"({len(packed['truncated'])} cut), {len(packed['omitted'])} omitted")
+        print("\n" + packed["text"][:900])
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
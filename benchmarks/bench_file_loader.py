@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+"""
+Measures the file loader (see modules/file_loader.py) against plain open().read().
+
+A synthetic project with many small source files, a few large generated text files
+and some binary blobs is loaded:
+
+1. naively: every file read whole and decoded as UTF-8, as the context packer did;
+2. cold: through a fresh FileLoader (binary sniff, mmap and head/tail excerpts);
+3. warm: again through the same loader, which must only stat() the files.
+
+It reports time, bytes read, files opened and the decoded text kept in memory, then
+repeats the warm load with a cache ceiling smaller than the project text.
+
+Usage:
+    python3 benchmarks/bench_file_loader.py [--files N] [--large N] [--large-mib N] [--binary N]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_repo import make_tree
+from smart_coding_assistant.modules.file_loader import FileLoader
+from smart_coding_assistant.modules.files import directory_structure
+from smart_coding_assistant.modules.files import iter_tree_files
+from smart_coding_assistant.modules.tracing import enable
+from smart_coding_assistant.modules.tracing import get_tracer
+
+
+def naive_load(paths):
+    contents = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        contents[path] = data.decode("utf-8", errors="replace")
+    return contents
+
+
+def report(name, elapsed, counters, text_bytes):
+    print(f"{name:<28} {elapsed * 1000:9.1f} {counters.get('bytes.read', 0) / 2 ** 20:10.1f} "
+          f"{counters.get('files.opened', 0):8d} {text_bytes / 2 ** 20:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--large", type=int, default=4)
+    parser.add_argument("--large-mib", type=int, default=64)
+    parser.add_argument("--binary", type=int, default=50)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_loader_")
+    root = os.path.join(tmp_dir, "project")
+    try:
+        make_tree(root, args.files, lines=40, large_files=args.large, large_size=args.large_mib << 20,
+                  binary_files=args.binary, binary_size=1 << 20)
+        paths = [os.path.join(root, rel_path) for rel_path in iter_tree_files(directory_structure(root))]
+        print(f"{len(paths)} files ({args.large} x {args.large_mib} MiB text, {args.binary} x 1 MiB binary)")
+        print(f"{'load':<28} {'ms':>9} {'MiB read':>10} {'opened':>8} {'MiB text':>10}")
+
+        enable(True)
+        t0 = time.perf_counter()
+        contents = naive_load(paths)
+        elapsed = time.perf_counter() - t0
+        report("open().read() + decode", elapsed, {"bytes.read": sum(os.path.getsize(p) for p in paths),
+                                                    "files.opened": len(paths)},
+               sum(len(text) for text in contents.values()))
+        del contents
+
+        loader = FileLoader()
+        for name in ("FileLoader cold", "FileLoader warm"):
+            get_tracer().clear()
+            t0 = time.perf_counter()
+            loaded = loader.load_many(paths)
+            elapsed = time.perf_counter() - t0
+            report(name, elapsed, get_tracer().counters(), loader.stats()["cached_bytes"])
+        assert get_tracer().counters().get("files.opened", 0) == 0, "warm load opened files"
+        binary = sum(item.binary for item in loaded.values())
+        truncated = sum(item.truncated for item in loaded.values())
+        print(f"{binary} detected as binary, {truncated} reduced to head/tail excerpts, "
+              f"{loader.stats()['entries']} cached entries")
+
+        ceiling = loader.stats()["cached_bytes"] // 2
+        small = FileLoader(cache_bytes=ceiling)
+        small.load_many(paths)
+        get_tracer().clear()
+        t0 = time.perf_counter()
+        small.load_many(paths)
+        elapsed = time.perf_counter() - t0
+        report(f"warm, ceiling {ceiling / 2 ** 20:.1f} MiB", elapsed, get_tracer().counters(),
+               small.stats()["cached_bytes"])
+    finally:
+        enable(False)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
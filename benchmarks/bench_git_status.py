@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""
+Compares 'git diff --name-only' in a subprocess with the in-process index reader.
+
+Without PATH, builds a synthetic repository with N files (default 50000) and
+modifies, touches and deletes some of them. Reports the root lookup and the
+modified-file query through both paths, cold (index not parsed yet) and warm.
+
+Usage:
+    python3 benchmarks/bench_git_status.py [PATH] [--files N]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from smart_coding_assistant.modules import git_status
+
+
+def build_repo(path, n_files):
+    for i in range(n_files):
+        directory = os.path.join(path, f"pkg{i % 100}", f"sub{i % 7}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"mod{i}.py"), "w") as f:
+            f.write(f"VALUE = {i}\n")
+    git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com"]
+    subprocess.run(git + ["init", "-q"], cwd=path, check=True)
+    subprocess.run(git + ["add", "-A"], cwd=path, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "bench"], cwd=path, check=True)
+    # Espera o índice deixar de ser "racy" para medir o caso comum
+    time.sleep(1.1)
+    subprocess.run(["git", "update-index", "-q", "--refresh"], cwd=path)
+
+    for i in range(0, n_files, 50):
+        file_path = os.path.join(path, f"pkg{i % 100}", f"sub{i % 7}", f"mod{i}.py")
+        if i % 150 == 0:
+            os.remove(file_path)
+        elif i % 100 == 0:
+            os.utime(file_path)  # só o stat muda: exige hash
+        else:
+            with open(file_path, "a") as f:
+                f.write("CHANGED = True\n")
+
+
+def via_subprocess(path):
+    subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=path, capture_output=True, check=True)
+    resultado = subprocess.run(["git", "diff", "--name-only", "-z"], cwd=path, capture_output=True, check=True)
+    return [os.fsdecode(f) for f in resultado.stdout.split(b"\0") if f]
+
+
+def via_index(path):
+    git_status.find_repo_root(path)
+    return git_status.modified_files(path)
+
+
+def timed(func, path, repeat=5):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(path)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--files", type=int, default=50000)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    path = args.path
+    if path is None:
+        tmp_dir = tempfile.mkdtemp(prefix="bench_git_status_")
+        path = tmp_dir
+        t0 = time.perf_counter()
+        build_repo(path, args.files)
+        print(f"synthetic repository: {args.files} files in {time.perf_counter() - t0:.1f} s")
+
+    try:
+        # Aquece o cache de inodes do sistema operacional
+        via_subprocess(path)
+
+        t0 = time.perf_counter()
+        cold = via_index(path)
+        t_cold = time.perf_counter() - t0
+        expected, t_git = timed(via_subprocess, path)
+        warm, t_warm = timed(via_index, path)
+
+        n_index = len(git_status.read_index(git_status.find_repo(os.path.abspath(path))[1])[0])
+        print(f"index entries:                {n_index}")
+        print(f"modified files:               {len(expected)}")
+        print(f"git rev-parse + git diff:     {t_git * 1000:9.1f} ms")
+        print(f"in-process, cold index:       {t_cold * 1000:9.1f} ms")
+        print(f"in-process, parsed index:     {t_warm * 1000:9.1f} ms")
+        print(f"same result:                  {cold == expected and warm == expected}")
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/python3
+"""
+Runs a mixed workload through the model router against local stand-in endpoints,
+one per model, each with its own latency.
+
+The routes are those of models.ROUTES with latency targets scaled down to the
+stand-in latencies. Halfway through, the preferred chat model becomes slow,
+so the router has to move chat requests to the next model of the route. Large
+prompts overflow the 32k-context models and fall back to a larger one.
+
+The same workload is then replayed with static routing (always the first model
+of the route that fits) for comparison. Reports wall time, the models chosen per
+task and reason, and the latency percentiles and spend recorded per model.
+
+Usage:
+    python3 benchmarks/bench_model_router.py [--requests N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_standin_server import start_server
+from smart_coding_assistant.modules.llm_client import ask_routed
+from smart_coding_assistant.modules.model_router import ModelRouter
+from smart_coding_assistant.modules.model_router import ModelStats
+from smart_coding_assistant.modules.models import MODELS
+from smart_coding_assistant.modules.models import ROUTES
+
+# Latência simulada de cada modelo, em segundos
+LATENCIES = {
+    "phi-4": 0.25,
+    "Qwen2.5-Coder-32B-Instruct": 0.05,
+    "Qwen2.5-72B-Instruct": 0.08,
+    "DeepSeek-V3-0324": 0.15,
+    "DeepSeek-V3": 0.15,
+    "Meta-Llama-3.1-70B-Instruct": 0.10,
+    "Llama-4-Maverick-17B-128E-Instruct-FP8": 0.12,
+}
+
+# Metas de latência proporcionais às latências simuladas
+MAX_LATENCY = {"completion": 0.1, "analysis": 0.5, "chat": 0.2}
+
+SLOW_LATENCY = 0.4
+
+
+def workload(n, seed=0):
+    rng = random.Random(seed)
+    requests = []
+    for i in range(n):
+        task = rng.choices(["completion", "chat", "analysis"], [5, 4, 1])[0]
+        if task == "completion":
+            size = rng.randint(200, 2000)
+        elif rng.random() < 0.15:
+            size = rng.randint(40000, 90000)
+        else:
+            size = rng.randint(2000, 20000)
+        requests.append((task, f"Request {i}?", size))
+    return requests
+
+
+def run(requests, routes, models, servers, static):
+    for model, server in servers.items():
+        server.latency = LATENCIES[model]
+    router = ModelRouter(routes, models, ModelStats())
+    if static:
+        # Sem observações de latência o roteador sempre escolhe o primeiro modelo que cabe
+        router.stats.latency_percentile = lambda model, fraction, recent=True: None
+
+    contexts = {}
+    choices = Counter()
+    t0 = time.perf_counter()
+    for i, (task, question, size) in enumerate(requests):
+        if i == len(requests) // 2:
+            servers["Qwen2.5-Coder-32B-Instruct"].latency = SLOW_LATENCY
+        if size not in contexts:
+            contexts[size] = "word " * size
+        answer, hit, route = ask_routed(question, contexts[size], task=task, router=router, bypass=True)
+        choices[(task, route.model, route.reason)] += 1
+    return time.perf_counter() - t0, choices, router.stats.summary()
+
+
+def report(name, elapsed, choices, summary):
+    print(f"\n{name}: {elapsed:.2f} s")
+    for (task, model, reason), count in sorted(choices.items()):
+        print(f"  {task:<11} {model:<40} {reason:<10} {count:4d}")
+    print(f"  {'model':<40} {'requests':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'spend':>10}")
+    total = 0.0
+    for model, stats in sorted(summary.items()):
+        total += stats["spend"]
+        print(f"  {model:<40} {stats['requests']:8d} {stats['p50'] * 1000:6.0f}ms {stats['p90'] * 1000:6.0f}ms "
+              f"{stats['p99'] * 1000:6.0f}ms ${stats['spend']:9.5f}")
+    print(f"  total spend ${total:.5f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=120)
+    args = parser.parse_args()
+
+    servers = {}
+    models = {}
+    for model, info in MODELS.items():
+        server, base_url = start_server(latency=LATENCIES[model], words=50)
+        servers[model] = server
+        models[model] = dict(info, base_url=base_url)
+    routes = {task: dict(route, max_latency=MAX_LATENCY[task]) for task, route in ROUTES.items()}
+
+    requests = workload(args.requests)
+    try:
+        print(f"{len(requests)} requests; preferred chat model slows to {SLOW_LATENCY * 1000:.0f} ms halfway")
+        report("static routing", *run(requests, routes, models, servers, static=True))
+        report("latency-aware routing", *run(requests, routes, models, servers, static=False))
+    finally:
+        for server in servers.values():
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+"""
+Measures the patch engine (see modules/patch_engine.py and modules/line_diff.py).
+
+1. Line diffs of a large file with scattered edits and a moved block: the Myers and
+   patience diffs of line_diff against difflib.SequenceMatcher.
+2. A multi-file patch, as a model would propose it, over a synthetic project: the
+   current files drift from the ones the patch was made against (lines inserted at
+   their top), so every hunk is found away from its line number. Parsing, planning
+   and applying are timed and the result is compared with the expected files.
+3. The same patch with one hunk that matches nothing, and then with a write failure
+   in the middle of the swap: the project must be left byte for byte as it was.
+
+Usage:
+    python3 benchmarks/bench_patch_engine.py [--files N] [--patched N] [--lines N]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import difflib
+import hashlib
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_repo import make_repo
+from smart_coding_assistant.modules import patch_engine
+from smart_coding_assistant.modules.line_diff import ALGORITHMS
+from smart_coding_assistant.modules.line_diff import diff_lines
+from smart_coding_assistant.modules.patch_engine import PatchError
+from smart_coding_assistant.modules.patch_engine import apply_plan
+from smart_coding_assistant.modules.patch_engine import parse_patch
+from smart_coding_assistant.modules.patch_engine import plan_patches
+
+
+def edit_lines(rng, lines, edits):
+    new = list(lines)
+    for _ in range(edits):
+        i = rng.randrange(len(new))
+        if rng.random() < 0.5:
+            new[i] = new[i] + "  # revisado"
+        else:
+            new.insert(i, f"extra_{rng.randrange(10 ** 6)} = None")
+    return new
+
+
+def tree_digest(root):
+    digest = hashlib.sha1()
+    for directory, dirs, files in sorted(os.walk(root)):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            digest.update(os.path.relpath(path, root).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def bench_line_diff(rng, lines):
+    # Código real repete linhas vazias, "return" e chaves, o caso lento do difflib
+    common = ["", "", "    return result", "    }", "        pass"]
+    old = [common[i % 10] if i % 10 < len(common) else f"line_{i} = compute({i % 500})" for i in range(lines)]
+    new = edit_lines(rng, old, lines // 100)
+    moved = new[lines // 3:lines // 3 + 50]
+    new = new[:lines // 3] + new[lines // 3 + 50:] + moved
+    print(f"line diff, {lines} lines, {lines // 100} edits and a moved block")
+    for algorithm in ALGORITHMS:
+        t0 = time.perf_counter()
+        opcodes = diff_lines(old, new, algorithm)
+        elapsed = time.perf_counter() - t0
+        rebuilt = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            rebuilt.extend(old[i1:i2] if tag == "equal" else new[j1:j2])
+        assert rebuilt == new, algorithm
+        print(f"  {algorithm:<9} {elapsed * 1000:9.1f} ms")
+    t0 = time.perf_counter()
+    difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes()
+    print(f"  {'difflib':<9} {(time.perf_counter() - t0) * 1000:9.1f} ms")
+
+
+def make_patch(rng, root, paths):
+    """
+    Edits the files in memory and returns (patch text, expected contents), then makes the
+    files on disk drift from the patch by inserting a header at their top.
+    """
+    chunks = []
+    expected = {}
+    for rel_path in paths:
+        with open(os.path.join(root, rel_path), "r", encoding="utf-8") as f:
+            old = f.read().splitlines()
+        new = edit_lines(rng, old, 4)
+        chunks.append("".join(line + "\n" for line in difflib.unified_diff(
+            old, new, "a/" + rel_path, "b/" + rel_path, lineterm="")))
+        header = [f"# header {k}" for k in range(rng.randint(1, 6))]
+        with open(os.path.join(root, rel_path), "w", encoding="utf-8") as f:
+            f.write("\n".join(header + old) + "\n")
+        expected[rel_path] = "\n".join(header + new) + "\n"
+    return "Here are the changes:\n\n```diff\n" + "".join(chunks) + "```\n", expected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--patched", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    bench_line_diff(rng, args.lines)
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_patch_")
+    root = os.path.join(tmp_dir, "project")
+    try:
+        paths = make_repo(root, files=args.files, lines=200)
+        patched = paths[::max(1, len(paths) // args.patched)][:args.patched]
+        text, expected = make_patch(rng, root, patched)
+        print(f"patch of {len(patched)} files ({text.count('@@ -')} hunks, {len(text) >> 10} KiB), "
+              f"applied to drifted files")
+
+        timings = {}
+        t0 = time.perf_counter()
+        patches = parse_patch(text)
+        timings["parse"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        changes = plan_patches(root, patches)
+        timings["plan"] = time.perf_counter() - t0
+        before = tree_digest(root)
+
+        # Um trecho que não existe em lugar nenhum: nada pode ser gravado
+        broken = text + (f"--- a/{patched[-1]}\n+++ b/{patched[-1]}\n@@ -1,3 +1,1 @@\n"
+                         "-never there 1\n-never there 2\n-never there 3\n+replacement\n")
+        try:
+            plan_patches(root, parse_patch(broken))
+            raise AssertionError("a broken patch was planned")
+        except PatchError as e:
+            print(f"  broken hunk rejected: {e.failures[0]}")
+
+        # Falha de escrita no meio da troca dos arquivos: tudo volta ao que era
+        real_replace = os.replace
+        calls = [0]
+
+        def failing_replace(src, dst):
+            calls[0] += 1
+            if calls[0] == len(changes) // 2:
+                raise OSError("simulated write failure")
+            return real_replace(src, dst)
+
+        patch_engine.os.replace = failing_replace
+        try:
+            apply_plan(root, changes)
+            raise AssertionError("the failing write went unnoticed")
+        except OSError:
+            pass
+        finally:
+            patch_engine.os.replace = real_replace
+        assert tree_digest(root) == before, "rollback left the tree changed"
+        print("  write failure rolled back, tree unchanged")
+
+        t0 = time.perf_counter()
+        apply_plan(root, changes)
+        timings["apply"] = time.perf_counter() - t0
+        for rel_path, content in expected.items():
+            with open(os.path.join(root, rel_path), "r", encoding="utf-8") as f:
+                assert f.read() == content, rel_path
+        leftovers = [name for _, _, files in os.walk(root) for name in files if ".patch." in name]
+        assert not leftovers, leftovers
+
+        for name, elapsed in timings.items():
+            print(f"  {name:<9} {elapsed * 1000:9.1f} ms")
+        print(f"  total     {sum(timings.values()) * 1000:9.1f} ms, all {len(expected)} files as expected")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""
+Compares the CircularProgressBar with the previous implementation, which rebuilt
+its pen, font, metrics and background on every frame and repainted while hidden.
+
+Reports, for each widget:
+    paint:    time of one full paint, rendered offscreen
+    animate:  CPU time and paint count of a 0 -> 100% animation while visible
+    hidden:   CPU time and paint count of the same animation while hidden
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python3 benchmarks/bench_progress_paint.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt, QEventLoop, QTimer
+from PyQt5.QtGui import QFont, QFontMetrics, QPainter, QPen, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from smart_coding_assistant.program import CircularProgressBar
+
+PAINTS = 2000
+
+
+class LegacyCircularProgressBar(CircularProgressBar):
+    """
+    The widget before the paint cache: everything is rebuilt on every frame.
+    """
+    def _update_animation(self):
+        if abs(self._animated_progress - self._target_progress) < 0.5:
+            self._animated_progress = self._target_progress
+            self._timer.stop()
+        else:
+            delta = (self._target_progress - self._animated_progress) / 10.0
+            self._animated_progress += delta
+        self.update()
+
+    def hideEvent(self, event):
+        pass
+
+    def set_progress(self, value):
+        self._progress = max(0, min(value, self._max_progress))
+        self._target_progress = self._progress
+        if not self._timer.isActive():
+            self._timer.start(16)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = event.rect()
+        width = rect.width()
+        height = rect.height()
+        size = min(width, height)
+        x = (width - size) // 2
+        y = (height - size) // 2
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self._background_color)
+        painter.drawEllipse(x + self._line_width//2, y + self._line_width//2,
+                            size - self._line_width, size - self._line_width)
+        pen = QPen(self._active_color)
+        pen.setWidth(self._line_width)
+        pen.setCapStyle(Qt.RoundCap)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        span_angle = -int(360 * 16 * self._animated_progress / self._max_progress)
+        adjusted_size = size - self._line_width
+        painter.drawArc(x + self._line_width//2, y + self._line_width//2,
+                        adjusted_size, adjusted_size, 90 * 16, span_angle)
+        percentage = int(self._animated_progress)
+        painter.setPen(self._text_color)
+        font = QFont("Arial", 10, QFont.Bold)
+        painter.setFont(font)
+        text = f"{percentage}%"
+        metrics = QFontMetrics(font)
+        painter.drawText((width - metrics.width(text)) // 2,
+                         (height + metrics.height()) // 2 - 2, text)
+
+
+def counting(widget_class):
+    # Subclasse que conta as chamadas de paintEvent
+    class Counted(widget_class):
+        paints = 0
+
+        def paintEvent(self, event):
+            self.paints += 1
+            super().paintEvent(event)
+
+    return Counted
+
+
+def run_animation(app, widget):
+    widget.set_progress(0)
+    widget._animated_progress = 0
+    app.processEvents()
+    widget.paints = 0
+    cpu0 = time.process_time()
+    widget.set_progress(100)
+    loop = QEventLoop()
+    QTimer.singleShot(1500, loop.quit)
+    loop.exec_()
+    return (time.process_time() - cpu0) * 1000, widget.paints
+
+
+def measure(app, widget_class):
+    widget = counting(widget_class)()
+    widget.resize(64, 64)
+    widget.show()
+    app.processEvents()
+
+    widget._animated_progress = 42
+    target = QPixmap(widget.size())
+    t0 = time.perf_counter()
+    for _ in range(PAINTS):
+        widget.render(target)
+    paint_us = (time.perf_counter() - t0) / PAINTS * 1e6
+
+    visible = run_animation(app, widget)
+    widget.hide()
+    hidden = run_animation(app, widget)
+    widget.deleteLater()
+    return paint_us, visible, hidden
+
+
+def main():
+    app = QApplication(sys.argv)
+    for name, widget_class in (("previous", LegacyCircularProgressBar), ("cached", CircularProgressBar)):
+        paint_us, visible, hidden = measure(app, widget_class)
+        print(f"{name:9} paint {paint_us:7.1f} us | animate {visible[0]:6.1f} ms CPU, "
+              f"{visible[1]:3} paints | hidden {hidden[0]:6.1f} ms CPU, {hidden[1]:3} paints")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""
+Measures a relaunch handed over to the resident instance.
+
+Starts the resident window under the offscreen Qt platform, then runs the launcher
+again several times with a project and an action, as a user would from a terminal,
+and reports the wall time of each of those processes. Compare with
+bench_startup.py, which measures a cold start to first paint.
+
+Usage:
+    python3 benchmarks/bench_relaunch.py [PROJECT] [--runs N]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+from smart_coding_assistant.modules.single_instance import make_request
+from smart_coding_assistant.modules.single_instance import send_request
+from smart_coding_assistant.modules.single_instance import socket_path
+
+
+def launcher(*args):
+    return [sys.executable, "-m", "smart_coding_assistant.launcher"] + list(args)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("project", nargs="?", default=".")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    runtime_dir = tempfile.mkdtemp(prefix="bench_relaunch_")
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", XDG_RUNTIME_DIR=runtime_dir,
+               PYTHONPATH=SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    os.environ["XDG_RUNTIME_DIR"] = runtime_dir
+
+    t0 = time.perf_counter()
+    resident = subprocess.Popen(launcher(), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while not send_request(make_request(action="show"), socket_path()):
+            if resident.poll() is not None:
+                raise SystemExit("The resident instance exited")
+            time.sleep(0.01)
+        print(f"resident instance ready:     {(time.perf_counter() - t0) * 1000:7.1f} ms")
+
+        request = make_request(args.project, "files")
+        samples = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            send_request(request)
+            samples.append(time.perf_counter() - t0)
+        print(f"request from this process:   {statistics.median(samples) * 1000:7.2f} ms median")
+
+        samples = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            subprocess.run(launcher(args.project, "--action", "files"), env=env, check=True)
+            samples.append(time.perf_counter() - t0)
+        print(f"relaunch (whole process):    {statistics.median(samples) * 1000:7.1f} ms median, "
+              f"{min(samples) * 1000:.1f} ms min")
+
+        subprocess.run(launcher("--action", "quit"), env=env, check=True)
+        resident.wait(timeout=10)
+        print(f"resident exit code:          {resident.returncode}")
+    finally:
+        if resident.poll() is None:
+            resident.kill()
+        shutil.rmtree(runtime_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""
+Replays a workload of repeated questions against the local stand-in API,
+with and without the response cache.
+
+Questions are drawn with a skewed distribution (a few questions are asked often),
+all on the same packed context. Reports wall time, requests that reached the API,
+hit rate, bytes stored and model time saved, then checks refresh, bypass and
+eviction by size.
+
+Usage:
+    python3 benchmarks/bench_response_cache.py [--requests N] [--latency S]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_standin_server import start_server
+from smart_coding_assistant.modules.llm_client import ask
+from smart_coding_assistant.modules.response_cache import ResponseCache
+
+
+def workload(n, distinct, seed=0):
+    rng = random.Random(seed)
+    weights = [1.0 / (i + 1) for i in range(distinct)]
+    return [f"Question {i} about the project?" for i in rng.choices(range(distinct), weights, k=n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--distinct", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_response_cache_")
+    context = "### main.py\n```\nprint('hello')\n```\n" * 200
+    questions = workload(args.requests, args.distinct)
+    try:
+        cache = ResponseCache(os.path.join(tmp_dir, "responses.sqlite3"))
+
+        t0 = time.perf_counter()
+        for question in questions:
+            ask(question, context, model="standin", base_url=base_url, cache=cache, bypass=True)
+        t_plain = time.perf_counter() - t0
+        plain_requests = server.requests
+
+        server.requests = 0
+        t0 = time.perf_counter()
+        for question in questions:
+            ask(question, context, model="standin", base_url=base_url, cache=cache)
+        t_cached = time.perf_counter() - t0
+        stats = cache.stats()
+
+        print(f"requests:                {len(questions)} ({args.distinct} distinct, {args.latency:.2f} s latency)")
+        print(f"without cache:           {t_plain:7.2f} s, {plain_requests} API requests")
+        print(f"with cache:              {t_cached:7.2f} s, {server.requests} API requests")
+        print(f"hit rate:                {stats['hit_rate'] * 100:7.1f} % ({stats['hits']}/{stats['lookups']})")
+        print(f"stored:                  {stats['entries']} answers, {stats['bytes']} bytes")
+        print(f"model time saved:        {stats['time_saved']:7.2f} s")
+
+        server.requests = 0
+        answer, hit = ask(questions[0], context, model="standin", base_url=base_url, cache=cache, refresh=True)
+        print(f"refresh:                 hit={hit}, API requests={server.requests}")
+        answer, hit = ask(questions[0], context + " ", model="standin", base_url=base_url, cache=cache)
+        print(f"changed context:         hit={hit}")
+
+        cache.max_bytes = stats["bytes"] // 2
+        removed = cache.evict()
+        print(f"evict to {cache.max_bytes} bytes:  removed {removed}, left {cache.stats()['bytes']} bytes")
+        cache.close()
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
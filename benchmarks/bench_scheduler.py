@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""
+Measures the request scheduler against the local stand-in API.
+
+1. Throughput versus concurrency: the same batch of independent jobs with 1, 2,
+   4, 8 and 16 workers, with time to the first result and connections opened.
+2. The same batch sent one urllib request (one new connection) per job, from a
+   thread pool of the same size, for comparison with the keep-alive pools.
+3. A per-provider rate limit, which caps the throughput whatever the concurrency.
+4. A server failing every 5th request with 503: every job still succeeds after retries.
+5. Priorities: with one worker, jobs finish in priority order.
+
+Usage:
+    python3 benchmarks/bench_scheduler.py [--jobs N] [--latency S]
+"""
+
+import os
+import sys
+import time
+import argparse
+import urllib.parse
+import concurrent.futures
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_standin_server import start_server
+from smart_coding_assistant.modules.llm_client import chat_completion
+from smart_coding_assistant.modules.scheduler import Job
+from smart_coding_assistant.modules.scheduler import RequestScheduler
+
+
+def make_jobs(n, priorities=False):
+    return [Job(f"Write tests for module_{i}.py", f"### module_{i}.py\n```\ndef f_{i}(): pass\n```\n",
+                model="standin", priority=(i % 3 if priorities else 0), tag=i)
+            for i in range(n)]
+
+
+def run_scheduler(base_url, jobs, **kwargs):
+    scheduler = RequestScheduler(base_url=base_url, **kwargs)
+    t0 = time.perf_counter()
+    first = None
+    results = []
+    for result in scheduler.map(jobs):
+        if first is None:
+            first = time.perf_counter() - t0
+        results.append(result)
+    elapsed = time.perf_counter() - t0
+    connections = scheduler.connections()
+    scheduler.close()
+    return elapsed, first, connections, results
+
+
+def run_urllib(base_url, jobs, workers):
+    def call(job):
+        return chat_completion(base_url, None, job.model, job.question, job.system_msg)
+
+    t0 = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        list(executor.map(call, jobs))
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=48)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency, words=100)
+    failing, failing_url = start_server(latency=args.latency, words=100, fail_every=5)
+    host = urllib.parse.urlsplit(base_url).netloc
+    jobs = make_jobs(args.jobs)
+    try:
+        print(f"{args.jobs} jobs, {args.latency * 1000:.0f} ms per request")
+        print(f"{'workers':>7} {'time':>8} {'jobs/s':>8} {'first':>9} {'connections':>11}")
+        for workers in (1, 2, 4, 8, 16):
+            elapsed, first, connections, results = run_scheduler(base_url, jobs, max_workers=workers)
+            assert all(result.error is None for result in results)
+            print(f"{workers:7d} {elapsed:6.2f} s {len(jobs) / elapsed:8.1f} {first * 1000:6.0f} ms {connections:11d}")
+
+        elapsed = run_urllib(base_url, jobs, 8)
+        print(f"\nurllib, new connection per job, 8 threads: {elapsed:.2f} s ({len(jobs) / elapsed:.1f} jobs/s)")
+
+        elapsed, _, _, _ = run_scheduler(base_url, jobs, max_workers=16, rate_limits={host: (10, 1)})
+        print(f"rate limit 10/s, 16 workers:             {elapsed:.2f} s ({len(jobs) / elapsed:.1f} jobs/s)")
+
+        elapsed, _, _, results = run_scheduler(failing_url, jobs, max_workers=8, backoff=0.05)
+        errors = sum(result.error is not None for result in results)
+        retried = sum(result.attempts > 1 for result in results)
+        print(f"503 on every 5th request, 8 workers:     {elapsed:.2f} s, {retried} jobs retried, "
+              f"{errors} failed, {failing.requests} requests")
+
+        _, _, _, results = run_scheduler(base_url, make_jobs(12, priorities=True), max_workers=1)
+        print(f"priority order with 1 worker:            {[result.job.priority for result in results]}")
+    finally:
+        server.shutdown()
+        failing.shutdown()
+
+
+if __name__ == "__main__":
+    main()
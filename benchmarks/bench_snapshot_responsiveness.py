@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""
+Measures how responsive the Qt event loop stays while a HEAD snapshot is built by
+qt_tasks.TaskRunner, the way the "meld" action runs it.
+
+A QApplication (offscreen by default) runs a 16 ms precise QTimer, first idle for a
+second and then while TaskRunner runs git_meld.head_snapshot in its QThreadPool. The
+gaps between timer ticks show how long the GUI thread was kept from its events; the
+throttled progress signals are handled by a slot in the GUI thread, as in the window.
+The snapshot uses a temporary store, so every blob is extracted from git.
+
+Without REPO, a synthetic repository is generated (see synthetic_repo.make_git_repo).
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python3 benchmarks/bench_snapshot_responsiveness.py [REPO] [--files N] [--modified N]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from synthetic_repo import make_git_repo
+from smart_coding_assistant.modules.git_meld import get_modified_files
+from smart_coding_assistant.modules.git_meld import head_snapshot
+from smart_coding_assistant.modules.qt_tasks import TaskRunner
+from smart_coding_assistant.modules.snapshot_store import SnapshotStore
+
+FRAME_MS = 16
+IDLE_SECONDS = 1.0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("repo", nargs="?", help="Repository with modified files. If omitted, one is generated.")
+    parser.add_argument("--files", type=int, default=5000, help="Files of the generated repository.")
+    parser.add_argument("--modified", type=int, default=2000, help="Modified files of the generated repository.")
+    return parser.parse_args()
+
+
+def summary(label, gaps):
+    """
+    Prints the distribution of the gaps between timer ticks, in milliseconds.
+    """
+    gaps = sorted(gaps)
+    n = len(gaps)
+    if not n:
+        print(f"{label:<10} no ticks")
+        return
+    stalls = sum(1 for gap in gaps if gap > 2 * FRAME_MS)
+    print(f"{label:<10} {n:6d} {gaps[n // 2]:8.2f} {gaps[min(n - 1, n * 99 // 100)]:8.2f} "
+          f"{gaps[-1]:8.2f} {stalls:8d}")
+
+
+def main():
+    args = parse_args()
+    work_dir = tempfile.mkdtemp(prefix="bench_snapshot_")
+    try:
+        repo = args.repo
+        if repo is None:
+            repo = os.path.join(work_dir, "repo")
+            make_git_repo(repo, files=args.files, modified=args.modified)
+        files = get_modified_files(repo)
+        store = SnapshotStore(os.path.join(work_dir, "store"))
+
+        app = QApplication(sys.argv)
+        runner = TaskRunner()
+        gaps = {"idle": [], "snapshot": []}
+        state = {"phase": "idle", "last": None, "progress": 0, "t0": 0.0, "elapsed": 0.0, "error": None}
+
+        def tick():
+            now = time.perf_counter()
+            if state["last"] is not None:
+                gaps[state["phase"]].append((now - state["last"]) * 1000)
+            state["last"] = now
+
+        def snapshot(func_msg=None, func_progress=None, cancel_event=None):
+            return head_snapshot(repo, files, store, func_progress=func_progress, cancel_event=cancel_event)
+
+        def on_progress(done, total):
+            state["progress"] += 1
+
+        def on_done(error=None):
+            state["elapsed"] = time.perf_counter() - state["t0"]
+            state["error"] = error
+            timer.stop()
+            app.quit()
+
+        def start_snapshot():
+            state["phase"] = "snapshot"
+            state["last"] = None
+            state["t0"] = time.perf_counter()
+            runner.submit(snapshot, on_progress=on_progress, on_finished=lambda result: on_done(),
+                          on_failed=on_done)
+
+        timer = QTimer()
+        timer.setTimerType(Qt.PreciseTimer)
+        timer.timeout.connect(tick)
+        timer.start(FRAME_MS)
+        QTimer.singleShot(int(IDLE_SECONDS * 1000), start_snapshot)
+        app.exec_()
+        runner.shutdown()
+
+        if state["error"] is not None:
+            print(state["error"], file=sys.stderr)
+            return 1
+        print(f"modified files:   {len(files)}")
+        print(f"snapshot time:    {state['elapsed'] * 1000:.1f} ms, {state['progress']} progress signals")
+        print(f"{'phase':<10} {'ticks':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'> 2 frames':>8}")
+        summary("idle", gaps["idle"])
+        summary("snapshot", gaps["snapshot"])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
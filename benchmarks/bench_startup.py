@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""
+Measures the cold start of the sidebar: process start to first paint of the window.
+
+Each run is a new Python process under the offscreen Qt platform, reporting when
+PyQt5 and the program module finished importing, when ExpandableSidebar was built
+and when the first paint event arrived. With --eager every page is built before
+showing the window, which is what the sidebar did before pages became lazy.
+
+Usage:
+    python3 benchmarks/bench_startup.py [--runs N] [--eager]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+CHILD = r"""
+import os, sys, time, json
+t0 = float(os.environ["BENCH_T0"])
+sys.path.insert(0, os.environ["BENCH_SRC"])
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+t_qt = time.time()
+from smart_coding_assistant import program
+t_import = time.time()
+app = QApplication(sys.argv)
+t_app = time.time()
+window = program.ExpandableSidebar()
+if os.environ.get("BENCH_EAGER"):
+    for index in range(window.stacked_widget.count() or 4):
+        window.show_page(index)
+t_built = time.time()
+times = {}
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and "paint" not in times:
+            times["paint"] = time.time()
+            QTimer.singleShot(0, app.quit)
+        return False
+
+first_paint = FirstPaint()
+app.installEventFilter(first_paint)
+window.show()
+app.exec_()
+print(json.dumps({"qt": t_qt - t0, "import": t_import - t0, "app": t_app - t0, "built": t_built - t0,
+                  "paint": times["paint"] - t0, "modules": len(sys.modules)}))
+"""
+
+
+def run_once(eager):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", BENCH_SRC=SRC)
+    if eager:
+        env["BENCH_EAGER"] = "1"
+    env["BENCH_T0"] = repr(time.time())
+    resultado = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--eager", action="store_true")
+    args = parser.parse_args()
+
+    run_once(args.eager)  # aquece o cache de disco
+    runs = [run_once(args.eager) for _ in range(args.runs)]
+    for key, label in (("qt", "PyQt5 imported"), ("import", "program imported"), ("app", "QApplication"),
+                       ("built", "window built"), ("paint", "first paint")):
+        values = [run[key] * 1000 for run in runs]
+        print(f"{label:18} median {statistics.median(values):7.1f} ms  min {min(values):7.1f} ms")
+    print(f"{'modules loaded':18} {runs[-1]['modules']}")
+
+
+if __name__ == "__main__":
+    main()
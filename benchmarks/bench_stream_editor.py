@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+"""
+Streams a long answer from the local stand-in API into the Editor text widget
+and measures how the interface keeps up.
+
+Three ways of showing the stream are compared:
+    reset:     the whole accumulated text is set again for each token (setPlainText);
+    per-token: each token is appended through its own queued signal;
+    coalesced: modules/text_stream.TextStreamAppender, one append per frame.
+
+For each mode it reports the time to the first visible token (first paint of the
+editor with text), the total time, the number of appends, and the frame time seen
+by a 16 ms heartbeat timer in the GUI thread (median, p99 and worst gap).
+The answer has a line break every --line-words words; --line-words 0 sends a single
+paragraph, the worst case for the text layout.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python3 benchmarks/bench_stream_editor.py [--tokens N] [--chunk-delay S] [--line-words N]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QObject, QEvent, QTimer, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QApplication, QTextEdit
+
+from llm_standin_server import start_server
+from smart_coding_assistant.modules.llm_client import stream_chat_completion
+from smart_coding_assistant.modules.qt_tasks import TaskRunner
+from smart_coding_assistant.modules.text_stream import TextStreamAppender
+
+
+class PaintWatcher(QObject):
+    def __init__(self, text_edit):
+        super().__init__()
+        self.text_edit = text_edit
+        self.first_paint = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.first_paint is None and not self.text_edit.document().isEmpty():
+            self.first_paint = time.perf_counter()
+        return False
+
+
+class TokenSignals(QObject):
+    token = pyqtSignal(str)
+    done = pyqtSignal()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_mode(app, mode, base_url, runner):
+    text_edit = QTextEdit()
+    text_edit.resize(500, 700)
+    text_edit.show()
+    watcher = PaintWatcher(text_edit)
+    text_edit.viewport().installEventFilter(watcher)
+    app.processEvents()
+
+    state = {"done": False, "appends": 0}
+    gaps = []
+    last = [time.perf_counter()]
+
+    def heartbeat():
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+
+    beat = QTimer()
+    beat.setInterval(16)
+    beat.timeout.connect(heartbeat)
+
+    def finish(*_):
+        state["done"] = True
+
+    def stream(cancel_event=None):
+        return stream_chat_completion(base_url, None, "standin", "Explain the project.", "system",
+                                      cancel_event=cancel_event)
+
+    t0 = time.perf_counter()
+    beat.start()
+    if mode == "coalesced":
+        appender = TextStreamAppender(text_edit, runner)
+        appender.finished.connect(finish)
+        appender.failed.connect(finish)
+        original_flush = appender.flush
+
+        def counted_flush():
+            if appender._pending:
+                state["appends"] += 1
+            original_flush()
+
+        appender._timer.timeout.disconnect()
+        appender._timer.timeout.connect(counted_flush)
+        appender.start(stream)
+    else:
+        signals = TokenSignals()
+        accumulated = []
+
+        def on_token(token):
+            state["appends"] += 1
+            if mode == "reset":
+                accumulated.append(token)
+                text_edit.setPlainText("".join(accumulated))
+                text_edit.moveCursor(QTextCursor.End)
+            else:
+                text_edit.moveCursor(QTextCursor.End)
+                text_edit.insertPlainText(token)
+
+        signals.token.connect(on_token)
+        signals.done.connect(finish)
+
+        def produce(func_msg=None, func_progress=None, cancel_event=None):
+            for token in stream(cancel_event=cancel_event):
+                signals.token.emit(token)
+            signals.done.emit()
+
+        runner.submit(produce)
+
+    while not state["done"]:
+        app.processEvents()
+        time.sleep(0.001)
+    # Deixa a última pintura acontecer
+    end = time.perf_counter()
+    for _ in range(5):
+        app.processEvents()
+    beat.stop()
+
+    result = {
+        "first_visible": (watcher.first_paint or end) - t0,
+        "total": end - t0,
+        "appends": state["appends"],
+        "chars": len(text_edit.toPlainText()),
+        "frame_p50": percentile(gaps, 0.5),
+        "frame_p99": percentile(gaps, 0.99),
+        "frame_max": max(gaps) if gaps else 0.0,
+    }
+    text_edit.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=10000)
+    parser.add_argument("--chunk-delay", type=float, default=0.0002)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--line-words", type=int, default=12)
+    parser.add_argument("--modes", default="reset,per-token,coalesced")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    server, base_url = start_server(latency=args.latency, words=args.tokens, chunk_delay=args.chunk_delay,
+                                   line_words=args.line_words)
+    runner = TaskRunner()
+    try:
+        print(f"{args.tokens} tokens, {args.chunk_delay * 1000:.2f} ms between tokens, "
+              f"{args.latency * 1000:.0f} ms latency, {args.line_words or 'no'} words per line")
+        print(f"{'mode':<10} {'first visible':>13} {'total':>8} {'appends':>8} "
+              f"{'frame p50':>10} {'frame p99':>10} {'frame max':>10}")
+        for mode in args.modes.split(","):
+            r = run_mode(app, mode, base_url, runner)
+            print(f"{mode:<10} {r['first_visible'] * 1000:10.1f} ms {r['total']:6.2f} s {r['appends']:8d} "
+                  f"{r['frame_p50'] * 1000:7.1f} ms {r['frame_p99'] * 1000:7.1f} ms {r['frame_max'] * 1000:7.1f} ms")
+    finally:
+        runner.shutdown()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+#!/usr/bin/python3
+"""
+Benchmark suite: times the main paths of the assistant on a synthetic git
+repository and compares the results with a stored baseline.
+
+The repository is generated with synthetic_repo.make_git_repo() in the shape
+given on the command line (or by a profile), then these benchmarks run:
+
+    directory_structure.plain        files.directory_structure(root)
+    directory_structure.gitignore    ... with .gitignore rules, default excludes and all CPUs
+    directory_structure.cached       ... with cache=True, nothing changed since the last call
+    get_git_base_dir.cold            git_meld.get_git_base_dir from the deepest directory, memo cleared
+    get_git_base_dir.warm            the same, memoised
+    meld_head_vs_current.cold        git_meld.meld_head_vs_current with an empty snapshot store
+    meld_head_vs_current.warm        the same with the snapshot of HEAD already stored
+    progress_paint.frame             one offscreen paint of CircularProgressBar (needs PyQt5)
+
+Meld is replaced by a no-op 'meld' executable placed first on PATH, so the real
+code path (including the process spawn) runs without opening a window.
+
+Each benchmark runs --repeat times; the median, minimum and maximum are written
+as JSON (--output). With --baseline, the medians are compared with a previous
+output and the run fails (exit status 1) when a benchmark is slower than the
+baseline by more than its threshold: --threshold 0.15 sets the default and
+--threshold 'meld_*=0.3' sets it for the benchmarks matching a pattern.
+Differences below --noise-floor seconds are never regressions.
+
+Usage:
+    python3 benchmarks/bench_suite.py [--profile NAME] [--files N] [--shape SHAPE] [--modified N]
+                                      [--large N] [--binary N] [--repeat N] [--only PATTERN ...]
+                                      [--output FILE] [--baseline FILE] [--threshold [PATTERN=]FRACTION ...]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import fnmatch
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic_repo import SHAPES
+from synthetic_repo import make_git_repo
+from smart_coding_assistant.about import __version__
+from smart_coding_assistant.modules import git_status
+from smart_coding_assistant.modules.files import directory_structure
+from smart_coding_assistant.modules.git_meld import get_git_base_dir
+from smart_coding_assistant.modules.git_meld import meld_head_vs_current
+from smart_coding_assistant.modules.ignore import DEFAULT_EXCLUDES
+from smart_coding_assistant.modules.snapshot_store import SnapshotStore
+from smart_coding_assistant.modules.tree_cache import RACY_WINDOW_NS
+
+# Formatos de repositório pré-definidos; as opções da linha de comando têm precedência
+PROFILES = {
+    "10k": {"files": 10000, "shape": "balanced", "modified": 50, "large": 2, "binary": 10},
+    "100k": {"files": 100000, "shape": "balanced", "modified": 200, "large": 4, "binary": 50},
+    "1m": {"files": 1000000, "shape": "balanced", "modified": 500, "large": 4, "binary": 100, "lines": 4},
+    "deep": {"files": 20000, "shape": "deep", "modified": 50, "large": 0, "binary": 0},
+    "wide": {"files": 50000, "shape": "wide", "modified": 50, "large": 0, "binary": 0},
+}
+
+DEFAULTS = {"files": 10000, "shape": "balanced", "modified": 50, "large": 2, "binary": 10, "lines": 12}
+
+BENCHMARKS = [
+    "directory_structure.plain",
+    "directory_structure.gitignore",
+    "directory_structure.cached",
+    "get_git_base_dir.cold",
+    "get_git_base_dir.warm",
+    "meld_head_vs_current.cold",
+    "meld_head_vs_current.warm",
+    "progress_paint.frame",
+]
+
+DEFAULT_THRESHOLD = 0.15
+DEFAULT_NOISE_FLOOR = 0.0005
+
+MELD_STUB = "#!/bin/sh\nexit 0\n"
+
+
+def measure(func, repeat, setup=None):
+    """
+    Runs func repeat times (after setup, which is not timed) and returns its timing summary in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return {"median": statistics.median(times), "min": min(times), "max": max(times), "runs": len(times),
+            "unit": "s"}
+
+
+def backdate_dirs(root):
+    """
+    Moves the mtime of every directory below root out of tree_cache.RACY_WINDOW_NS, so the
+    cached listing is trusted as it would be for a tree not written seconds ago (.git too,
+    which the plain listing includes). Files keep their mtimes, which the git index depends on.
+    """
+    past = time.time() - 2 * RACY_WINDOW_NS / 1e9
+    for dir_path, _, _ in os.walk(root):
+        os.utime(dir_path, (past, past))
+
+
+def bench_directory_structure(root, repeat):
+    results = {
+        "directory_structure.plain": measure(lambda: directory_structure(root), repeat),
+        "directory_structure.gitignore": measure(
+            lambda: directory_structure(root, gitignore=True, exclude=DEFAULT_EXCLUDES, workers=None), repeat),
+    }
+    backdate_dirs(root)
+    directory_structure(root, cache=True)
+    results["directory_structure.cached"] = measure(lambda: directory_structure(root, cache=True), repeat)
+    return results
+
+
+def bench_git_base_dir(root, repeat):
+    deepest = max((dir_path for dir_path, _, _ in os.walk(root) if ".git" not in dir_path),
+                  key=lambda dir_path: dir_path.count(os.sep))
+    assert get_git_base_dir(deepest) == os.path.realpath(root)
+    return {
+        "get_git_base_dir.cold": measure(lambda: get_git_base_dir(deepest), repeat,
+                                         setup=git_status.clear_repo_cache),
+        "get_git_base_dir.warm": measure(lambda: get_git_base_dir(deepest), repeat),
+    }
+
+
+def bench_meld(root, work_dir, repeat, expected):
+    bin_dir = os.path.join(work_dir, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    meld = os.path.join(bin_dir, "meld")
+    with open(meld, "w") as f:
+        f.write(MELD_STUB)
+    os.chmod(meld, 0o755)
+    old_path = os.environ.get("PATH", "")
+    os.environ["PATH"] = bin_dir + os.pathsep + old_path
+
+    stores = []
+
+    def new_store():
+        store_dir = os.path.join(work_dir, f"store_{len(stores)}")
+        stores.append(SnapshotStore(root=store_dir))
+
+    def run():
+        messages = []
+        dir_head = meld_head_vs_current(root, func_msg=messages.append, store=stores[-1])
+        if dir_head is None:
+            raise RuntimeError(f"meld_head_vs_current failed: {messages}")
+
+    try:
+        # Confere que o benchmark compara os arquivos esperados
+        new_store()
+        run()
+        found = sum(1 for _, _, names in os.walk(stores[-1].root + "/snapshots") for _ in names)
+        if found != expected:
+            raise RuntimeError(f"Snapshot has {found} files, expected {expected}")
+        results = {
+            "meld_head_vs_current.cold": measure(run, repeat, setup=new_store),
+            "meld_head_vs_current.warm": measure(run, repeat),
+        }
+    finally:
+        os.environ["PATH"] = old_path
+    return results
+
+
+def bench_progress_paint(repeat, frames=500):
+    try:
+        from PyQt5.QtGui import QPixmap
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        return {}
+    from smart_coding_assistant.program import CircularProgressBar
+
+    app = QApplication.instance() or QApplication([])
+    widget = CircularProgressBar()
+    widget.resize(64, 64)
+    pixmap = QPixmap(widget.size())
+
+    def paint():
+        for i in range(frames):
+            widget._animated_progress = i % 101
+            widget.render(pixmap)
+
+    paint()
+    result = measure(paint, repeat)
+    for key in ("median", "min", "max"):
+        result[key] /= frames
+    app.processEvents()
+    return {"progress_paint.frame": result}
+
+
+def git_version():
+    try:
+        return subprocess.run(["git", "--version"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def source_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_thresholds(values):
+    """
+    Parses --threshold values into (default, [(pattern, fraction), ...]).
+    """
+    default = DEFAULT_THRESHOLD
+    patterns = []
+    for value in values or ():
+        pattern, sep, fraction = value.rpartition("=")
+        if sep:
+            patterns.append((pattern, float(fraction)))
+        else:
+            default = float(fraction)
+    return default, patterns
+
+
+def threshold_for(name, default, patterns):
+    # O último padrão que casa vence
+    for pattern, fraction in reversed(patterns):
+        if fnmatch.fnmatchcase(name, pattern):
+            return fraction
+    return default
+
+
+def compare(results, baseline, default, patterns, noise_floor):
+    """
+    Compares medians with a baseline.
+
+    Returns:
+        list of dict: One row per benchmark with "name", "baseline", "current", "change",
+                      "threshold" and "status" ("ok", "regression", "improved", "new" or "missing").
+    """
+    rows = []
+    for name in sorted(set(results) | set(baseline)):
+        current = results.get(name, {}).get("median")
+        previous = baseline.get(name, {}).get("median")
+        row = {"name": name, "baseline": previous, "current": current, "change": None,
+               "threshold": threshold_for(name, default, patterns)}
+        if current is None:
+            row["status"] = "missing"
+        elif previous is None:
+            row["status"] = "new"
+        else:
+            row["change"] = current / previous - 1 if previous else 0.0
+            if abs(current - previous) < noise_floor:
+                row["status"] = "ok"
+            elif row["change"] > row["threshold"]:
+                row["status"] = "regression"
+            elif row["change"] < -row["threshold"]:
+                row["status"] = "improved"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def format_time(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite with a synthetic git repository.")
+    parser.add_argument("--profile", choices=sorted(PROFILES))
+    parser.add_argument("--files", type=int)
+    parser.add_argument("--shape", choices=SHAPES)
+    parser.add_argument("--modified", type=int)
+    parser.add_argument("--large", type=int, help="Large text files (1 MiB each).")
+    parser.add_argument("--binary", type=int, help="Binary files (64 KiB each).")
+    parser.add_argument("--lines", type=int, help="Lines per Python file.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", default=None, help="Patterns of the benchmarks to run.")
+    parser.add_argument("--repo", help="Reuse (or create, if missing) the synthetic repository in this directory.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare with.")
+    parser.add_argument("--threshold", action="append", help="FRACTION or PATTERN=FRACTION (default 0.15).")
+    parser.add_argument("--noise-floor", type=float, default=DEFAULT_NOISE_FLOOR)
+    args = parser.parse_args()
+
+    config = dict(DEFAULTS)
+    config.update(PROFILES.get(args.profile, {}))
+    for key in DEFAULTS:
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+
+    def wanted(name):
+        return args.only is None or any(fnmatch.fnmatchcase(name, pattern) for pattern in args.only)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_suite_")
+    root = args.repo or os.path.join(work_dir, "repo")
+    results = {}
+    try:
+        t0 = time.perf_counter()
+        if args.repo and os.path.isdir(os.path.join(args.repo, ".git")):
+            modified = len([line for line in subprocess.run(["git", "diff", "--name-only"], cwd=root,
+                            capture_output=True, text=True, check=True).stdout.splitlines() if line])
+            print(f"reusing {root} ({modified} modified files)", file=sys.stderr)
+        else:
+            paths, changed = make_git_repo(root, config["modified"], files=config["files"], shape=config["shape"],
+                                           lines=config["lines"], large_files=config["large"],
+                                           binary_files=config["binary"])
+            modified = len(changed)
+            print(f"generated {len(paths)} files ({config['shape']}), {modified} modified, "
+                  f"in {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+
+        suites = [
+            (BENCHMARKS[0:3], lambda: bench_directory_structure(root, args.repeat)),
+            (BENCHMARKS[3:5], lambda: bench_git_base_dir(root, args.repeat)),
+            (BENCHMARKS[5:7], lambda: bench_meld(root, work_dir, args.repeat, modified)),
+            (BENCHMARKS[7:8], lambda: bench_progress_paint(args.repeat)),
+        ]
+        for names, run in suites:
+            if any(wanted(name) for name in names):
+                results.update({name: value for name, value in run().items() if wanted(name)})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = {
+        "meta": {
+            "version": __version__,
+            "commit": source_commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "git": git_version(),
+        },
+        "config": config,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+
+    print(f"{'benchmark':<32} {'median':>10} {'min':>10} {'max':>10}")
+    for name, value in sorted(results.items()):
+        print(f"{name:<32} {format_time(value['median']):>10} {format_time(value['min']):>10} "
+              f"{format_time(value['max']):>10}")
+    if "progress_paint.frame" not in results and wanted("progress_paint.frame"):
+        print("progress_paint.frame skipped: PyQt5 is not installed", file=sys.stderr)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != config:
+        print(f"warning: baseline config {baseline.get('config')} differs from {config}", file=sys.stderr)
+    default, patterns = parse_thresholds(args.threshold)
+    baseline_results = {name: value for name, value in baseline.get("results", {}).items() if wanted(name)}
+    rows = compare(results, baseline_results, default, patterns, args.noise_floor)
+
+    print(f"\n{'benchmark':<32} {'baseline':>10} {'current':>10} {'change':>8} {'limit':>6}  status")
+    for row in rows:
+        change = "-" if row["change"] is None else f"{row['change'] * 100:+.1f}%"
+        print(f"{row['name']:<32} {format_time(row['baseline']):>10} {format_time(row['current']):>10} "
+              f"{change:>8} {row['threshold'] * 100:5.0f}%  {row['status']}")
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
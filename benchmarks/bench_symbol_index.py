@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""
+Builds the symbol index over a synthetic Python project and measures build,
+persistence, incremental refreshes and repo map rendering.
+
+Reports:
+    - cold build time with one process and with every CPU;
+    - save time, size on disk and load time of the persisted index;
+    - refresh time when nothing changed, after touching files (same content)
+      and after editing files;
+    - import graph build time;
+    - repo map render time, tokens used and modules shown for a few budgets.
+
+Usage:
+    python3 benchmarks/bench_symbol_index.py [--files N] [--changes N]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_repo import make_repo
+from smart_coding_assistant.modules.symbol_index import SymbolIndex
+from smart_coding_assistant.modules.symbol_index import render_repo_map
+from smart_coding_assistant.modules.tokens import TokenCounter
+
+
+def timed(func, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--changes", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_symbols_")
+    root = os.path.join(tmp_dir, "project")
+    cache_file = os.path.join(tmp_dir, "symbols.json")
+    try:
+        paths, elapsed = timed(make_repo, root, args.files)
+        print(f"generated {len(paths)} files in {elapsed:.1f} s ({os.cpu_count()} CPUs)")
+
+        index = SymbolIndex(root)
+        found, elapsed = timed(index.python_files)
+        print(f"list .py files:          {elapsed:7.2f} s  {len(found)} files")
+        stats, elapsed = timed(index.update, paths, workers=1)
+        print(f"build, 1 process:        {elapsed:7.2f} s  {stats}")
+        if (os.cpu_count() or 1) > 1:
+            index = SymbolIndex(root)
+            _, elapsed = timed(index.update, paths)
+            print(f"build, {os.cpu_count()} processes:      {elapsed:7.2f} s")
+        symbols = sum(len(record["symbols"]) for record in index.modules().values())
+        print(f"                         {symbols} symbols")
+
+        _, elapsed = timed(index.save, cache_file)
+        print(f"save:                    {elapsed:7.2f} s  {os.path.getsize(cache_file) / 1e6:.1f} MB")
+        index = SymbolIndex(root)
+        _, elapsed = timed(index.load, cache_file)
+        print(f"load:                    {elapsed:7.2f} s")
+
+        stats, elapsed = timed(index.update, paths)
+        print(f"refresh, no change:      {elapsed:7.2f} s  {stats}")
+
+        rng = random.Random(1)
+        changed = rng.sample(paths, args.changes)
+        for rel_path in changed[:args.changes // 2]:
+            os.utime(os.path.join(root, rel_path), ns=(time.time_ns(), time.time_ns()))
+        for rel_path in changed[args.changes // 2:]:
+            with open(os.path.join(root, rel_path), "a", encoding="utf-8") as f:
+                f.write("\ndef freshly_edited_function():\n    return None\n")
+        stats, elapsed = timed(index.update, paths)
+        print(f"refresh, {args.changes} changed:     {elapsed:7.2f} s  {stats}")
+        print(f"                         edited functions found: {len(index.find('freshly_edited_function'))}"
+              f"/{args.changes - args.changes // 2}")
+
+        graph, elapsed = timed(index.import_graph)
+        print(f"import graph:            {elapsed:7.2f} s  {sum(map(len, graph.values()))} edges")
+
+        counter = TokenCounter()
+        for budget in (2048, 8192, 32768):
+            text, elapsed = timed(render_repo_map, index, budget, counter.count)
+            print(f"repo map, {budget:5d} tokens: {elapsed:7.2f} s  {counter.count(text):6d} tokens, "
+                  f"{len(text) / 1024:6.1f} KiB, last line: {text.splitlines()[-1]!r}")
+        text = render_repo_map(index, 512, counter.count)
+        print("\n" + "\n".join(text.splitlines()[:12]))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+"""
+Measures the cost of the tracing layer (see modules/tracing.py).
+
+1. Per-call overhead of a span, a counter and a traced function, with tracing
+   off and on, against an empty call.
+2. An instrumented path (directory walk, file reading and context packing over
+   a synthetic project) with tracing off and on.
+3. Size of the Chrome trace written for that path.
+
+Usage:
+    python3 benchmarks/bench_tracing.py [--files N] [--calls N]
+"""
+
+import os
+import sys
+import time
+import shutil
+import timeit
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_repo import make_repo
+from smart_coding_assistant.modules.context_packer import pack_context
+from smart_coding_assistant.modules.file_loader import get_file_loader
+from smart_coding_assistant.modules.files import directory_structure
+from smart_coding_assistant.modules.tokens import TokenCounter
+from smart_coding_assistant.modules.tracing import enable
+from smart_coding_assistant.modules.tracing import get_tracer
+from smart_coding_assistant.modules.tracing import increment
+from smart_coding_assistant.modules.tracing import span
+from smart_coding_assistant.modules.tracing import traced
+
+
+def plain():
+    pass
+
+
+@traced("bench.traced")
+def decorated():
+    pass
+
+
+def per_call(statement, calls):
+    return min(timeit.repeat(statement, globals=globals(), number=calls, repeat=5)) / calls * 1e9
+
+
+def run_path(root, count_tokens):
+    # Sem o cache de conteúdo, todo arquivo é lido de novo em cada rodada
+    get_file_loader().clear()
+    t0 = time.perf_counter()
+    directory_structure(root)
+    pack_context(root, max_tokens=200000, count_tokens=count_tokens, config={
+        "learn": [".py"], "priority": [], "exclude": []})
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'ns per call':<20} {'off':>8} {'on':>8}")
+    base = per_call("plain()", args.calls)
+    print(f"{'empty call':<20} {base:8.0f} {base:8.0f}")
+    for name, statement in (("span", "with span('bench.span'): pass"),
+                            ("counter", "increment('bench.counter')"),
+                            ("traced function", "decorated()")):
+        enable(False)
+        off = per_call(statement, args.calls)
+        enable(True)
+        on = per_call(statement, args.calls)
+        print(f"{name:<20} {off:8.0f} {on:8.0f}")
+    get_tracer().clear()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_tracing_")
+    root = os.path.join(tmp_dir, "project")
+    try:
+        make_repo(root, args.files)
+        counter = TokenCounter()
+        run_path(root, counter.count)
+        times = {}
+        for flag in (False, True, False, True) * args.rounds:
+            enable(flag)
+            times.setdefault(flag, []).append(run_path(root, counter.count))
+        off, on = min(times[False]), min(times[True])
+        print(f"\nwalk + read + pack of {args.files} files: off {off * 1000:.1f} ms, on {on * 1000:.1f} ms "
+              f"({(on / off - 1) * 100:+.1f}%)")
+
+        trace_file = os.path.join(tmp_dir, "trace.json")
+        get_tracer().export_chrome_trace(trace_file)
+        print(f"chrome trace: {len(get_tracer().spans())} spans, {os.path.getsize(trace_file) / 1024:.0f} KiB, "
+              f"counters {get_tracer().counters()}")
+    finally:
+        enable(False)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Compares the nested-dict scan with the streaming scan and the compact tree.
+
+Reports time to first entry, total scan time and memory per entry.
+
+Usage:
+    python3 benchmarks/bench_tree_stream.py [PATH]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from smart_coding_assistant.modules.files import directory_structure
+from smart_coding_assistant.modules.files import iter_entries
+from smart_coding_assistant.modules.compact_tree import CompactTree
+
+
+def count_entries(tree):
+    total = 0
+    for subtree in tree.values():
+        total += 1
+        if subtree is not None:
+            total += count_entries(subtree)
+    return total
+
+
+def measure_memory(func):
+    tracemalloc.start()
+    result = func()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "."
+
+    # Aquece o cache de inodes do sistema operacional
+    directory_structure(path)
+
+    t0 = time.perf_counter()
+    tree = directory_structure(path)
+    t_dict = time.perf_counter() - t0
+    n = count_entries(next(iter(tree.values())))
+    del tree
+
+    t0 = time.perf_counter()
+    stream = iter_entries(path)
+    next(stream)
+    t_first = time.perf_counter() - t0
+    for _ in stream:
+        pass
+    t_stream = time.perf_counter() - t0
+
+    tree, mem_dict = measure_memory(lambda: directory_structure(path))
+    del tree
+    compact, mem_compact = measure_memory(lambda: CompactTree.from_path(path))
+    n_compact = len(compact) - 1
+
+    print(f"entries:                      {n}")
+    print(f"directory_structure:          {t_dict * 1000:9.1f} ms until first use")
+    print(f"iter_entries first entry:     {t_first * 1000:9.3f} ms")
+    print(f"iter_entries full stream:     {t_stream * 1000:9.1f} ms (includes one stat per entry)")
+    print(f"nested dict memory:           {mem_dict / max(n, 1):9.1f} bytes/entry")
+    print(f"CompactTree memory:           {mem_compact / max(n_compact, 1):9.1f} bytes/entry "
+          f"(with size and mtime)")
+
+
+if __name__ == "__main__":
+    main()
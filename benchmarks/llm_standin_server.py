@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+"""
+Local stand-in for an OpenAI-compatible chat completions API, for benchmarks.
+
+Answers POST .../chat/completions with a deterministic text derived from the
+messages, after a fixed latency. With "stream": true the answer is sent as
+server-sent events, one chunk per word, with chunk_delay seconds between chunks.
+With line_words > 0 the answer has a line break every line_words words.
+With fail_every > 0 every fail_every-th request is answered with 503.
+
+Usage:
+    python3 benchmarks/llm_standin_server.py [--port 8765] [--latency 0.5]
+"""
+
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_answer(messages, words=200, line_words=0):
+    digest = hashlib.sha1(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+    tokens = [digest[i % 40:i % 40 + 6] for i in range(words)]
+    if line_words:
+        tokens = [t + "\n" if i % line_words == line_words - 1 else t for i, t in enumerate(tokens)]
+    return " ".join(tokens)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Cabeçalhos e corpo saem em escritas separadas: sem TCP_NODELAY, conexões mantidas
+    # abertas esperariam o ACK atrasado do cliente (~40 ms) a cada resposta
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length).decode("utf-8"))
+        with self.server.lock:
+            self.server.requests += 1
+            number = self.server.requests
+        time.sleep(self.server.latency)
+        if self.server.fail_every and number % self.server.fail_every == 0:
+            body = b"overloaded"
+            self.send_response(503)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        answer = make_answer(request["messages"], self.server.words, self.server.line_words)
+        model = request.get("model", "standin")
+        if request.get("stream"):
+            self._stream(model, answer)
+            return
+
+        body = json.dumps({
+            "id": "standin",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(answer.split())},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, model, answer):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(data):
+            payload = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(payload), payload))
+            self.wfile.flush()
+
+        try:
+            for i, word in enumerate(answer.split(" ")):
+                delta = {"content": word if i == 0 else " " + word}
+                send(json.dumps({"model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}))
+                if self.server.chunk_delay:
+                    time.sleep(self.server.chunk_delay)
+            send(json.dumps({"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}))
+            send("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # O cliente cancelou o fluxo
+            self.close_connection = True
+
+
+class StandinServer(ThreadingHTTPServer):
+    # Fila de conexões grande: muitos clientes conectando ao mesmo tempo não esperam retransmissão do SYN
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def start_server(latency=0.5, port=0, words=200, chunk_delay=0.0, line_words=0, fail_every=0):
+    """
+    Starts the stand-in server in a daemon thread.
+
+    Returns:
+        tuple: (server, base URL). server.requests counts the answered requests;
+               call server.shutdown() to stop it.
+    """
+    server = StandinServer(("127.0.0.1", port), StandinHandler)
+    server.latency = latency
+    server.words = words
+    server.chunk_delay = chunk_delay
+    server.line_words = line_words
+    server.fail_every = fail_every
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    args = parser.parse_args()
+    server, base_url = start_server(args.latency, args.port, chunk_delay=args.chunk_delay)
+    print(f"listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
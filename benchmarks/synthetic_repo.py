@@ -0,0 +1,238 @@
+#!/usr/bin/python3
+"""
+Generates a deterministic synthetic Python project for benchmarks.
+
+Files are spread over nested packages (files_per_dir files per directory) and
+contain classes and functions whose identifiers mix camelCase and snake_case
+names drawn from a skewed vocabulary, so a few words are very common and most
+are rare, as in real code. Each file imports up to three earlier modules,
+mostly low-numbered ones, so a few modules are imported by many. File number i
+defines a function named marker(i), which no other file uses, for retrieval
+checks.
+
+make_tree() adds other directory shapes ("deep" chains of directories, "wide"
+directories with thousands of entries) and large text and binary blobs, and
+make_git_repo() commits the tree and then modifies some of the files.
+
+Usage:
+    python3 benchmarks/synthetic_repo.py DEST [--files N] [--shape SHAPE] [--git] [--modified N]
+"""
+
+import os
+import time
+import random
+import argparse
+import itertools
+import subprocess
+
+SHAPES = ("balanced", "deep", "wide")
+
+SYLLABLES = ["ba", "co", "de", "fi", "gu", "ha", "ji", "ko", "lu", "ma", "ne", "po", "qui", "ra",
+             "se", "ti", "vu", "xa", "ze", "tor", "ler", "ment", "ing", "dex"]
+
+
+def make_vocabulary(size, seed=0):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def marker(i):
+    return f"uniqueMarker{i}Handler"
+
+
+def _identifier(rng, words, cum_weights, camel):
+    parts = rng.choices(words, cum_weights=cum_weights, k=rng.randint(1, 3))
+    if camel:
+        return parts[0] + "".join(part.capitalize() for part in parts[1:])
+    return "_".join(parts)
+
+
+def module_path(i, files_per_dir=50):
+    directory = f"pkg_{i // (files_per_dir * files_per_dir)}/sub_{(i // files_per_dir) % files_per_dir}"
+    return directory, f"{directory}/module_{i}.py"
+
+
+def tree_path(i, shape="balanced", files_per_dir=50, depth=24):
+    """
+    Returns (directory, relative path) of file number i for a tree shape.
+
+    "balanced" uses pkg_*/sub_* with files_per_dir files per directory, "deep" puts
+    files_per_dir files on each level of chains of depth directories, and "wide"
+    puts files_per_dir * 100 files in each top-level directory.
+    """
+    if shape == "balanced":
+        return module_path(i, files_per_dir)
+    if shape == "deep":
+        chain, level = divmod(i // files_per_dir, depth)
+        directory = "/".join([f"deep_{chain}"] + [f"level_{k}" for k in range(level)])
+    elif shape == "wide":
+        directory = f"wide_{i // (files_per_dir * 100)}"
+    else:
+        raise ValueError(f"Unknown shape: {shape}")
+    return directory, f"{directory}/module_{i}.py"
+
+
+def make_file(rng, words, cum_weights, i, lines=40, files_per_dir=50):
+    out = [f'"""Module {i}."""', "", "import os"]
+    for j in sorted({int(i * rng.random() ** 3) for _ in range(rng.randint(0, 3))} if i else ()):
+        directory, _ = module_path(j, files_per_dir)
+        out.append(f"from {directory.replace('/', '.')} import module_{j}")
+    out.append("")
+    class_name = _identifier(rng, words, cum_weights, True).capitalize()
+    out.append(f"class {class_name}:")
+    while len(out) < lines:
+        name = _identifier(rng, words, cum_weights, rng.random() < 0.5)
+        args = ", ".join(_identifier(rng, words, cum_weights, False) for _ in range(rng.randint(0, 3)))
+        out.append(f"    def {name}(self{', ' if args else ''}{args}):")
+        for _ in range(rng.randint(1, 4)):
+            target = _identifier(rng, words, cum_weights, False)
+            call = _identifier(rng, words, cum_weights, True)
+            out.append(f"        {target} = self.{call}({rng.randint(0, 99)})")
+        out.append("")
+    out.append(f"def {marker(i)}():")
+    out.append("    return None")
+    return "\n".join(out) + "\n"
+
+
+def make_repo(root, files=1000, files_per_dir=50, vocabulary=5000, seed=0, lines=40):
+    """
+    Writes the synthetic project into root (created if needed).
+
+    Returns:
+        list of str: Relative paths of the generated files, in generation order.
+    """
+    rng = random.Random(seed)
+    words = make_vocabulary(vocabulary, seed)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    paths = []
+    for i in range(files):
+        directory, rel_path = module_path(i, files_per_dir)
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+        with open(os.path.join(root, rel_path), "w", encoding="utf-8") as f:
+            f.write(make_file(rng, words, cum_weights, i, lines, files_per_dir))
+        paths.append(rel_path)
+    return paths
+
+
+def make_tree(root, files=1000, shape="balanced", files_per_dir=50, depth=24, lines=12, large_files=0,
+              large_size=1 << 20, binary_files=0, binary_size=64 << 10, vocabulary=5000, seed=0):
+    """
+    Writes a synthetic project with a given directory shape and optional large and binary blobs.
+
+    Args:
+        root (str): Destination directory (created if needed).
+        files (int): Number of Python files.
+        shape (str): One of SHAPES (see tree_path()).
+        files_per_dir (int): Files per directory (per level for "deep").
+        depth (int): Directory levels of each chain of the "deep" shape.
+        lines (int): Approximate lines per Python file.
+        large_files (int): Number of large text files (data/large_*.txt).
+        large_size (int): Size of each large text file, in bytes.
+        binary_files (int): Number of binary files (assets/blob_*.bin).
+        binary_size (int): Size of each binary file, in bytes.
+
+    Returns:
+        list of str: Relative paths of the generated files.
+    """
+    rng = random.Random(seed)
+    words = make_vocabulary(vocabulary, seed)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    paths = []
+    made = set()
+    for i in range(files):
+        directory, rel_path = tree_path(i, shape, files_per_dir, depth)
+        if directory not in made:
+            os.makedirs(os.path.join(root, directory), exist_ok=True)
+            made.add(directory)
+        with open(os.path.join(root, rel_path), "w", encoding="utf-8") as f:
+            f.write(make_file(rng, words, cum_weights, i, lines, files_per_dir))
+        paths.append(rel_path)
+
+    if large_files:
+        os.makedirs(os.path.join(root, "data"), exist_ok=True)
+        line = " ".join(words[:12]) + "\n"
+        for i in range(large_files):
+            rel_path = f"data/large_{i}.txt"
+            with open(os.path.join(root, rel_path), "w", encoding="utf-8") as f:
+                f.write(f"{i}\n" + line * (large_size // len(line)))
+            paths.append(rel_path)
+    if binary_files:
+        os.makedirs(os.path.join(root, "assets"), exist_ok=True)
+        for i in range(binary_files):
+            rel_path = f"assets/blob_{i}.bin"
+            with open(os.path.join(root, rel_path), "wb") as f:
+                f.write(b"\0BIN" + random_bytes(rng, binary_size))
+            paths.append(rel_path)
+    return paths
+
+
+def random_bytes(rng, size):
+    """
+    Returns size random bytes from rng (random.Random.randbytes() needs Python 3.9).
+    """
+    return rng.getrandbits(8 * size).to_bytes(size, "little") if size > 0 else b""
+
+
+def _git(root, *args):
+    subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost"] + list(args),
+                   cwd=root, check=True, capture_output=True)
+
+
+def make_git_repo(root, modified=0, seed=0, **tree_options):
+    """
+    Writes a synthetic project with make_tree(), commits it and then modifies some files.
+
+    Text files get a line appended and binary files are rewritten, spread evenly over
+    the tree, so the work tree differs from HEAD in exactly those files.
+
+    Args:
+        root (str): Destination directory (created if needed).
+        modified (int): Number of files changed after the commit.
+        seed (int): Random seed.
+        **tree_options: Arguments of make_tree().
+
+    Returns:
+        tuple: (list of relative paths, list of modified paths).
+    """
+    paths = make_tree(root, seed=seed, **tree_options)
+    _git(root, "init", "-q")
+    _git(root, "add", "-A")
+    _git(root, "commit", "-q", "-m", "synthetic")
+    # Espera o índice deixar de ser "racy" para medir o caso comum
+    time.sleep(1.1)
+    subprocess.run(["git", "update-index", "-q", "--refresh"], cwd=root, capture_output=True)
+
+    rng = random.Random(seed + 1)
+    step = max(1, len(paths) // modified) if modified else 0
+    changed = paths[::step][:modified] if modified else []
+    for rel_path in changed:
+        full_path = os.path.join(root, rel_path)
+        if rel_path.endswith(".bin"):
+            # Mesmo tamanho do original (lido antes de open() truncar o arquivo)
+            size = os.path.getsize(full_path) - len(b"\0BIN")
+            with open(full_path, "wb") as f:
+                f.write(b"\0BIN" + random_bytes(rng, size))
+        else:
+            with open(full_path, "a", encoding="utf-8") as f:
+                f.write("\nCHANGED = True\n")
+    return paths, changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dest")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--shape", choices=SHAPES)
+    parser.add_argument("--git", action="store_true", help="Commit the tree and modify --modified files.")
+    parser.add_argument("--modified", type=int, default=0)
+    args = parser.parse_args()
+    if args.git:
+        paths, changed = make_git_repo(args.dest, args.modified, files=args.files, shape=args.shape or "balanced")
+        print(f"{len(paths)} files committed in {args.dest}, {len(changed)} modified")
+    elif args.shape:
+        print(f"{len(make_tree(args.dest, args.files, args.shape))} files written to {args.dest}")
+    else:
+        print(f"{len(make_repo(args.dest, args.files))} files written to {args.dest}")
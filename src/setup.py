@@ -41,7 +41,8 @@ setup(
     ],
     entry_points={
         'console_scripts': [
-            __program_name__+'='+__package__+'.program:main',
+            __program_name__+'='+__package__+'.launcher:main',
+            __program_name__+'-batch='+__package__+'.batch:main',
         ],
     },
     classifiers=[
@@ -0,0 +1,351 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import datetime
+import concurrent.futures
+
+from smart_coding_assistant.about import __program_name__
+from smart_coding_assistant.modules.models import DEFAULT_MODEL
+
+# Tarefas do modo em lote: pergunta feita ao modelo e contexto enviado com ela
+TASKS = {
+    "tree": {
+        "context": "files",
+        "question": "Summarize this project: its purpose, its main components and entry points, "
+                    "and how they fit together.",
+    },
+    "review": {
+        "context": "diff",
+        "question": "Review these changes. List bugs, risky edits and missing tests, "
+                    "citing the file and the hunk of each finding.",
+    },
+    "tests": {
+        "context": "files",
+        "question": "Write unit tests for the least tested public functions of this project. "
+                    "Answer with complete test files.",
+    },
+}
+
+DEFAULT_TASK = "tree"
+
+# Estados de um registro que não precisam ser refeitos com --resume
+DONE_STATUSES = ("ok", "skipped")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog=f"{__program_name__}-batch",
+        description="Runs analyses over many repositories without the window and writes one JSON line per result.")
+    parser.add_argument("repos", nargs="*", help="Repository or project directories.")
+    parser.add_argument("--repos-file", help="File with one directory per line (# starts a comment).")
+    parser.add_argument("--task", action="append", choices=sorted(TASKS),
+                        help=f"Analysis to run; repeat for several (default: {DEFAULT_TASK}).")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: standard output).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Append to the output, skipping the repository/task pairs it already has.")
+    parser.add_argument("-j", "--jobs", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Worker processes (default: %(default)s).")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Model name (default: %(default)s).")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint (default: the llm_client endpoint).")
+    parser.add_argument("--max-tokens", type=int, help="Context budget. Default: the model context.")
+    parser.add_argument("--refresh", action="store_true", help="Ask the model again instead of reusing stored answers.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only pack the contexts and report their size, without calling the model.")
+    return parser.parse_args(argv)
+
+
+def read_repo_list(args):
+    """
+    Collects the directories given on the command line and in --repos-file, without duplicates.
+
+    Returns:
+        list of str: Absolute paths, in the given order.
+    """
+    repos = list(args.repos)
+    if args.repos_file:
+        with open(args.repos_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    repos.append(line)
+
+    seen = set()
+    result = []
+    for repo in repos:
+        path = os.path.realpath(os.path.expanduser(repo))
+        if path not in seen:
+            seen.add(path)
+            result.append(path)
+    return result
+
+
+def read_done(output):
+    """
+    Returns the repository/task pairs that an earlier run already finished in the output file.
+    """
+    done = set()
+    try:
+        with open(output, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Linha cortada por uma interrupção no meio da escrita
+                    continue
+                if record.get("status") in DONE_STATUSES:
+                    done.add((record.get("repo"), record.get("task")))
+    except OSError:
+        pass
+    return done
+
+
+def _tree_cache(repo):
+    """
+    Returns the shared tree cache of a repository, persisted in the user cache directory,
+    so the next run only rescans the directories that changed.
+    """
+    from smart_coding_assistant.modules.context_packer import load_project_config
+    from smart_coding_assistant.modules.ignore import DEFAULT_EXCLUDES
+    from smart_coding_assistant.modules.paths import cache_dir
+    from smart_coding_assistant.modules.tree_cache import get_tree_cache
+
+    # As mesmas opções de context_packer.select_files, para que pack_context use esta instância
+    exclude = list(DEFAULT_EXCLUDES) + list(load_project_config(repo)["exclude"])
+    name = hashlib.sha1(repo.encode("utf-8", errors="surrogatepass")).hexdigest()[:16] + ".json"
+    return get_tree_cache(repo, cache_file=os.path.join(cache_dir("trees"), name), gitignore=True, exclude=exclude)
+
+
+def run_task(repo, task, options):
+    """
+    Packs the context of one task for a repository and asks the model.
+
+    Args:
+        repo (str): Repository directory.
+        task (str): Key of TASKS.
+        options (dict): "model", "base_url", "max_tokens", "refresh" and "dry_run".
+
+    Returns:
+        dict: Fields of the result record.
+    """
+    from smart_coding_assistant.modules.llm_client import ask
+
+    spec = TASKS[task]
+    model = options["model"]
+    if spec["context"] == "diff":
+        from smart_coding_assistant.modules.diff_context import pack_diff_context
+        from smart_coding_assistant.modules.git_meld import get_git_base_dir
+
+        # Diretórios comuns são entradas válidas: sem diff, como "no changes"
+        if get_git_base_dir(repo) is None:
+            return {"status": "skipped", "reason": "not a git repository"}
+        packed = pack_diff_context(repo, model=model, max_tokens=options["max_tokens"], untracked=True)
+        if not packed["files"]:
+            return {"status": "skipped", "reason": "no changes"}
+    else:
+        from smart_coding_assistant.modules.context_packer import pack_context
+
+        packed = pack_context(repo, model=model, max_tokens=options["max_tokens"], question=spec["question"],
+                              include_repo_map=True)
+
+    record = {
+        "status": "ok",
+        "model": model,
+        "context_tokens": packed["tokens"],
+        "files": len(packed["files"]),
+        "truncated": len(packed["truncated"]),
+        "omitted": len(packed["omitted"]),
+    }
+    if options["dry_run"]:
+        return record
+
+    kwargs = {"base_url": options["base_url"]} if options["base_url"] else {}
+    answer, cached = ask(spec["question"], packed["text"], model=model, refresh=options["refresh"], **kwargs)
+    record.update(cached=cached, answer=answer)
+    return record
+
+
+def run_repo(repo, tasks, options):
+    """
+    Runs the tasks of one repository in a worker process.
+
+    The tasks of a repository run one after the other in the same process, so they
+    share its tree cache, git index cache, symbol and BM25 indexes and file loader
+    without two processes writing the same cache files.
+
+    Returns:
+        list of dict: One record per task.
+    """
+    from smart_coding_assistant.modules.tokens import get_token_counter
+
+    records = []
+    if not os.path.isdir(repo):
+        return [{"repo": repo, "task": task, "status": "error", "error": "not a directory"} for task in tasks]
+
+    tree_cache = _tree_cache(repo)
+    for task in tasks:
+        t0 = time.perf_counter()
+        record = {"repo": repo, "task": task}
+        try:
+            record.update(run_task(repo, task, options))
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        record["seconds"] = round(time.perf_counter() - t0, 3)
+        record["finished"] = datetime.datetime.now().isoformat(timespec="seconds")
+        records.append(record)
+
+    try:
+        tree_cache.save()
+        get_token_counter().save_if_dirty()
+    except OSError:
+        pass
+    return records
+
+
+class ResultWriter:
+    """
+    Writes result records as JSON lines, flushed one by one, so the output of an
+    interrupted run is still valid up to its last complete line.
+
+    Args:
+        output (str): Output file, or "-" for standard output.
+        append (bool): Append to an existing file instead of replacing it.
+    """
+    def __init__(self, output, append=False):
+        if output == "-":
+            self._file = sys.stdout
+            self._owned = False
+        else:
+            self._file = open(output, "a" if append else "w", encoding="utf-8")
+            self._owned = True
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+
+
+def run_batch(repos, options, writer, jobs=1, progress=None):
+    """
+    Spreads the repositories over a process pool and writes the records as they finish.
+
+    Worker processes live for the whole batch, so what they keep in memory (token
+    counts, answers cache connection, parsed git state) serves every repository they
+    get. At most 2 * jobs repositories are queued at a time, so an interruption leaves
+    little work started and the remaining repositories untouched.
+
+    Args:
+        repos (list of tuple): (repository, tasks to run) pairs.
+        options (dict): See run_task().
+        writer (ResultWriter): Destination of the records.
+        jobs (int): Worker processes.
+        progress (callable or None): Function (done, total, records, elapsed) called after each repository.
+
+    Returns:
+        dict: Keys "repos" (finished), "records", "errors", "seconds", "repos_per_minute"
+              and "interrupted".
+    """
+    t0 = time.perf_counter()
+    summary = {"repos": 0, "records": 0, "errors": 0, "interrupted": False}
+    pending = iter(repos)
+    running = {}
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+    try:
+        while True:
+            while len(running) < 2 * jobs:
+                item = next(pending, None)
+                if item is None:
+                    break
+                running[executor.submit(run_repo, item[0], item[1], options)] = item
+            if not running:
+                break
+
+            finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                repo, tasks = running.pop(future)
+                try:
+                    records = future.result()
+                except Exception as e:
+                    # O processo morreu (falta de memória, sinal): o resto do lote continua
+                    records = [{"repo": repo, "task": task, "status": "error", "error": f"{type(e).__name__}: {e}"}
+                               for task in tasks]
+                for record in records:
+                    writer.write(record)
+                summary["repos"] += 1
+                summary["records"] += len(records)
+                summary["errors"] += sum(record["status"] == "error" for record in records)
+                if progress is not None:
+                    progress(summary["repos"], len(repos), records, time.perf_counter() - t0)
+    except KeyboardInterrupt:
+        summary["interrupted"] = True
+        for future in running:
+            future.cancel()
+    finally:
+        executor.shutdown(wait=not summary["interrupted"])
+
+    summary["seconds"] = time.perf_counter() - t0
+    summary["repos_per_minute"] = summary["repos"] / summary["seconds"] * 60 if summary["seconds"] else 0.0
+    return summary
+
+
+def _print_progress(done, total, records, elapsed):
+    statuses = ", ".join(f"{record['task']} {record['status']}" for record in records)
+    print(f"[{done}/{total}] {records[0]['repo']}: {statuses} ({done / elapsed * 60:.1f} repos/min)",
+          file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    """
+    Entry point of the batch console script.
+
+    Returns:
+        int: 0 if every task succeeded, 1 if some failed, 130 if interrupted.
+    """
+    args = parse_args(argv)
+    repos = read_repo_list(args)
+    if not repos:
+        print("No repositories given.", file=sys.stderr)
+        return 2
+    tasks = args.task or [DEFAULT_TASK]
+    tasks = list(dict.fromkeys(tasks))
+
+    done = read_done(args.output) if args.resume and args.output != "-" else set()
+    work = []
+    for repo in repos:
+        todo = [task for task in tasks if (repo, task) not in done]
+        if todo:
+            work.append((repo, todo))
+    if len(work) < len(repos):
+        print(f"{len(repos) - len(work)} repositories already done", file=sys.stderr)
+
+    options = {
+        "model": args.model,
+        "base_url": args.base_url,
+        "max_tokens": args.max_tokens,
+        "refresh": args.refresh,
+        "dry_run": args.dry_run,
+    }
+    writer = ResultWriter(args.output, append=args.resume)
+    try:
+        summary = run_batch(work, options, writer, jobs=max(1, args.jobs), progress=_print_progress)
+    finally:
+        writer.close()
+
+    print(f"{summary['repos']} repositories, {summary['records']} results ({summary['errors']} errors) "
+          f"in {summary['seconds']:.1f} s: {summary['repos_per_minute']:.1f} repos/min",
+          file=sys.stderr)
+    if summary["interrupted"]:
+        print("Interrupted; the results written so far are kept (see --resume).", file=sys.stderr)
+        return 130
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+
+import sys
+import argparse
+
+from smart_coding_assistant.about import __program_name__
+from smart_coding_assistant.modules.single_instance import ACTIONS
+from smart_coding_assistant.modules.single_instance import make_request
+from smart_coding_assistant.modules.single_instance import send_request
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog=__program_name__)
+    parser.add_argument("project", nargs="?", help="Project directory to open.")
+    parser.add_argument("--action", choices=ACTIONS, default="show",
+                        help="What the window should do with the project (default: show).")
+    parser.add_argument("--new-instance", action="store_true",
+                        help="Start a separate window that does not stay resident.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Entry point of the console script.
+
+    If a resident instance is running, hands the project and action over to it and
+    returns at once, without importing Qt. Otherwise starts the window, which stays
+    resident and serves the following launches.
+    """
+    args = parse_args(argv)
+    request = make_request(args.project, args.action)
+
+    if not args.new_instance:
+        if send_request(request):
+            return 0
+        if args.action == "quit":
+            return 0
+
+    # Só agora o Qt e a janela são importados
+    from smart_coding_assistant.program import main as program_main
+    return program_main(request, resident=not args.new_instance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
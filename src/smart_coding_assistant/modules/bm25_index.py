@@ -0,0 +1,557 @@
+#!/usr/bin/python3
+
+import os
+import re
+import json
+import math
+import hashlib
+import threading
+import concurrent.futures
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from smart_coding_assistant.modules.paths import cache_dir
+from smart_coding_assistant.modules.tracing import traced
+
+INDEX_VERSION = 1
+
+# Parâmetros clássicos do BM25
+K1 = 1.2
+B = 0.75
+
+# Os termos do caminho contam como se aparecessem várias vezes no arquivo
+PATH_WEIGHT = 3
+
+# Só o início de arquivos muito grandes (gerados, minificados) é indexado
+MAX_INDEX_BYTES = 1024 * 1024
+
+# Abaixo disso os arquivos são analisados no próprio processo
+PARALLEL_MIN_FILES = 512
+CHUNK_FILES = 256
+
+# Postings novos ou documentos removidos acima dessa fração disparam a compactação
+COMPACT_SHARE = 0.25
+
+_WORD_RE = re.compile(r"\w+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# Divisões de identificadores já vistos, por processo
+_split_cache = {}
+_SPLIT_CACHE_SIZE = 200000
+
+
+def split_identifier(word):
+    """
+    Splits an identifier into its lower-case terms, following snake_case and camelCase.
+
+    The whole identifier is kept as an extra term when it has more than one part,
+    so exact identifier matches score higher than matches of its parts.
+
+    Args:
+        word (str): Identifier or word (e.g. "parseHTTPResponse", "read_index").
+
+    Returns:
+        list of str: Terms, e.g. ["parse", "http", "response", "parsehttpresponse"].
+    """
+    terms = _split_cache.get(word)
+    if terms is not None:
+        return terms
+    if word.islower() and word.isalpha():
+        # Caso mais comum: palavra simples em minúsculas
+        return [word] if len(word) > 1 else []
+
+    parts = []
+    for chunk in word.split("_"):
+        if not chunk:
+            continue
+        if chunk.isascii():
+            parts.extend(part.lower() for part in _CAMEL_RE.findall(chunk))
+        else:
+            parts.append(chunk.lower())
+    terms = [part for part in parts if len(part) > 1 and not part.isdigit()]
+    if len(parts) > 1:
+        whole = word.strip("_").lower()
+        if len(whole) > 1 and not whole.isdigit():
+            terms.append(whole)
+
+    if len(_split_cache) >= _SPLIT_CACHE_SIZE:
+        _split_cache.clear()
+    _split_cache[word] = terms
+    return terms
+
+
+def tokenize(text):
+    """
+    Code-aware tokenisation: words and identifiers split by split_identifier().
+
+    Args:
+        text (str): Source code or text.
+
+    Returns:
+        list of str: Terms in order of occurrence.
+    """
+    terms = []
+    for word in _WORD_RE.findall(text):
+        terms.extend(split_identifier(word))
+    return terms
+
+
+def count_terms(text):
+    """
+    Counts the terms of tokenize(text), splitting each distinct word only once.
+
+    Args:
+        text (str): Source code or text.
+
+    Returns:
+        Counter: term -> number of occurrences.
+    """
+    counts = Counter()
+    for word, count in Counter(_WORD_RE.findall(text)).items():
+        for term in split_identifier(word):
+            counts[term] += count
+    return counts
+
+
+def _analyze_files(root, items):
+    """
+    Reads and tokenises files; runs in worker processes.
+
+    Args:
+        root (str): Root directory.
+        items (list of tuple): (relative path, digest already indexed or None).
+
+    Returns:
+        tuple: (metas, vocabulary, doc indexes, term indexes, term frequencies). Each meta is
+               (rel_path, mtime_ns, size, digest, length): mtime_ns is None for unreadable files,
+               digest is None for binary files and length is None for unchanged contents.
+    """
+    metas = []
+    vocabulary = {}
+    doc_indexes = array("i")
+    term_indexes = array("i")
+    frequencies = array("f")
+    for rel_path, known_digest in items:
+        try:
+            with open(os.path.join(root, rel_path), "rb") as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            metas.append((rel_path, None, None, None, None))
+            continue
+
+        if b"\0" in data[:8192]:
+            metas.append((rel_path, st.st_mtime_ns, st.st_size, None, None))
+            continue
+        digest = hashlib.sha1(data).hexdigest()
+        if digest == known_digest:
+            metas.append((rel_path, st.st_mtime_ns, st.st_size, digest, None))
+            continue
+
+        counts = count_terms(data[:MAX_INDEX_BYTES].decode("utf-8", errors="replace"))
+        for term in tokenize(rel_path):
+            counts[term] += PATH_WEIGHT
+
+        index = len(metas)
+        metas.append((rel_path, st.st_mtime_ns, st.st_size, digest, sum(counts.values())))
+        doc_indexes.extend(array("i", [index]) * len(counts))
+        term_indexes.extend([vocabulary.setdefault(term, len(vocabulary)) for term in counts])
+        frequencies.extend(counts.values())
+    return metas, list(vocabulary), doc_indexes, term_indexes, frequencies
+
+
+class BM25Index:
+    """
+    Inverted index of the files of a project, ranked with BM25.
+
+    Postings are kept as compressed rows per term (numpy arrays) plus a small sorted
+    segment of recent postings. Changed files get a new document and their old one is
+    marked as removed; the segment and the removed documents are merged into the rows
+    when they grow past COMPACT_SHARE of the index. Files are only read again when
+    their mtime or size changed, and only re-tokenised when their hash changed.
+
+    Args:
+        root (str): Root directory of the project.
+        cache_file (str or None): JSON file where the index is persisted; the postings
+                                  are stored next to it, with the ".npz" extension.
+        k1 (float): BM25 term frequency saturation.
+        b (float): BM25 length normalisation.
+    """
+    def __init__(self, root, cache_file=None, k1=K1, b=B):
+        self.root = os.path.abspath(root)
+        self.cache_file = cache_file
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._clear()
+        if cache_file is not None:
+            self.load()
+
+    def _clear(self):
+        # termo -> id
+        self.vocab = {}
+        # Por documento: caminho relativo (None se removido), (mtime_ns, size, digest) e tamanho em termos
+        self.paths = []
+        self.metas = []
+        self.lengths = []
+        # caminho -> documento vivo
+        self.doc_of = {}
+        # Arquivos binários: caminho -> (mtime_ns, size)
+        self.skipped = {}
+        self.removed = 0
+        # Linhas por termo: postings do termo t em [offsets[t], offsets[t + 1])
+        self._offsets = np.zeros(1, np.int64)
+        self._docs = np.empty(0, np.int32)
+        self._tfs = np.empty(0, np.float32)
+        # Segmento recente, ordenado por termo
+        self._delta_terms = np.empty(0, np.int32)
+        self._delta_docs = np.empty(0, np.int32)
+        self._delta_tfs = np.empty(0, np.float32)
+        self._pending = []
+        self._arrays = None
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.doc_of)
+
+    def _remove(self, doc):
+        del self.doc_of[self.paths[doc]]
+        self.paths[doc] = None
+        self.removed += 1
+
+    def _merge(self, result):
+        metas, vocabulary, doc_indexes, term_indexes, frequencies = result
+        term_ids = np.fromiter((self.vocab.setdefault(term, len(self.vocab)) for term in vocabulary),
+                               np.int32, len(vocabulary))
+        doc_ids = np.full(len(metas), -1, np.int32)
+        stats = Counter()
+        for i, (rel_path, mtime_ns, size, digest, length) in enumerate(metas):
+            old = self.doc_of.get(rel_path)
+            if mtime_ns is None or digest is None:
+                # Ilegível ou binário: sai do índice
+                if old is not None:
+                    self._remove(old)
+                    stats["removed"] += 1
+                if mtime_ns is not None:
+                    self.skipped[rel_path] = (mtime_ns, size)
+                continue
+            if length is None:
+                self.metas[old] = (mtime_ns, size, digest)
+                stats["touched"] += 1
+                continue
+            if old is not None:
+                self._remove(old)
+                stats["updated"] += 1
+            else:
+                stats["added"] += 1
+            self.skipped.pop(rel_path, None)
+            doc = len(self.paths)
+            self.paths.append(rel_path)
+            self.metas.append((mtime_ns, size, digest))
+            self.lengths.append(length)
+            self.doc_of[rel_path] = doc
+            doc_ids[i] = doc
+
+        if len(term_indexes):
+            self._pending.append((
+                term_ids[np.frombuffer(term_indexes, np.intc)],
+                doc_ids[np.frombuffer(doc_indexes, np.intc)],
+                np.frombuffer(frequencies, np.float32),
+            ))
+        return stats
+
+    def _flush_pending(self):
+        if not self._pending:
+            return
+        terms = np.concatenate([self._delta_terms] + [chunk[0] for chunk in self._pending])
+        docs = np.concatenate([self._delta_docs] + [chunk[1] for chunk in self._pending])
+        tfs = np.concatenate([self._delta_tfs] + [chunk[2] for chunk in self._pending])
+        self._pending = []
+        order = np.argsort(terms, kind="stable")
+        self._delta_terms, self._delta_docs, self._delta_tfs = terms[order], docs[order], tfs[order]
+
+    def compact(self):
+        """
+        Merges the recent postings into the rows and drops the removed documents, renumbering the others.
+        """
+        with self._lock:
+            self._flush_pending()
+            vocab_size = len(self.vocab)
+            base_terms = np.repeat(np.arange(len(self._offsets) - 1, dtype=np.int32), np.diff(self._offsets))
+            terms = np.concatenate([base_terms, self._delta_terms])
+            docs = np.concatenate([self._docs, self._delta_docs])
+            tfs = np.concatenate([self._tfs, self._delta_tfs])
+
+            alive = np.fromiter((path is not None for path in self.paths), bool, len(self.paths))
+            keep = alive[docs]
+            terms, docs, tfs = terms[keep], docs[keep], tfs[keep]
+            new_ids = np.cumsum(alive, dtype=np.int64).astype(np.int32) - 1
+            docs = new_ids[docs]
+
+            order = np.argsort(terms, kind="stable")
+            self._docs, self._tfs = docs[order], tfs[order]
+            counts = np.bincount(terms, minlength=vocab_size)
+            self._offsets = np.zeros(vocab_size + 1, np.int64)
+            np.cumsum(counts, out=self._offsets[1:])
+            self._delta_terms = np.empty(0, np.int32)
+            self._delta_docs = np.empty(0, np.int32)
+            self._delta_tfs = np.empty(0, np.float32)
+
+            kept = np.flatnonzero(alive)
+            self.paths = [self.paths[doc] for doc in kept]
+            self.metas = [self.metas[doc] for doc in kept]
+            self.lengths = [self.lengths[doc] for doc in kept]
+            self.doc_of = {path: doc for doc, path in enumerate(self.paths)}
+            self.removed = 0
+            self._arrays = None
+
+    @traced("bm25_index.update")
+    def update(self, paths=None, config=None, workers=None):
+        """
+        Brings the index up to date with the project files.
+
+        Args:
+            paths (list of str or None): Relative paths of the files to index. If None, uses
+                                         the files selected by context_packer.select_files().
+            config (dict or None): Project configuration, used when paths is None.
+            workers (int or None): Processes used to analyse many changed files. None uses the number of CPUs.
+
+        Returns:
+            dict: Counts of "added", "updated", "touched" (new mtime, same content),
+                  "removed" and "unchanged" files.
+        """
+        if paths is None:
+            from smart_coding_assistant.modules.context_packer import load_project_config
+            from smart_coding_assistant.modules.context_packer import select_files
+
+            if config is None:
+                config = load_project_config(self.root)
+            _, paths = select_files(self.root, config)
+
+        with self._lock:
+            stats = Counter()
+            todo = []
+            for rel_path in paths:
+                try:
+                    st = os.stat(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                doc = self.doc_of.get(rel_path)
+                if doc is not None:
+                    mtime_ns, size, digest = self.metas[doc]
+                    if mtime_ns == st.st_mtime_ns and size == st.st_size:
+                        stats["unchanged"] += 1
+                        continue
+                    todo.append((rel_path, digest))
+                elif self.skipped.get(rel_path) != (st.st_mtime_ns, st.st_size):
+                    todo.append((rel_path, None))
+
+            wanted = set(paths)
+            for rel_path in [rel_path for rel_path in self.doc_of if rel_path not in wanted]:
+                self._remove(self.doc_of[rel_path])
+                stats["removed"] += 1
+            for rel_path in [rel_path for rel_path in self.skipped if rel_path not in wanted]:
+                del self.skipped[rel_path]
+
+            if workers is None:
+                workers = os.cpu_count() or 1
+            chunks = [todo[i:i + CHUNK_FILES] for i in range(0, len(todo), CHUNK_FILES)]
+            if workers > 1 and len(todo) >= PARALLEL_MIN_FILES:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                    for result in executor.map(_analyze_files, [self.root] * len(chunks), chunks):
+                        stats.update(self._merge(result))
+            else:
+                for chunk in chunks:
+                    stats.update(self._merge(_analyze_files(self.root, chunk)))
+
+            if todo or stats["removed"]:
+                self.dirty = True
+                self._arrays = None
+                self._flush_pending()
+                if (len(self._delta_docs) > COMPACT_SHARE * len(self._docs)
+                        or self.removed > COMPACT_SHARE * len(self.paths)):
+                    self.compact()
+
+        return {key: stats[key] for key in ("added", "updated", "touched", "removed", "unchanged")}
+
+    def _postings(self, term_id):
+        docs, tfs = [], []
+        if term_id < len(self._offsets) - 1:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs.append(self._docs[start:end])
+            tfs.append(self._tfs[start:end])
+        start, end = np.searchsorted(self._delta_terms, [term_id, term_id + 1])
+        if end > start:
+            docs.append(self._delta_docs[start:end])
+            tfs.append(self._delta_tfs[start:end])
+        if len(docs) == 1:
+            return docs[0], tfs[0]
+        if not docs:
+            return None, None
+        return np.concatenate(docs), np.concatenate(tfs)
+
+    def _query_arrays(self):
+        if self._arrays is None:
+            alive = np.fromiter((path is not None for path in self.paths), bool, len(self.paths))
+            lengths = np.asarray(self.lengths, np.float32)
+            live = np.count_nonzero(alive)
+            avgdl = float(lengths[alive].mean()) if live else 1.0
+            norm = self.k1 * (1 - self.b + self.b * lengths / max(avgdl, 1e-9))
+            self._arrays = (alive, norm, live)
+        return self._arrays
+
+    @traced("bm25_index.search")
+    def search(self, query, k=10):
+        """
+        Returns the files that best match a query.
+
+        Args:
+            query (str): Question or keywords; tokenised like the files.
+            k (int): Maximum number of results.
+
+        Returns:
+            list of tuple: (relative path, score), best first; only files matching at least one term.
+        """
+        with self._lock:
+            if not self.doc_of:
+                return []
+            alive, norm, live = self._query_arrays()
+            scores = np.zeros(len(self.paths), np.float32)
+            for term in set(tokenize(query)):
+                term_id = self.vocab.get(term)
+                if term_id is None:
+                    continue
+                docs, tfs = self._postings(term_id)
+                if docs is None or not len(docs):
+                    continue
+                df = int(np.count_nonzero(alive[docs]))
+                if df == 0:
+                    continue
+                idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+                # Cada documento aparece uma única vez por termo, então a soma indexada é segura
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+            scores[~alive] = 0
+
+            hits = np.flatnonzero(scores > 0)
+            if len(hits) > k:
+                hits = hits[np.argpartition(scores[hits], -k)[-k:]]
+            hits = hits[np.argsort(-scores[hits], kind="stable")]
+            return [(self.paths[doc], float(scores[doc])) for doc in hits]
+
+    def _arrays_file(self, cache_file):
+        return os.path.splitext(cache_file)[0] + ".npz"
+
+    def save(self, cache_file=None):
+        """
+        Writes the index to disk, compacted.
+
+        Args:
+            cache_file (str or None): JSON file. If None, uses the cache_file given at construction.
+        """
+        cache_file = cache_file or self.cache_file
+        if cache_file is None:
+            raise ValueError("No cache file given")
+
+        with self._lock:
+            self.compact()
+            os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+            arrays_file = self._arrays_file(cache_file)
+            # np.savez acrescenta ".npz" a nomes sem essa extensão
+            tmp_arrays = arrays_file[:-len(".npz")] + ".tmp.npz"
+            np.savez(tmp_arrays, offsets=self._offsets, docs=self._docs, tfs=self._tfs)
+            data = {
+                "version": INDEX_VERSION,
+                "root": self.root,
+                "postings": len(self._docs),
+                "vocab": sorted(self.vocab, key=self.vocab.get),
+                "paths": self.paths,
+                "metas": self.metas,
+                "lengths": self.lengths,
+                "skipped": self.skipped,
+            }
+            tmp_file = cache_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_arrays, arrays_file)
+            os.replace(tmp_file, cache_file)
+            self.dirty = False
+
+    def save_if_dirty(self):
+        """
+        Calls save() if the index changed since it was loaded or saved and a cache file is set.
+        """
+        if self.dirty and self.cache_file is not None:
+            self.save()
+
+    def load(self, cache_file=None):
+        """
+        Loads an index written by save() for the same root.
+
+        Args:
+            cache_file (str or None): JSON file. If None, uses the cache_file given at construction.
+
+        Returns:
+            bool: True if the index was loaded, False otherwise.
+        """
+        cache_file = cache_file or self.cache_file
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            arrays = np.load(self._arrays_file(cache_file))
+            offsets, docs, tfs = arrays["offsets"], arrays["docs"], arrays["tfs"]
+        except (OSError, ValueError, KeyError):
+            return False
+        if (data.get("version") != INDEX_VERSION or data.get("root") != self.root
+                or data.get("postings") != len(docs) or len(offsets) != len(data["vocab"]) + 1):
+            return False
+
+        with self._lock:
+            self._clear()
+            self.vocab = {term: i for i, term in enumerate(data["vocab"])}
+            self.paths = data["paths"]
+            self.metas = [tuple(meta) for meta in data["metas"]]
+            self.lengths = data["lengths"]
+            self.doc_of = {path: doc for doc, path in enumerate(self.paths)}
+            self.skipped = {path: tuple(value) for path, value in data["skipped"].items()}
+            self._offsets, self._docs, self._tfs = offsets, docs, tfs
+        return True
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_bm25_index(project_dir):
+    """
+    Returns the shared BM25Index of a project, persisted in the user cache directory.
+
+    Args:
+        project_dir (str): Root directory of the project.
+
+    Returns:
+        BM25Index: The index, loaded from disk if it was saved before (call update() before searching).
+    """
+    root = os.path.abspath(project_dir)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            name = hashlib.sha1(root.encode("utf-8", errors="surrogatepass")).hexdigest()[:16] + ".json"
+            index = BM25Index(root, cache_file=os.path.join(cache_dir("bm25"), name))
+            _indexes[root] = index
+        return index
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    index = BM25Index(sys.argv[1] if len(sys.argv) > 1 else "../../")
+    t0 = time.perf_counter()
+    print(index.update(), f"{time.perf_counter() - t0:.2f} s")
+    query = " ".join(sys.argv[2:]) or "directory structure cache"
+    t0 = time.perf_counter()
+    for path, score in index.search(query):
+        print(f"{score:7.3f}  {path}")
+    print(f"query: {(time.perf_counter() - t0) * 1000:.2f} ms")
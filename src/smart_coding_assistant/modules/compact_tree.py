@@ -0,0 +1,228 @@
+#!/usr/bin/python3
+
+import os
+import sys
+from array import array
+
+from smart_coding_assistant.modules.files import iter_entries
+
+KIND_FILE = 0
+KIND_DIR = 1
+KIND_LINK = 2
+
+_KIND_CODES = {"file": KIND_FILE, "dir": KIND_DIR, "link": KIND_LINK}
+_KIND_NAMES = {code: name for name, code in _KIND_CODES.items()}
+
+
+class CompactTree:
+    """
+    Array-backed directory tree.
+
+    Each entry is a row in parallel arrays (parent index, name index, kind, size, mtime),
+    and names are stored once in an interned table, so a large tree costs a few tens of
+    bytes per entry instead of a dictionary per directory. Index 0 is the root.
+
+    After freeze() the name table is packed into a single string plus an offset array,
+    dropping the per-name string objects; appending again unpacks it.
+
+    Args:
+        root_name (str): Name of the root directory.
+    """
+    def __init__(self, root_name):
+        self.root_name = root_name
+        self._names = []
+        self._name_index = {}
+        self._blob = None
+        self._offsets = None
+        self.parent = array("i", [-1])
+        self.name = array("i", [self._intern(root_name)])
+        self.kind = bytearray([KIND_DIR])
+        self.size = array("q", [0])
+        self.mtime = array("d", [0.0])
+
+    def _intern(self, name):
+        if self._blob is not None:
+            self._thaw()
+        index = self._name_index.get(name)
+        if index is None:
+            index = len(self._names)
+            self._names.append(name)
+            self._name_index[name] = index
+        return index
+
+    def freeze(self):
+        """
+        Packs the name table into one string and drops the interning dictionary.
+        """
+        if self._blob is not None:
+            return
+        offsets = array("I", [0])
+        total = 0
+        for name in self._names:
+            total += len(name)
+            offsets.append(total)
+        self._blob = "".join(self._names)
+        self._offsets = offsets
+        self._names = []
+        self._name_index = {}
+
+    def _thaw(self):
+        self._names = [self.name_at(i) for i in range(len(self._offsets) - 1)]
+        self._name_index = {name: i for i, name in enumerate(self._names)}
+        self._blob = None
+        self._offsets = None
+
+    def name_at(self, index):
+        """
+        Returns the string of an interned name.
+
+        Args:
+            index (int): Index in the name table (the value stored in the name array).
+        """
+        if self._blob is not None:
+            return self._blob[self._offsets[index]:self._offsets[index + 1]]
+        return self._names[index]
+
+    def name_count(self):
+        """
+        Returns the number of distinct names.
+        """
+        if self._blob is not None:
+            return len(self._offsets) - 1
+        return len(self._names)
+
+    def append(self, parent, name, kind, size=0, mtime=0.0):
+        """
+        Adds an entry below an existing directory.
+
+        Args:
+            parent (int): Index of the parent directory.
+            name (str): Name of the entry.
+            kind (str): "dir", "file" or "link".
+            size (int): Size in bytes.
+            mtime (float): Modification time as a POSIX timestamp.
+
+        Returns:
+            int: Index of the new entry.
+        """
+        self.parent.append(parent)
+        self.name.append(self._intern(name))
+        self.kind.append(_KIND_CODES[kind])
+        self.size.append(size)
+        self.mtime.append(mtime)
+        return len(self.parent) - 1
+
+    @classmethod
+    def from_entries(cls, root_name, entries):
+        """
+        Builds a tree from a stream of entries, such as files.iter_entries().
+
+        Args:
+            root_name (str): Name of the root directory.
+            entries (iterable): Tuples (rel_path, kind, size, mtime) with parents before children.
+
+        Returns:
+            CompactTree: The tree.
+        """
+        tree = cls(root_name)
+        # Só os diretórios precisam ser localizados pelo caminho
+        dir_index = {"": 0}
+        for rel_path, kind, size, mtime in entries:
+            parent_path, _, name = rel_path.rpartition("/")
+            parent = dir_index.get(parent_path)
+            if parent is None:
+                raise ValueError(f"Entry {rel_path!r} comes before its parent directory")
+            index = tree.append(parent, name, kind, size, mtime)
+            if kind == "dir":
+                dir_index[rel_path] = index
+        tree.freeze()
+        return tree
+
+    @classmethod
+    def from_path(cls, path, gitignore=False, exclude=None, max_depth=None):
+        """
+        Scans a directory with files.iter_entries() and builds its tree.
+
+        Args:
+            path (str): Path to the root directory.
+            gitignore (bool): If True, honours .gitignore files and .git/info/exclude.
+            exclude (iterable of str or None): Extra gitignore-style patterns to prune.
+            max_depth (int or None): Number of directory levels to list.
+
+        Returns:
+            CompactTree: The tree.
+        """
+        root_name = os.path.basename(os.path.abspath(path))
+        entries = iter_entries(path, gitignore=gitignore, exclude=exclude, max_depth=max_depth)
+        return cls.from_entries(root_name, entries)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def path(self, index):
+        """
+        Returns the path of an entry relative to the root, using '/' as separator.
+        """
+        parts = []
+        while index > 0:
+            parts.append(self.name_at(self.name[index]))
+            index = self.parent[index]
+        return "/".join(reversed(parts))
+
+    def iter_entries(self):
+        """
+        Yields the entries in the same format as files.iter_entries().
+        """
+        paths = {0: ""}
+        for index in range(1, len(self.parent)):
+            parent_path = paths[self.parent[index]]
+            name = self.name_at(self.name[index])
+            rel_path = parent_path + "/" + name if parent_path else name
+            kind = self.kind[index]
+            if kind == KIND_DIR:
+                paths[index] = rel_path
+            yield rel_path, _KIND_NAMES[kind], self.size[index], self.mtime[index]
+
+    def to_dict(self):
+        """
+        Converts the tree to the nested dictionary format of files.directory_structure.
+
+        Returns:
+            dict: Nested dictionary representing the file/folder structure.
+        """
+        dicts = [None] * len(self.parent)
+        dicts[0] = {}
+        name_at = self.name_at
+        for index in range(1, len(self.parent)):
+            if self.kind[index] == KIND_DIR:
+                node = dicts[index] = {}
+            else:
+                node = None
+            dicts[self.parent[index]][name_at(self.name[index])] = node
+        return {self.root_name: dicts[0]}
+
+    def nbytes(self):
+        """
+        Approximates the memory used by the tree, including the interned names.
+
+        Returns:
+            int: Size in bytes.
+        """
+        total = sum(sys.getsizeof(a) for a in (self.parent, self.name, self.kind, self.size, self.mtime))
+        if self._blob is not None:
+            return total + sys.getsizeof(self._blob) + sys.getsizeof(self._offsets)
+        total += sys.getsizeof(self._names) + sys.getsizeof(self._name_index)
+        total += sum(sys.getsizeof(name) for name in self._names)
+        return total
+
+
+if __name__ == "__main__":
+    import time
+
+    PATH = sys.argv[1] if len(sys.argv) > 1 else "../../"
+
+    t0 = time.perf_counter()
+    tree = CompactTree.from_path(PATH)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(tree)} entries in {elapsed * 1000:.1f} ms, "
+          f"{tree.nbytes() / len(tree):.1f} bytes/entry, {tree.name_count()} distinct names")
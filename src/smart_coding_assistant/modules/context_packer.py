@@ -0,0 +1,288 @@
+#!/usr/bin/python3
+
+import os
+import json
+import fnmatch
+
+from smart_coding_assistant.modules.file_loader import get_file_loader
+from smart_coding_assistant.modules.files import directory_structure
+from smart_coding_assistant.modules.files import iter_tree_files
+from smart_coding_assistant.modules.ignore import DEFAULT_EXCLUDES
+from smart_coding_assistant.modules.models import DEFAULT_MODEL
+from smart_coding_assistant.modules.models import context_size
+from smart_coding_assistant.modules.tree_render import render_tree
+from smart_coding_assistant.modules.tokens import get_token_counter
+from smart_coding_assistant.modules.tracing import traced
+
+# Arquivo de configuração do projeto, na raiz do projeto (ver IDEAS.md)
+PROJECT_CONFIG_NAME = ".smart_coding_assistant.json"
+
+DEFAULT_PROJECT_CONFIG = {
+    "learn": [".py", ".ui", ".json"],
+    "priority": [],
+    "exclude": [],
+}
+
+# Tokens reservados para a pergunta e a resposta do modelo
+DEFAULT_RESERVE_TOKENS = 4096
+
+# Fração do orçamento que a árvore do projeto pode ocupar
+TREE_BUDGET_SHARE = 0.1
+
+# Fração do orçamento que o mapa de símbolos pode ocupar
+REPO_MAP_BUDGET_SHARE = 0.15
+
+
+def load_project_config(project_dir):
+    """
+    Reads the project configuration file, filling missing keys with the defaults.
+
+    The "learn" key lists the extensions whose files are sent in full to the LLM,
+    "priority" lists glob patterns of files that are packed first and "exclude"
+    lists extra gitignore-style patterns that are never sent. Each value is a list of
+    strings; a single string counts as a list of one, and any other value (or a
+    non-string item) is ignored.
+
+    Args:
+        project_dir (str): Root directory of the project.
+
+    Returns:
+        dict: The configuration.
+    """
+    config = {key: list(value) for key, value in DEFAULT_PROJECT_CONFIG.items()}
+    config_path = os.path.join(project_dir, PROJECT_CONFIG_NAME)
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return config
+    if not isinstance(data, dict):
+        return config
+
+    for key in config:
+        value = data.get(key)
+        # {"learn": ".py"} viraria ['.', 'p', 'y'] com list()
+        if isinstance(value, str):
+            config[key] = [value]
+        elif isinstance(value, list):
+            config[key] = [item for item in value if isinstance(item, str)]
+    return config
+
+
+def read_files(paths, workers=8):
+    """
+    Reads many files through the shared file loader (see file_loader.FileLoader), which
+    reuses the decoded text of files whose inode, size and mtime did not change and
+    reduces very large files to a head and a tail excerpt.
+
+    Args:
+        paths (list of str): Absolute paths.
+        workers (int): Threads used for reading.
+
+    Returns:
+        dict: path -> (digest, text) for every readable text file.
+    """
+    loaded = get_file_loader().load_many(paths, workers=workers)
+    return {path: (item.digest, item.text) for path, item in loaded.items() if not item.binary}
+
+
+def select_files(project_dir, config):
+    """
+    Lists the project files whose extension is in the "learn" configuration.
+
+    Args:
+        project_dir (str): Root directory of the project.
+        config (dict): Project configuration from load_project_config().
+
+    Returns:
+        tuple: (structure, paths) with the directory structure and the selected relative paths.
+    """
+    exclude = list(DEFAULT_EXCLUDES) + list(config["exclude"])
+    structure = directory_structure(project_dir, cache=True, gitignore=True, exclude=exclude)
+    learn = {ext.lower() for ext in config["learn"]}
+    paths = [
+        rel_path for rel_path in iter_tree_files(structure)
+        if os.path.splitext(rel_path)[1].lower() in learn
+    ]
+    return structure, paths
+
+
+def _priority_key(rel_path, size, priority):
+    # Arquivos prioritários, depois os mais rasos, depois os menores
+    rank = len(priority)
+    for i, pattern in enumerate(priority):
+        if fnmatch.fnmatch(rel_path, pattern):
+            rank = i
+            break
+    return (rank, rel_path.count("/"), size, rel_path)
+
+
+def _file_section(rel_path, text):
+    return f"### {rel_path}\n```\n{text}\n```\n"
+
+
+def _truncate(rel_path, text, budget, count_tokens):
+    """
+    Returns the largest section with a head of the file that fits in budget, or None.
+    """
+    lines = text.splitlines()
+    marker = "[... truncated ...]"
+    low, high = 0, len(lines)
+    while low < high:
+        middle = (low + high + 1) // 2
+        section = _file_section(rel_path, "\n".join(lines[:middle] + [marker]))
+        if count_tokens(section) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    if low == 0:
+        return None
+    return _file_section(rel_path, "\n".join(lines[:low] + [marker]))
+
+
+@traced("context_packer.pack_context")
+def pack_context(project_dir, model=DEFAULT_MODEL, max_tokens=None, reserve_tokens=DEFAULT_RESERVE_TOKENS,
+                 config=None, include_tree=True, count_tokens=None, question=None,
+                 include_repo_map=False):
+    """
+    Packs the project files selected by the "learn" configuration into a prompt that fits the model.
+
+    Files are read in bulk, identical contents are sent only once, and files are packed
+    in a deterministic priority order (configured patterns, then shallower paths, then
+    smaller files). With a question, the files found by the project BM25 index come
+    first, most relevant first. The first file that does not fit is cut to the remaining
+    budget and every following file is omitted.
+
+    Args:
+        project_dir (str): Root directory of the project.
+        model (str): Model name from models.MODELS, used to get the context size.
+        max_tokens (int or None): Explicit budget. If None, uses the model context minus reserve_tokens.
+        reserve_tokens (int): Tokens kept free for the question and the answer.
+        config (dict or None): Project configuration. If None, reads it from the project.
+        include_tree (bool): If True, prefixes the prompt with the rendered project tree.
+        count_tokens (callable or None): Function str -> int. If None, uses the shared
+                                         tokens.TokenCounter, whose cache is saved afterwards.
+        question (str or None): Question used to rank the files (see bm25_index.BM25Index).
+        include_repo_map (bool): If True, adds the map of the Python modules, classes and
+                                 functions (see symbol_index.render_repo_map) after the tree,
+                                 so the structure of files that do not fit is still visible.
+
+    Returns:
+        dict: Keys "text" (the packed prompt), "tokens", "budget", "files" (packed paths),
+              "truncated" (paths cut to fit), "omitted" (paths left out) and
+              "duplicates" (path -> path of the identical file that was packed).
+    """
+    counter = None
+    if count_tokens is None:
+        counter = get_token_counter()
+        count_tokens = counter.count
+    if config is None:
+        config = load_project_config(project_dir)
+    if max_tokens is None:
+        max_tokens = context_size(model) - reserve_tokens
+
+    root = os.path.abspath(project_dir)
+    structure, rel_paths = select_files(root, config)
+    abs_paths = [os.path.join(root, rel_path) for rel_path in rel_paths]
+    contents = read_files(abs_paths)
+
+    ranks = {}
+    if question:
+        from smart_coding_assistant.modules.bm25_index import get_bm25_index
+
+        index = get_bm25_index(root)
+        index.update(rel_paths)
+        index.save_if_dirty()
+        ranks = {rel_path: rank for rank, (rel_path, _) in enumerate(index.search(question, k=len(rel_paths)))}
+
+    candidates = []
+    for rel_path, abs_path in zip(rel_paths, abs_paths):
+        if abs_path in contents:
+            digest, text = contents[abs_path]
+            key = (ranks.get(rel_path, len(ranks)),) + _priority_key(rel_path, len(text), config["priority"])
+            candidates.append((key, rel_path, digest, text))
+    candidates.sort()
+
+    result = {
+        "text": "",
+        "tokens": 0,
+        "budget": max_tokens,
+        "files": [],
+        "truncated": [],
+        "omitted": [],
+        "duplicates": {},
+    }
+
+    sections = []
+    used = 0
+    if include_tree:
+        tree_budget = int(max_tokens * TREE_BUDGET_SHARE)
+        tree_text = render_tree(structure, max_tokens=tree_budget, count_tokens=count_tokens)
+        if tree_text:
+            section = f"### Project tree\n```\n{tree_text}\n```\n"
+            cost = count_tokens(section)
+            if cost <= max_tokens:
+                sections.append(section)
+                used += cost
+    if include_repo_map:
+        from smart_coding_assistant.modules.symbol_index import get_symbol_index
+        from smart_coding_assistant.modules.symbol_index import render_repo_map
+
+        symbols = get_symbol_index(root)
+        symbols.update([rel_path for rel_path in rel_paths if rel_path.endswith(".py")])
+        symbols.save_if_dirty()
+        focus = sorted(ranks, key=ranks.get)
+        map_text = render_repo_map(symbols, max_tokens=int(max_tokens * REPO_MAP_BUDGET_SHARE),
+                                   count_tokens=count_tokens, focus=focus)
+        if map_text:
+            section = f"### Repository map\n```\n{map_text}```\n"
+            cost = count_tokens(section)
+            if used + cost <= max_tokens:
+                sections.append(section)
+                used += cost
+
+    packed_digests = {}
+    full = False
+    for _, rel_path, digest, text in candidates:
+        if digest in packed_digests:
+            result["duplicates"][rel_path] = packed_digests[digest]
+            continue
+        if full:
+            result["omitted"].append(rel_path)
+            continue
+
+        section = _file_section(rel_path, text)
+        cost = count_tokens(section)
+        if used + cost > max_tokens:
+            section = _truncate(rel_path, text, max_tokens - used, count_tokens)
+            full = True
+            if section is None:
+                result["omitted"].append(rel_path)
+                continue
+            cost = count_tokens(section)
+            result["truncated"].append(rel_path)
+
+        sections.append(section)
+        used += cost
+        packed_digests[digest] = rel_path
+        result["files"].append(rel_path)
+
+    result["text"] = "".join(sections)
+    result["tokens"] = used
+    if counter is not None:
+        counter.save_if_dirty()
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    PATH = sys.argv[1] if len(sys.argv) > 1 else "../../"
+    for _ in range(2):
+        t0 = time.perf_counter()
+        packed = pack_context(PATH, model="phi-4")
+        elapsed = time.perf_counter() - t0
+        print(f"{len(packed['files'])} files, {packed['tokens']}/{packed['budget']} tokens, "
+              f"{len(packed['truncated'])} truncated, {len(packed['omitted'])} omitted, "
+              f"{len(packed['duplicates'])} duplicates in {elapsed * 1000:.1f} ms")
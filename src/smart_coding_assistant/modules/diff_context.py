@@ -0,0 +1,458 @@
+#!/usr/bin/python3
+
+import os
+import re
+import codecs
+import subprocess
+from collections import namedtuple
+
+from smart_coding_assistant.modules.file_loader import get_file_loader
+from smart_coding_assistant.modules.git_meld import get_git_base_dir
+from smart_coding_assistant.modules.git_meld import get_head_commit
+from smart_coding_assistant.modules.git_meld import run_git
+from smart_coding_assistant.modules.models import DEFAULT_MODEL
+from smart_coding_assistant.modules.models import context_size
+from smart_coding_assistant.modules.context_packer import DEFAULT_RESERVE_TOKENS
+from smart_coding_assistant.modules.tokens import get_token_counter
+from smart_coding_assistant.modules.tracing import traced
+
+# Linhas de contexto em volta de cada mudança, como 'git diff -U3'
+DEFAULT_CONTEXT_LINES = 3
+
+# Similaridade mínima (%) para um par removido/adicionado virar renomeação
+DEFAULT_RENAME_THRESHOLD = 50
+
+# Linhas que abrem um escopo: Python, JavaScript/TypeScript, Go, Rust, Java/C#/C++
+HEADER_RE = re.compile(
+    r"^\s*(?:(?:export\s+|default\s+|pub(?:\(\w+\))?\s+|public\s+|private\s+|protected\s+|"
+    r"internal\s+|static\s+|abstract\s+|final\s+|async\s+|unsafe\s+|virtual\s+|override\s+)*"
+    r"(?:def|class|function|func|fn|impl|trait|struct|enum|interface|namespace|module)\b)"
+)
+
+# Cabeçalho de cada trecho: @@ -início,linhas +início,linhas @@ função
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+
+# Árvore vazia, usada como base em repositórios sem commits
+_EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+Hunk = namedtuple("Hunk", ["old_start", "old_count", "new_start", "new_count", "function", "lines"])
+
+# status: "M" (modificado), "A" (novo), "D" (removido) ou "R" (renomeado)
+FileDiff = namedtuple("FileDiff", ["path", "old_path", "status", "similarity", "binary", "hunks"])
+
+
+def _unquote(path):
+    """
+    Decodes a path that git quoted because of special characters ("a\\tb" -> a<TAB>b).
+    """
+    if len(path) >= 2 and path[0] == path[-1] == '"':
+        raw = codecs.escape_decode(path[1:-1].encode("utf-8", errors="surrogateescape"))[0]
+        return os.fsdecode(raw)
+    return path
+
+
+def _strip_prefix(path, prefix):
+    path = _unquote(path)
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+
+def _git_header_paths(rest):
+    """
+    Splits the two names of a 'diff --git' line.
+
+    Names with spaces are not quoted, so the line alone is ambiguous; but git only
+    leaves out the ---/+++ lines (binary and mode-only changes) when both names are
+    the same, and then the line is "a/<path> b/<path>".
+
+    Returns:
+        tuple or None: (old name, new name) with their prefixes, or None if unknown.
+    """
+    match = re.match(r'^("(?:[^"\\]|\\.)*"|\S+) ("(?:[^"\\]|\\.)*"|\S+)$', rest)
+    if match:
+        return match.group(1), match.group(2)
+    half = len(rest) // 2
+    if len(rest) % 2 == 1 and rest[half] == " " and rest[2:half] == rest[half + 3:]:
+        return rest[:half], rest[half + 1:]
+    return None
+
+
+def parse_unified_diff(text):
+    """
+    Parses the output of 'git diff' (with the default a/ and b/ prefixes).
+
+    Args:
+        text (str): Output of git diff.
+
+    Returns:
+        list of FileDiff: One entry per file, in the order of the output.
+    """
+    diffs = []
+    current = None
+    hunk = None
+
+    def finish():
+        if current is not None:
+            diffs.append(FileDiff(**current))
+
+    for line in text.split("\n"):
+        if line.startswith("diff --git "):
+            finish()
+            hunk = None
+            current = {"path": None, "old_path": None, "status": "M", "similarity": None,
+                       "binary": False, "hunks": []}
+            # Caminhos provisórios; "---"/"+++" ou "rename from/to" são mais confiáveis
+            names = _git_header_paths(line[len("diff --git "):])
+            if names is not None:
+                current["old_path"] = _strip_prefix(names[0], "a/")
+                current["path"] = _strip_prefix(names[1], "b/")
+            continue
+        if current is None:
+            continue
+        if hunk is not None:
+            if line[:1] in (" ", "+", "-", "\\"):
+                hunk.lines.append(line)
+                continue
+            hunk = None
+        if line.startswith("@@ "):
+            match = _HUNK_RE.match(line)
+            if match:
+                old_start, old_count, new_start, new_count, function = match.groups()
+                hunk = Hunk(int(old_start), 1 if old_count is None else int(old_count),
+                            int(new_start), 1 if new_count is None else int(new_count), function, [])
+                current["hunks"].append(hunk)
+        elif line.startswith("new file mode"):
+            current["status"] = "A"
+        elif line.startswith("deleted file mode"):
+            current["status"] = "D"
+        elif line.startswith("old mode") or line.startswith("new mode"):
+            pass
+        elif line.startswith("similarity index "):
+            current["similarity"] = int(line[len("similarity index "):].rstrip("%"))
+        elif line.startswith("rename from "):
+            current["status"] = "R"
+            current["old_path"] = _unquote(line[len("rename from "):])
+        elif line.startswith("rename to "):
+            current["path"] = _unquote(line[len("rename to "):])
+        elif line.startswith("--- "):
+            # git termina com TAB os nomes que têm espaços
+            if line != "--- /dev/null":
+                current["old_path"] = _strip_prefix(line[4:].rstrip("\t"), "a/")
+        elif line.startswith("+++ "):
+            if line != "+++ /dev/null":
+                current["path"] = _strip_prefix(line[4:].rstrip("\t"), "b/")
+        elif line.startswith("Binary files "):
+            current["binary"] = True
+            match = re.match(r"^Binary files (.+) and (.+) differ$", line)
+            if match and current["path"] is None:
+                if match.group(1) != "/dev/null":
+                    current["old_path"] = _strip_prefix(match.group(1), "a/")
+                if match.group(2) != "/dev/null":
+                    current["path"] = _strip_prefix(match.group(2), "b/")
+    finish()
+
+    for i, diff in enumerate(diffs):
+        if diff.status == "D":
+            diffs[i] = diff._replace(path=diff.old_path)
+        elif diff.status in ("A", "M"):
+            diffs[i] = diff._replace(old_path=diff.path if diff.status != "A" else None)
+    # Sem nenhum nome confiável a entrada não pode ser lida nem citada
+    return [diff for diff in diffs if diff.path is not None]
+
+
+def git_diff(project_dir, context_lines=DEFAULT_CONTEXT_LINES, rename_threshold=DEFAULT_RENAME_THRESHOLD,
+             paths=None, staged=False):
+    """
+    Returns the changes of the working tree (or of the index) against HEAD, like 'git diff HEAD -M'.
+
+    Args:
+        project_dir (str): Directory inside the repository.
+        context_lines (int): Unchanged lines shown around each change.
+        rename_threshold (int): Minimum similarity (%) to report a removed and an added file as a rename.
+        paths (list of str or None): Restrict to these paths, relative to the repository root.
+        staged (bool): If True, compares the index with HEAD ('git diff --cached').
+
+    Returns:
+        list of FileDiff: Changed files, in git order.
+
+    Raises:
+        ValueError: If project_dir is not inside a repository.
+        subprocess.CalledProcessError: If git fails.
+    """
+    root = get_git_base_dir(project_dir)
+    if root is None:
+        raise ValueError(f"Not a git repository: {project_dir}")
+    try:
+        base = get_head_commit(root)
+    except subprocess.CalledProcessError:
+        base = _EMPTY_TREE
+
+    command = ["-c", "core.quotePath=false", "diff", "--no-color", "--no-ext-diff", "--no-textconv",
+               f"-U{context_lines}", f"-M{rename_threshold}%"]
+    if staged:
+        command.append("--cached")
+    command += [base, "--"] + list(paths or ())
+    resultado = run_git(root, command)
+    return parse_unified_diff(resultado.stdout.decode("utf-8", errors="replace"))
+
+
+def untracked_diffs(project_dir):
+    """
+    Returns the untracked files that are not ignored as added files, each with a single hunk.
+
+    Args:
+        project_dir (str): Directory inside the repository.
+
+    Returns:
+        list of FileDiff: New files (binary files have no hunks).
+    """
+    root = get_git_base_dir(project_dir)
+    resultado = run_git(root, ["ls-files", "--others", "--exclude-standard", "-z"])
+    diffs = []
+    for name in resultado.stdout.split(b"\0"):
+        if not name:
+            continue
+        rel_path = os.fsdecode(name)
+        loaded = get_file_loader().load(os.path.join(root, rel_path))
+        if loaded is None:
+            continue
+        if loaded.binary:
+            diffs.append(FileDiff(rel_path, None, "A", None, True, []))
+            continue
+        lines = ["+" + line for line in loaded.text.splitlines()]
+        hunks = [Hunk(0, 0, 1, len(lines), "", lines)] if lines else []
+        diffs.append(FileDiff(rel_path, None, "A", None, False, hunks))
+    return diffs
+
+
+def _indent(line):
+    return len(line.expandtabs(8)) - len(line.expandtabs(8).lstrip())
+
+
+def enclosing_headers(lines, line_index):
+    """
+    Finds the lines that open the scopes (functions, classes...) around a line, by indentation.
+
+    Args:
+        lines (list of str): Lines of the file.
+        line_index (int): 0-based index of the line.
+
+    Returns:
+        list of tuple: (0-based index, stripped line), outermost first.
+    """
+    current = None
+    for i in range(min(line_index, len(lines) - 1), -1, -1):
+        if lines[i].strip():
+            current = _indent(lines[i])
+            break
+    if current is None:
+        return []
+
+    headers = []
+    for i in range(min(line_index, len(lines)) - 1, -1, -1):
+        line = lines[i]
+        if not line.strip():
+            continue
+        indent = _indent(line)
+        if indent < current and HEADER_RE.match(line):
+            headers.append((i, line.strip()))
+            current = indent
+            if indent == 0:
+                break
+    headers.reverse()
+    return headers
+
+
+def _hunk_headers(hunk, new_lines):
+    """
+    Returns the scope headers of a hunk that are above its first shown line.
+    """
+    # Primeira linha alterada, em coordenadas do arquivo novo
+    position = hunk.new_start
+    for line in hunk.lines:
+        if line[:1] != " ":
+            break
+        position += 1
+    index = max(0, position - 1 if hunk.new_count else position)
+    return [text for i, text in enclosing_headers(new_lines, index) if i < hunk.new_start - 1]
+
+
+def diff_stats(diff):
+    """
+    Returns (added lines, removed lines) of a FileDiff.
+    """
+    added = removed = 0
+    for hunk in diff.hunks:
+        for line in hunk.lines:
+            if line.startswith("+"):
+                added += 1
+            elif line.startswith("-"):
+                removed += 1
+    return added, removed
+
+
+def _file_title(diff):
+    added, removed = diff_stats(diff)
+    notes = {"A": "new file", "D": "deleted"}.get(diff.status)
+    if diff.status == "R":
+        notes = f"renamed from {diff.old_path}, {diff.similarity}% similar"
+    if diff.binary:
+        notes = (notes + ", " if notes else "") + "binary"
+    title = f"### {diff.path} (+{added} -{removed}"
+    return title + (f", {notes})" if notes else ")") + "\n"
+
+
+def _hunk_text(hunk, headers):
+    # Sem a busca de cabeçalhos, fica o contexto de função que o próprio git achou
+    trailer = hunk.function if headers is None else " › ".join(headers)
+    text = f"@@ -{hunk.old_start},{hunk.old_count} +{hunk.new_start},{hunk.new_count} @@"
+    if trailer:
+        text += " " + trailer
+    return text + "\n" + "".join(line + "\n" for line in hunk.lines)
+
+
+def _read_lines(path):
+    # Num trecho de arquivo grande os números de linha não batem com os do diff
+    loaded = get_file_loader().load(path)
+    if loaded is None or loaded.binary or loaded.truncated:
+        return []
+    return loaded.text.splitlines()
+
+
+@traced("diff_context.pack_diff_context")
+def pack_diff_context(project_dir, model=DEFAULT_MODEL, max_tokens=None, max_bytes=None,
+                      reserve_tokens=DEFAULT_RESERVE_TOKENS, context_lines=DEFAULT_CONTEXT_LINES,
+                      rename_threshold=DEFAULT_RENAME_THRESHOLD, headers=True, untracked=False,
+                      staged=False, count_tokens=None):
+    """
+    Packs the changes of the project against HEAD as unified-diff hunks instead of whole files.
+
+    Each hunk is prefixed with the headers of the functions and classes that enclose it
+    (found in the working tree file by indentation), renames are detected by similarity,
+    and the hunks are packed in git order until the token or byte budget runs out. The
+    first file that does not fit is cut at a hunk boundary and every following file is
+    only counted in the last line.
+
+    Args:
+        project_dir (str): Directory inside the repository.
+        model (str): Model name from models.MODELS, used to get the context size.
+        max_tokens (int or None): Explicit budget. If None, uses the model context minus reserve_tokens.
+        max_bytes (int or None): Optional limit on the UTF-8 size of the text.
+        reserve_tokens (int): Tokens kept free for the question and the answer.
+        context_lines (int): Unchanged lines shown around each change.
+        rename_threshold (int): Minimum similarity (%) for rename detection.
+        headers (bool): If True, adds the enclosing function/class headers to each hunk.
+        untracked (bool): If True, also sends untracked files that are not ignored, as new files.
+        staged (bool): If True, sends only the staged changes.
+        count_tokens (callable or None): Function str -> int. If None, uses the shared
+                                         tokens.TokenCounter, whose cache is saved afterwards.
+
+    Returns:
+        dict: Keys "text", "tokens", "bytes", "budget", "files" (packed paths), "truncated"
+              (paths cut to fit), "omitted" (paths left out) and "stats" (path -> (added, removed)).
+
+    Raises:
+        ValueError: If project_dir is not inside a repository.
+        subprocess.CalledProcessError: If git fails.
+    """
+    counter = None
+    if count_tokens is None:
+        counter = get_token_counter()
+        count_tokens = counter.count
+    if max_tokens is None:
+        max_tokens = context_size(model) - reserve_tokens
+    if max_bytes is None:
+        max_bytes = float("inf")
+
+    root = get_git_base_dir(project_dir)
+    if root is None:
+        raise ValueError(f"Not a git repository: {project_dir}")
+    diffs = git_diff(root, context_lines, rename_threshold, staged=staged)
+    if untracked and not staged:
+        diffs += untracked_diffs(root)
+
+    result = {
+        "text": "",
+        "tokens": 0,
+        "bytes": 0,
+        "budget": max_tokens,
+        "files": [],
+        "truncated": [],
+        "omitted": [],
+        "stats": {diff.path: diff_stats(diff) for diff in diffs},
+    }
+
+    sections = []
+    # Espaço para a linha final com os arquivos omitidos
+    used = count_tokens(f"[... {len(diffs)} more changed files]\n")
+    size = 0
+    full = False
+    for diff in diffs:
+        if full:
+            result["omitted"].append(diff.path)
+            continue
+
+        new_lines = _read_lines(os.path.join(root, diff.path)) if headers and diff.status != "D" else []
+        parts = [_file_title(diff)]
+        parts += [_hunk_text(hunk, _hunk_headers(hunk, new_lines) if new_lines else None) for hunk in diff.hunks]
+        if diff.hunks:
+            parts[1] = "```diff\n" + parts[1]
+            parts[-1] += "```\n"
+
+        costs = [count_tokens(part) for part in parts]
+        sizes = [len(part.encode("utf-8", errors="replace")) for part in parts]
+        if used + sum(costs) <= max_tokens and size + sum(sizes) <= max_bytes:
+            sections.extend(parts)
+            used += sum(costs)
+            size += sum(sizes)
+            result["files"].append(diff.path)
+            continue
+
+        # Não cabe inteiro: entram os primeiros trechos que couberem
+        full = True
+        closing = "```\n"
+        kept = 0
+        cost = costs[0] + count_tokens(closing)
+        nbytes = sizes[0] + len(closing)
+        # O último trecho traz o fechamento do bloco, que é contado uma vez só (str.removesuffix é 3.9+)
+        parts = [part[:-len(closing)] if part.endswith(closing) else part for part in parts]
+        for part in parts[1:]:
+            part_cost = count_tokens(part)
+            part_size = len(part.encode("utf-8", errors="replace"))
+            if used + cost + part_cost > max_tokens or size + nbytes + part_size > max_bytes:
+                break
+            cost += part_cost
+            nbytes += part_size
+            kept += 1
+        if kept == 0:
+            result["omitted"].append(diff.path)
+            continue
+        sections.extend(parts[:kept + 1])
+        sections.append(closing)
+        used += cost
+        size += nbytes
+        result["files"].append(diff.path)
+        result["truncated"].append(diff.path)
+
+    if result["omitted"]:
+        tail = f"[... {len(result['omitted'])} more changed files]\n"
+        sections.append(tail)
+        size += len(tail)
+    result["text"] = "".join(sections)
+    result["tokens"] = count_tokens(result["text"])
+    result["bytes"] = size
+    if counter is not None:
+        counter.save_if_dirty()
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    PATH = sys.argv[1] if len(sys.argv) > 1 else "../../"
+    t0 = time.perf_counter()
+    packed = pack_diff_context(PATH, max_tokens=int(sys.argv[2]) if len(sys.argv) > 2 else 4096)
+    elapsed = time.perf_counter() - t0
+    print(packed["text"])
+    print(f"{len(packed['files'])} files, {packed['tokens']}/{packed['budget']} tokens, {packed['bytes']} bytes, "
+          f"{len(packed['truncated'])} truncated, {len(packed['omitted'])} omitted in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,388 @@
+#!/usr/bin/python3
+
+import os
+import re
+import sys
+import mmap
+import stat
+import codecs
+import hashlib
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from collections import namedtuple
+
+from smart_coding_assistant.modules.files import iter_tree_files
+from smart_coding_assistant.modules.tracing import increment
+from smart_coding_assistant.modules.tracing import traced
+
+# Bytes do começo do arquivo usados para decidir se é binário
+SNIFF_BYTES = 8192
+
+# Acima disso o arquivo é mapeado em memória em vez de lido com read()
+MMAP_MIN_BYTES = 256 * 1024
+
+# Acima disso só vão o começo e o fim do arquivo (arquivos gerados, dumps, logs)
+DEFAULT_MAX_FILE_BYTES = 2 * 1024 * 1024
+DEFAULT_HEAD_BYTES = 256 * 1024
+DEFAULT_TAIL_BYTES = 64 * 1024
+
+# Teto de memória do texto decodificado guardado no cache
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+# Custo atribuído a uma entrada sem texto (arquivo binário)
+_ENTRY_OVERHEAD = 200
+
+# Fração máxima de caracteres de controle num arquivo de texto
+MAX_CONTROL_RATIO = 0.3
+
+# BOM -> (nome da codificação, codec do corpo sem o BOM, tamanho da unidade de código)
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32", "utf-32-le", 4),
+    (codecs.BOM_UTF32_BE, "utf-32", "utf-32-be", 4),
+    (codecs.BOM_UTF8, "utf-8-sig", "utf-8", 1),
+    (codecs.BOM_UTF16_LE, "utf-16", "utf-16-le", 2),
+    (codecs.BOM_UTF16_BE, "utf-16", "utf-16-be", 2),
+)
+
+# Codificações tentadas em ordem quando não há BOM nem declaração; latin-1 nunca falha
+FALLBACK_ENCODINGS = ("utf-8", "cp1252", "latin-1")
+
+# Declaração de codificação da PEP 263 (também usada por editores em outras linguagens)
+_CODING_RE = re.compile(rb"^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)", re.MULTILINE)
+
+# Bytes que podem aparecer em texto; o que sobra depois de removê-los são caracteres de controle
+_TEXT_BYTES = bytes([7, 8, 9, 10, 11, 12, 13, 27]) + bytes(range(32, 127)) + bytes(range(128, 256))
+
+# lossy: bytes inválidos na codificação declarada foram trocados por U+FFFD (o texto não volta aos mesmos bytes)
+LoadedFile = namedtuple("LoadedFile", ["text", "digest", "size", "encoding", "binary", "truncated", "lossy"])
+
+
+def is_binary(prefix):
+    """
+    Decides from the first bytes of a file whether it is binary.
+
+    A file is binary if its prefix has a NUL byte (and no UTF-16/UTF-32 BOM) or if
+    more than MAX_CONTROL_RATIO of the prefix are control characters.
+
+    Args:
+        prefix (bytes): The first SNIFF_BYTES bytes of the file.
+
+    Returns:
+        bool: True if the file should not be decoded as text.
+    """
+    if not prefix:
+        return False
+    for bom, _, _, unit in _BOMS:
+        if unit > 1 and prefix.startswith(bom):
+            return False
+    if b"\0" in prefix:
+        return True
+    return len(prefix.translate(None, _TEXT_BYTES)) > len(prefix) * MAX_CONTROL_RATIO
+
+
+def detect_encoding(prefix):
+    """
+    Finds the encoding declared by a BOM or by a coding comment in the first two lines.
+
+    Args:
+        prefix (bytes): The first bytes of the file.
+
+    Returns:
+        tuple: (encoding, codec, bom_size, unit), where codec decodes the bytes after the BOM
+               and unit is the size of a code unit, or None if nothing is declared.
+    """
+    for bom, encoding, codec, unit in _BOMS:
+        if prefix.startswith(bom):
+            return encoding, codec, len(bom), unit
+
+    head = b"\n".join(prefix.split(b"\n", 2)[:2])
+    match = _CODING_RE.search(head)
+    if match:
+        try:
+            codec = codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            return None
+        return codec, codec, 0, 1
+    return None
+
+
+def _decode(chunks, declared):
+    """
+    Decodes the chunks with the declared encoding, or with the first fallback that decodes them all.
+
+    Args:
+        chunks (list of tuple): (data, cut_end) pairs; data ending in the middle of a
+                                character is allowed when cut_end is True.
+        declared (tuple or None): Result of detect_encoding().
+
+    Returns:
+        tuple: (encoding, list of str, True if invalid bytes were replaced).
+    """
+    if declared is not None:
+        encoding, codec, _, _ = declared
+        # Uma declaração errada não torna o arquivo binário: o que não decodifica vira U+FFFD
+        candidates = [(encoding, codec, "strict"), (encoding, codec, "replace")]
+    else:
+        candidates = [(name, name, "strict") for name in FALLBACK_ENCODINGS]
+
+    for encoding, codec, errors in candidates:
+        try:
+            texts = []
+            for data, cut_end in chunks:
+                decoder = codecs.getincrementaldecoder(codec)(errors)
+                texts.append(decoder.decode(data, final=not cut_end))
+            return encoding, texts, errors == "replace"
+        except UnicodeDecodeError:
+            continue
+    raise AssertionError("latin-1 decodes any byte sequence")
+
+
+def _tail_start(size, head_bytes, tail_bytes, declared):
+    # O trecho final começa depois do inicial, numa fronteira de caractere
+    start = max(head_bytes, size - tail_bytes)
+    if declared is not None and declared[3] > 1:
+        bom_size, unit = declared[2], declared[3]
+        start += (bom_size - start) % unit
+    return start
+
+
+def _skip_continuation(data):
+    # Pula bytes de continuação UTF-8 do começo de um trecho cortado no meio de um caractere
+    i = 0
+    while i < min(len(data), 3) and 0x80 <= data[i] < 0xC0:
+        i += 1
+    return data[i:]
+
+
+def _read_excerpt(buffer, size, head_bytes, tail_bytes, declared):
+    """
+    Builds the head/tail excerpt of a file larger than the size cap.
+
+    Returns:
+        tuple: (encoding, text, bytes read, True if invalid bytes were replaced).
+    """
+    bom_size = declared[2] if declared is not None else 0
+    head = buffer[bom_size:head_bytes]
+    tail_start = _tail_start(size, head_bytes, tail_bytes, declared)
+    tail = buffer[tail_start:]
+    if declared is None or declared[1] == "utf-8":
+        tail = _skip_continuation(tail)
+
+    encoding, (head_text, tail_text), lossy = _decode([(head, True), (tail, False)], declared)
+    # Corta nas quebras de linha para não mandar linhas pela metade
+    cut = head_text.rfind("\n")
+    if cut > 0:
+        head_text = head_text[:cut + 1]
+    cut = tail_text.find("\n")
+    if 0 <= cut < len(tail_text) - 1:
+        tail_text = tail_text[cut + 1:]
+    omitted = size - len(tail) - bom_size - len(head)
+    text = f"{head_text}[... {omitted} bytes omitted ...]\n{tail_text}"
+    return encoding, text, len(head) + len(tail), lossy
+
+
+class FileLoader:
+    """
+    Loads project files as decoded text, with an LRU cache keyed by (device, inode, size, mtime).
+
+    Files are sniffed for binary content, decoded with the encoding given by a BOM or a
+    coding comment (else UTF-8, cp1252 or latin-1, the first that decodes), and files
+    larger than max_file_bytes are reduced to a head and a tail excerpt. Large files are
+    memory-mapped, so only the pages of the sniffed prefix and of the excerpts are read.
+    A repeat load of an unchanged file costs one stat() and no read.
+
+    Args:
+        max_file_bytes (int): Files larger than this are reduced to head_bytes + tail_bytes.
+        head_bytes (int): Bytes kept from the start of a large file.
+        tail_bytes (int): Bytes kept from the end of a large file.
+        cache_bytes (int): Memory ceiling of the cached text, in bytes.
+        mmap_min_bytes (int): Files from this size on are memory-mapped.
+    """
+    def __init__(self, max_file_bytes=DEFAULT_MAX_FILE_BYTES, head_bytes=DEFAULT_HEAD_BYTES,
+                 tail_bytes=DEFAULT_TAIL_BYTES, cache_bytes=DEFAULT_CACHE_BYTES, mmap_min_bytes=MMAP_MIN_BYTES):
+        self.max_file_bytes = max_file_bytes
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.cache_bytes = cache_bytes
+        self.mmap_min_bytes = mmap_min_bytes
+        self._entries = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def _put(self, key, loaded, read):
+        cost = _ENTRY_OVERHEAD + (sys.getsizeof(loaded.text) if loaded.text is not None else 0)
+        with self._lock:
+            self.misses += 1
+            self.bytes_read += read
+            if cost > self.cache_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._cached_bytes -= old[1]
+            self._entries[key] = (loaded, cost)
+            self._cached_bytes += cost
+            while self._cached_bytes > self.cache_bytes:
+                _, (_, old_cost) = self._entries.popitem(last=False)
+                self._cached_bytes -= old_cost
+
+    def load(self, path):
+        """
+        Loads a file, reusing the cached result while its inode, size and mtime do not change.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            LoadedFile or None: The file (text is None for binary files), or None if the
+                                path is not a readable regular file.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        entry = self._get((st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns))
+        if entry is not None:
+            return entry[0]
+
+        try:
+            with open(path, "rb") as f:
+                # A chave vem do arquivo aberto: se ele mudou depois do stat(), vale o que foi lido
+                st = os.fstat(f.fileno())
+                if st.st_size >= self.mmap_min_bytes:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                        loaded, read = self._load_buffer(buffer, len(buffer))
+                else:
+                    data = f.read()
+                    loaded, read = self._load_buffer(data, len(data))
+        except (OSError, ValueError):
+            return None
+        increment("files.opened")
+        increment("bytes.read", read)
+        self._put((st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns), loaded, read)
+        return loaded
+
+    def _load_buffer(self, buffer, size):
+        """
+        Sniffs, decodes and caps the content of a file.
+
+        Returns:
+            tuple: (LoadedFile, bytes read).
+        """
+        prefix = buffer[:SNIFF_BYTES]
+        if is_binary(prefix):
+            return LoadedFile(None, None, size, None, True, False, False), len(prefix)
+
+        declared = detect_encoding(prefix)
+        if size > self.max_file_bytes:
+            encoding, text, read, lossy = _read_excerpt(buffer, size, self.head_bytes, self.tail_bytes, declared)
+            digest = hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+            return LoadedFile(text, digest, size, encoding, False, True, lossy), read
+
+        bom_size = declared[2] if declared is not None else 0
+        encoding, (text,), lossy = _decode([(buffer[bom_size:], False)], declared)
+        return LoadedFile(text, hashlib.sha1(buffer).hexdigest(), size, encoding, False, False, lossy), size
+
+    @traced("file_loader.load_many")
+    def load_many(self, paths, workers=8):
+        """
+        Loads many files, in parallel threads when there are enough of them.
+
+        Args:
+            paths (list of str): Paths of the files.
+            workers (int): Threads used for reading.
+
+        Returns:
+            dict: path -> LoadedFile for every readable regular file.
+        """
+        if len(paths) < 2 * workers:
+            results = map(self.load, paths)
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.load, paths, chunksize=64))
+        return {path: loaded for path, loaded in zip(paths, results) if loaded is not None}
+
+    def load_tree(self, structure, root, paths=None, workers=8):
+        """
+        Loads the files of a directory_structure tree.
+
+        Args:
+            structure (dict): Nested dictionary {root_name: tree} from directory_structure.
+            root (str): Path of the directory that was scanned.
+            paths (list of str or None): Relative paths to load. If None, loads every file of the tree.
+            workers (int): Threads used for reading.
+
+        Returns:
+            dict: relative path -> LoadedFile for every readable regular file.
+        """
+        if paths is None:
+            paths = list(iter_tree_files(structure))
+        loaded = self.load_many([os.path.join(root, rel_path) for rel_path in paths], workers=workers)
+        return {rel_path: loaded[os.path.join(root, rel_path)]
+                for rel_path in paths if os.path.join(root, rel_path) in loaded}
+
+    def clear(self):
+        """
+        Drops every cached file.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._cached_bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Keys "entries", "cached_bytes", "hits", "misses" and "bytes_read".
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "cached_bytes": self._cached_bytes,
+                    "hits": self.hits, "misses": self.misses, "bytes_read": self.bytes_read}
+
+
+_default_loader = None
+_default_lock = threading.Lock()
+
+
+def get_file_loader():
+    """
+    Returns the FileLoader shared by the whole program.
+
+    Returns:
+        FileLoader: The shared loader.
+    """
+    global _default_loader
+    with _default_lock:
+        if _default_loader is None:
+            _default_loader = FileLoader()
+        return _default_loader
+
+
+if __name__ == "__main__":
+    import time
+
+    from smart_coding_assistant.modules.files import directory_structure
+
+    PATH = sys.argv[1] if len(sys.argv) > 1 else "../../"
+    loader = FileLoader()
+    estrutura = directory_structure(PATH, gitignore=True, exclude=[".git/"])
+    for label in ("cold", "warm"):
+        t0 = time.perf_counter()
+        loaded = loader.load_tree(estrutura, PATH)
+        elapsed = time.perf_counter() - t0
+        binary = sum(item.binary for item in loaded.values())
+        truncated = sum(item.truncated for item in loaded.values())
+        print(f"{label}: {len(loaded)} files ({binary} binary, {truncated} excerpted) "
+              f"in {elapsed * 1000:.1f} ms, {loader.stats()}")
@@ -1,17 +1,39 @@
 #!/usr/bin/python3
 
 import os
+import concurrent.futures
 
-def directory_structure(path):
+from smart_coding_assistant.modules.ignore import DEFAULT_EXCLUDES
+from smart_coding_assistant.modules.ignore import load_ignore_rules
+from smart_coding_assistant.modules.ignore import directory_rules
+from smart_coding_assistant.modules.tracing import traced
+
+@traced("files.directory_structure")
+def directory_structure(path, cache=False, gitignore=False, exclude=None, max_depth=None, workers=1):
     """
     Given a path, returns a nested dictionary representing the directory structure.
 
     Args:
         path (str): Path to the root directory.
+        cache (bool): If True, uses the shared TreeCache of the path, so repeated calls
+                      only rescan the directories whose mtime changed. The returned
+                      dictionary must then be treated as read-only.
+        gitignore (bool): If True, honours .gitignore files and .git/info/exclude.
+        exclude (iterable of str or None): Extra gitignore-style patterns to prune, e.g. DEFAULT_EXCLUDES.
+        max_depth (int or None): Number of directory levels to list. Deeper directories
+                                 appear as empty dictionaries.
+        workers (int or None): Threads used to scan subdirectories. None uses the number of CPUs.
 
     Returns:
         dict: Nested dictionary representing the file/folder structure.
     """
+    if cache:
+        from smart_coding_assistant.modules.tree_cache import get_tree_cache
+        return get_tree_cache(path, gitignore=gitignore, exclude=exclude, max_depth=max_depth).structure()
+
+    if gitignore or exclude or max_depth is not None or workers != 1:
+        return scan_tree(path, gitignore=gitignore, exclude=exclude, max_depth=max_depth, workers=workers)
+
     def build_tree(current_path):
         tree = {}
         with os.scandir(current_path) as it:
@@ -25,9 +47,195 @@ def directory_structure(path):
     base_name = os.path.basename(os.path.abspath(path))
     return {base_name: build_tree(path)}
 
+
+def _scan_entries(dir_path, rel_dir, rules):
+    """
+    Lists a directory and returns the kept scandir entries with their relative paths.
+    """
+    with os.scandir(dir_path) as it:
+        entries = list(it)
+
+    if rules is not None:
+        rules = directory_rules(rules, dir_path, rel_dir, [entry.name for entry in entries])
+
+    kept = []
+    for entry in entries:
+        is_dir = entry.is_dir(follow_symlinks=False)
+        rel_path = rel_dir + "/" + entry.name if rel_dir else entry.name
+        if rules and rules.is_ignored(rel_path, is_dir):
+            continue
+        kept.append((entry, rel_path, is_dir))
+    return kept, rules
+
+
+def list_directory(dir_path, rel_dir, rules):
+    """
+    Lists a single directory, dropping ignored entries before anything is done with them.
+
+    Only the d_type returned by scandir is used, so pruned entries are never stat'ed.
+
+    Args:
+        dir_path (str): Absolute path of the directory.
+        rel_dir (str): Path of the directory relative to the scan root ("" for the root).
+        rules (IgnoreRules or None): Rules inherited from the parent directory.
+
+    Returns:
+        tuple: (tree, subdirs, rules) where tree maps names to {} (directories) or None (files),
+               subdirs is a list of (path, rel_path) of the kept directories and rules are
+               the rules in effect inside dir_path.
+    """
+    kept, rules = _scan_entries(dir_path, rel_dir, rules)
+
+    tree = {}
+    subdirs = []
+    for entry, rel_path, is_dir in kept:
+        if is_dir:
+            tree[entry.name] = {}
+            subdirs.append((entry.path, rel_path))
+        else:
+            tree[entry.name] = None
+    return tree, subdirs, rules
+
+
+def iter_entries(path, gitignore=False, exclude=None, max_depth=None):
+    """
+    Walks a directory tree and yields its entries as soon as each directory is listed.
+
+    Parents are always yielded before their children, so the stream can be turned back
+    into a tree in a single pass (see compact_tree.CompactTree).
+
+    Args:
+        path (str): Path to the root directory.
+        gitignore (bool): If True, honours .gitignore files and .git/info/exclude.
+        exclude (iterable of str or None): Extra gitignore-style patterns to prune.
+        max_depth (int or None): Number of directory levels to list.
+
+    Yields:
+        tuple: (rel_path, kind, size, mtime) where rel_path uses '/' as separator, kind is
+               "dir", "file" or "link", size is in bytes and mtime is a POSIX timestamp.
+    """
+    root = os.path.abspath(path)
+    rules = None
+    if gitignore or exclude:
+        rules = load_ignore_rules(root, gitignore=gitignore, exclude=exclude)
+
+    stack = [(root, "", rules, 0)]
+    while stack:
+        dir_path, rel_dir, rules, depth = stack.pop()
+        try:
+            kept, rules = _scan_entries(dir_path, rel_dir, rules)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry, rel_path, is_dir in kept:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                kind = "dir"
+                subdirs.append((entry.path, rel_path))
+            elif entry.is_symlink():
+                kind = "link"
+            else:
+                kind = "file"
+            yield rel_path, kind, st.st_size, st.st_mtime
+
+        if max_depth is None or depth + 1 < max_depth:
+            # Ordem reversa na pilha para manter a ordem da listagem
+            for dir_path, rel_path in reversed(subdirs):
+                stack.append((dir_path, rel_path, rules, depth + 1))
+
+
+@traced("files.scan_tree")
+def scan_tree(path, gitignore=True, exclude=DEFAULT_EXCLUDES, max_depth=None, workers=None):
+    """
+    Scans a directory tree, pruning ignored entries at walk time and listing subdirectories in parallel.
+
+    Args:
+        path (str): Path to the root directory.
+        gitignore (bool): If True, honours .gitignore files and .git/info/exclude.
+        exclude (iterable of str or None): Extra gitignore-style patterns to prune.
+        max_depth (int or None): Number of directory levels to list. Deeper directories
+                                 appear as empty dictionaries.
+        workers (int or None): Threads used to scan subdirectories. None uses the number of CPUs.
+
+    Returns:
+        dict: Nested dictionary in the same format as directory_structure.
+    """
+    root = os.path.abspath(path)
+    rules = load_ignore_rules(root, gitignore=gitignore, exclude=exclude)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    tree, subdirs, rules = list_directory(root, "", rules)
+    result = {os.path.basename(root): tree}
+
+    # Cada tarefa lista um único diretório; a thread principal distribui os filhos,
+    # assim nenhuma tarefa fica bloqueada esperando outra.
+    pending = [(tree, subdirs, rules, 1)]
+    if workers <= 1:
+        while pending:
+            parent, subdirs, rules, depth = pending.pop()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for dir_path, rel_path in subdirs:
+                name = os.path.basename(dir_path)
+                try:
+                    subtree, children, child_rules = list_directory(dir_path, rel_path, rules)
+                except OSError:
+                    continue
+                parent[name] = subtree
+                pending.append((subtree, children, child_rules, depth + 1))
+        return result
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+
+        def submit(parent, subdirs, rules, depth):
+            if max_depth is not None and depth >= max_depth:
+                return
+            for dir_path, rel_path in subdirs:
+                future = executor.submit(list_directory, dir_path, rel_path, rules)
+                futures[future] = (parent, os.path.basename(dir_path), depth + 1)
+
+        submit(tree, subdirs, rules, 1)
+        while futures:
+            done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                parent, name, depth = futures.pop(future)
+                try:
+                    subtree, children, child_rules = future.result()
+                except OSError:
+                    continue
+                parent[name] = subtree
+                submit(subtree, children, child_rules, depth)
+    return result
+
+def iter_tree_files(structure):
+    """
+    Yields the files of a nested dictionary returned by directory_structure.
+
+    Args:
+        structure (dict): Nested dictionary {root_name: tree}.
+
+    Yields:
+        str: Path of each file relative to the root, using '/' as separator.
+    """
+    (_, tree), = structure.items()
+    stack = [("", tree)]
+    while stack:
+        rel_dir, tree = stack.pop()
+        for name, subtree in tree.items():
+            rel_path = rel_dir + "/" + name if rel_dir else name
+            if subtree is None:
+                yield rel_path
+            else:
+                stack.append((rel_path, subtree))
+
 if __name__ == "__main__":
-    import json
+    from smart_coding_assistant.modules.tree_render import render_tree
 
     estrutura = directory_structure("../../")
-    print(json.dumps(estrutura, indent=4))  # Para visualizar melhor
-
+    print(render_tree(estrutura))  # Para visualizar melhor
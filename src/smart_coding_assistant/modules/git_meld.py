@@ -1,7 +1,34 @@
 import os
 import subprocess
-import tempfile
 import shutil
+import threading
+
+from smart_coding_assistant.modules.snapshot_store import SnapshotStore
+from smart_coding_assistant.modules.snapshot_store import get_snapshot_store
+from smart_coding_assistant.modules.git_status import UnsupportedIndexError
+from smart_coding_assistant.modules.git_status import find_repo_root
+from smart_coding_assistant.modules.git_status import modified_files
+from smart_coding_assistant.modules.tracing import increment
+from smart_coding_assistant.modules.tracing import span
+from smart_coding_assistant.modules.tracing import traced
+
+# Tamanho máximo dos nomes passados em cada chamada de 'git ls-tree'
+LS_TREE_ARG_BYTES = 64 * 1024
+
+
+class OperationCancelled(Exception):
+    """
+    Raised by the snapshot functions when their cancel_event is set.
+    """
+
+
+def check_cancelled(cancel_event):
+    """
+    Raises OperationCancelled if cancel_event (a threading.Event or None) is set.
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled()
+
 
 def is_git_in_path():
     """
@@ -22,6 +49,28 @@ def is_meld_in_path():
     return shutil.which("meld") is not None
 
 
+def run_git(path_projeto, args, text=False):
+    """
+    Runs a git command and returns its completed process, timing it for the tracing layer.
+
+    Parameters:
+    path_projeto (str): Directory where git runs.
+    args (list of str): Arguments after 'git'.
+    text (bool): If True, the output is decoded as text.
+
+    Returns:
+    subprocess.CompletedProcess: The finished command, with stdout and stderr captured.
+
+    Raises:
+    subprocess.CalledProcessError: If the git command fails.
+    """
+    increment("subprocess.spawn")
+    # O nome do span é o subcomando ("git ls-tree"), sem as opções globais
+    subcomando = next((arg for arg in args if not arg.startswith("-") and "=" not in arg), "")
+    with span("git " + subcomando):
+        return subprocess.run(["git"] + args, cwd=path_projeto, capture_output=True, text=text, check=True)
+
+
 def get_git_base_dir(path):
     """
     Returns the base directory (root) of the GIT repository that contains the path provided.
@@ -32,17 +81,241 @@ def get_git_base_dir(path):
     Returns:
     str or None: Absolute path to the root of the git repository if found, otherwise None.
     """
+    # Procura '.git' subindo pelos diretórios, sem processo git (memoizado)
+    return find_repo_root(path)
+
+
+@traced("git_meld.get_modified_files")
+def get_modified_files(path_projeto):
+    """
+    Lists the files of the working tree that differ from the index, as 'git diff --name-only'.
+
+    The index is read in-process (see git_status.modified_files()), so no git process is
+    started; repositories whose index cannot be read that way (split index, SHA-256)
+    fall back to 'git diff --name-only -z', which keeps unusual file names intact.
+
+    Parameters:
+    path_projeto (str): Root of the Git repository.
+
+    Returns:
+    list of str: Paths relative to the repository root.
+
+    Raises:
+    subprocess.CalledProcessError: If the git command fails.
+    """
+    try:
+        return modified_files(path_projeto)
+    except (UnsupportedIndexError, ValueError):
+        pass
+
+    resultado = run_git(path_projeto, ["diff", "--name-only", "-z"])
+    return [os.fsdecode(f) for f in resultado.stdout.split(b"\0") if f]
+
+
+def _ls_tree_head(path_projeto, arquivos):
+    """
+    Returns {path: (mode, type, object id)} of the given paths in HEAD.
+
+    Paths are passed as literal pathspecs in chunks, so the number of git processes
+    grows with the total length of the names, not with the number of files.
+    """
+    entradas = {}
+    lote = []
+    tamanho = 0
+    for arq in arquivos + [None]:
+        if arq is not None:
+            lote.append(arq)
+            tamanho += len(arq) + 1
+        if lote and (arq is None or tamanho > LS_TREE_ARG_BYTES):
+            resultado = run_git(path_projeto,
+                                ["--literal-pathspecs", "ls-tree", "-z", "--full-tree", "HEAD", "--"] + lote)
+            for linha in resultado.stdout.split(b"\0"):
+                if not linha:
+                    continue
+                info, caminho = linha.split(b"\t", 1)
+                modo, tipo, oid = info.decode("ascii").split(" ")
+                entradas[os.fsdecode(caminho)] = (modo, tipo, oid)
+            lote = []
+            tamanho = 0
+    return entradas
+
+
+def _cat_file_batch(path_projeto, oids):
+    """
+    Yields (oid, content) for each object id, using a single 'git cat-file --batch' process.
+    """
+    increment("subprocess.spawn")
+    processo = subprocess.Popen(
+        ["git", "cat-file", "--batch"],
+        cwd=path_projeto,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE
+    )
+
+    # Escreve os pedidos em outra thread para não travar com o pipe de saída cheio
+    def escrever():
+        try:
+            for oid in oids:
+                processo.stdin.write(oid.encode("ascii") + b"\n")
+            processo.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+
+    escritor = threading.Thread(target=escrever, daemon=True)
+    escritor.start()
+    completo = False
     try:
-        resultado = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            cwd=path,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return resultado.stdout.strip()
+        for oid in oids:
+            cabecalho = processo.stdout.readline()
+            partes = cabecalho.split()
+            if len(partes) != 3:
+                # "<oid> missing"
+                continue
+            tamanho = int(partes[2])
+            increment("bytes.read", tamanho)
+            conteudo = processo.stdout.read(tamanho)
+            processo.stdout.read(1)  # LF final
+            yield oid, conteudo
+        completo = True
+    finally:
+        if not completo:
+            # Consumidor parou antes (cancelamento): o escritor pode estar bloqueado no pipe
+            processo.kill()
+        escritor.join()
+        processo.stdout.close()
+        processo.wait()
+
+
+def get_head_commit(path_projeto):
+    """
+    Returns the commit id of HEAD.
+
+    Parameters:
+    path_projeto (str): Root of the Git repository.
+
+    Returns:
+    str: Full commit id.
+
+    Raises:
+    subprocess.CalledProcessError: If the repository has no commits or git fails.
+    """
+    resultado = run_git(path_projeto, ["rev-parse", "--verify", "HEAD"], text=True)
+    return resultado.stdout.strip()
+
+
+@traced("git_meld.head_snapshot")
+def head_snapshot(path_projeto, arquivos, store=None, func_progress=None, cancel_event=None):
+    """
+    Returns a directory with the HEAD version of the given files, reusing stored snapshots.
+
+    When HEAD did not move since the last call, only the files not yet in the snapshot
+    are extracted. After a new commit, the paths that the commit did not touch take
+    their object id from the previous snapshot, and blobs already stored for any other
+    snapshot are hardlinked instead of being read from git again.
+
+    Parameters:
+    path_projeto (str): Root of the Git repository.
+    arquivos (list of str): Paths relative to the repository root.
+    store (SnapshotStore or None): Store to use. If None, uses the shared store in the user cache.
+    func_progress (callable or None): Called as func_progress(done, total) while blobs are read and linked.
+    cancel_event (threading.Event or None): When set, stops at the next blob. The files
+                                            linked so far are kept and reused by the next call.
+
+    Returns:
+    tuple: (snapshot directory, list of paths that could not be extracted).
+
+    Raises:
+    OperationCancelled: If cancel_event was set.
+    """
+    if store is None:
+        store = get_snapshot_store()
+
+    commit = get_head_commit(path_projeto)
+    chave = SnapshotStore.key(path_projeto, commit)
+    # Outro processo que rode evict() espera o manifesto deste snapshot ser salvo
+    with store.writing():
+        manifesto, faltando, novos = _write_snapshot(path_projeto, commit, chave, arquivos, store,
+                                                     func_progress, cancel_event)
+    if novos:
+        store.evict(keep=[chave])
+    return store.snapshot_dir(chave), faltando
+
+
+def _write_snapshot(path_projeto, commit, chave, arquivos, store, func_progress, cancel_event):
+    """
+    Adds the given files to the snapshot of a commit (see head_snapshot()).
+
+    Returns:
+    tuple: (manifest, paths that could not be extracted, paths that were not in the snapshot yet).
+    """
+    manifesto = store.load_manifest(chave)
+    novos = [arq for arq in arquivos if arq not in manifesto]
+
+    faltando = []
+    if novos:
+        oids = _reuse_previous_snapshot(path_projeto, commit, chave, novos, store)
+        restantes = [arq for arq in novos if arq not in oids]
+        entradas = _ls_tree_head(path_projeto, restantes) if restantes else {}
+        for arq in restantes:
+            entrada = entradas.get(arq)
+            if entrada is None or entrada[1] != "blob":
+                faltando.append(arq)
+            else:
+                oids[arq] = entrada[2]
+
+        # Só vão para o 'git cat-file' os blobs que nenhum snapshot tem
+        ausentes = sorted({oid for oid in oids.values() if not store.has_object(oid)})
+        total = len(ausentes) + len(oids)
+        feitos = 0
+        try:
+            check_cancelled(cancel_event)
+            for oid, conteudo in _cat_file_batch(path_projeto, ausentes):
+                store.add_object(oid, conteudo)
+                feitos += 1
+                if func_progress is not None:
+                    func_progress(feitos, total)
+                check_cancelled(cancel_event)
+
+            for arq, oid in oids.items():
+                if store.has_object(oid):
+                    store.link(chave, arq, oid)
+                    manifesto[arq] = oid
+                else:
+                    faltando.append(arq)
+                feitos += 1
+                if func_progress is not None:
+                    func_progress(feitos, total)
+                check_cancelled(cancel_event)
+        except OperationCancelled:
+            # Mantém o que já foi ligado: a próxima chamada continua daqui
+            os.makedirs(store.snapshot_dir(chave), exist_ok=True)
+            store.save_manifest(chave, manifesto)
+            raise
+
+    os.makedirs(store.snapshot_dir(chave), exist_ok=True)
+    store.save_manifest(chave, manifesto)
+    return manifesto, faltando, novos
+
+
+def _reuse_previous_snapshot(path_projeto, commit, chave, arquivos, store):
+    """
+    Returns {path: oid} for the paths whose blob did not change since the previous snapshot.
+    """
+    anterior = store.latest_key(path_projeto, exclude=chave)
+    if anterior is None:
+        return {}
+    manifesto_anterior = store.load_manifest(anterior)
+    commit_anterior = anterior.rsplit("-", 1)[1]
+    try:
+        resultado = run_git(path_projeto, ["diff-tree", "-r", "-z", "--no-renames", "--name-only",
+                                           commit_anterior, commit])
     except subprocess.CalledProcessError:
-        return None
+        return {}
+    alterados = {os.fsdecode(f) for f in resultado.stdout.split(b"\0") if f}
+    return {
+        arq: manifesto_anterior[arq] for arq in arquivos
+        if arq in manifesto_anterior and arq not in alterados
+    }
 
 
 def show_message(func_msg=None, msg=""):
@@ -59,20 +332,24 @@ def show_message(func_msg=None, msg=""):
         func_msg(msg)
 
 
-def meld_head_vs_current(dir_path, func_msg=None):
+@traced("git_meld.meld_head_vs_current")
+def meld_head_vs_current(dir_path, func_msg=None, store=None, func_progress=None, cancel_event=None):
     """
     Compares modified files in the working directory with the Git HEAD version using Meld.
 
-    Creates a temporary copy of the files in the HEAD version, and opens Meld to compare with the current files,
-    keeping Meld open after the function finishes executing.
+    Builds a snapshot of the files in the HEAD version (see head_snapshot), and opens Meld to compare
+    with the current files, keeping Meld open after the function finishes executing.
 
     Parameters:
     dir_path (str): Path to a directory within a Git repository.
                     func_msg (callable or None): Function to display messages. If None, uses print().
+    store (SnapshotStore or None): Snapshot store. If None, uses the shared store in the user cache.
+    func_progress (callable or None): Progress callback func_progress(done, total), see head_snapshot.
+    cancel_event (threading.Event or None): When set, the snapshot stops and Meld is not opened.
 
     Returns:
-    str or None: Path to the temporary directory containing the HEAD files if there are modifications,
-                or None if there are no modifications or an error occurs.
+    str or None: Path to the snapshot directory containing the HEAD files if there are modifications,
+                or None if there are no modifications, the operation was cancelled or an error occurs.
     """
     if not os.path.isdir(dir_path):
         show_message(func_msg, "PATH is not a directory")
@@ -90,34 +367,21 @@ def meld_head_vs_current(dir_path, func_msg=None):
 
     try:
         # Obtém arquivos modificados
-        resultado = subprocess.run(
-            ["git", "diff", "--name-only"],
-            cwd=path_projeto,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        arquivos_modificados = resultado.stdout.strip().split("\n")
-        arquivos_modificados = [f for f in arquivos_modificados if f]
+        arquivos_modificados = get_modified_files(path_projeto)
 
         if not arquivos_modificados:
             show_message(func_msg, "Nenhuma modificação encontrada.")
             return None
 
-        # Cria diretório temporário apenas para HEAD
-        dir_head = tempfile.mkdtemp(prefix="HEAD_")
-
-        for arq in arquivos_modificados:
-            caminho_head = os.path.join(dir_head, arq)
-            os.makedirs(os.path.dirname(caminho_head), exist_ok=True)
-            try:
-                conteudo = subprocess.check_output(["git", "show", f"HEAD:{arq}"], cwd=path_projeto)
-                with open(caminho_head, "wb") as f:
-                    f.write(conteudo)
-            except subprocess.CalledProcessError:
-                show_message(func_msg, f"Erro ao extrair HEAD:{arq}")
+        # Snapshot do HEAD, reaproveitado enquanto o HEAD não muda
+        dir_head, faltando = head_snapshot(path_projeto, arquivos_modificados, store,
+                                           func_progress=func_progress, cancel_event=cancel_event)
+        for arq in faltando:
+            show_message(func_msg, f"Erro ao extrair HEAD:{arq}")
 
         # Abre meld (não bloqueante)
+        check_cancelled(cancel_event)
+        increment("subprocess.spawn")
         subprocess.Popen(["meld", dir_head, path_projeto])
 
         return dir_head
@@ -126,6 +390,10 @@ def meld_head_vs_current(dir_path, func_msg=None):
         show_message(func_msg, f"Erro ao executar comando Git: {e}")
         return None
 
+    except OperationCancelled:
+        show_message(func_msg, "Operação cancelada.")
+        return None
+
 if __name__ == "__main__":
     # Exemplo de uso
     PATH = "/home/fernando/Proyectos/PROGRAMACION/GITHUB-SMART/SMART-NEWS-ORGANIZER/SmartNewsOrganizer"
@@ -0,0 +1,496 @@
+#!/usr/bin/python3
+
+import os
+import stat
+import struct
+import hashlib
+import threading
+from collections import namedtuple
+
+from smart_coding_assistant.modules.ignore import find_git_dir
+from smart_coding_assistant.modules.tracing import traced
+
+# Bits dos campos "flags" e "extended flags" de cada entrada do índice
+FLAG_ASSUME_VALID = 0x8000
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE_MASK = 0x3000
+FLAG_NAME_MASK = 0x0FFF
+EXT_SKIP_WORKTREE = 0x4000
+EXT_INTENT_TO_ADD = 0x2000
+
+MODE_GITLINK = 0o160000
+MODE_SYMLINK = 0o120000
+MODE_SPARSE_DIR = 0o040000
+
+_ENTRY_HEADER = struct.Struct(">10I20sH")
+
+IndexEntry = namedtuple(
+    "IndexEntry",
+    "path ctime_s ctime_ns mtime_s mtime_ns dev ino mode uid gid size sha1 flags ext_flags"
+)
+
+
+class UnsupportedIndexError(Exception):
+    """
+    Raised when the index uses a feature this reader does not implement
+    (split index, SHA-256 object format, unknown version). Callers fall back to git.
+    """
+
+
+# Diretório -> (raiz, git dir); só respostas positivas, pois o processo residente vê 'git init' depois
+_repo_cache = {}
+_repo_lock = threading.Lock()
+MAX_CACHED_REPOS = 1024
+
+
+def find_repo(path):
+    """
+    Finds the repository that contains path by walking up looking for '.git'.
+
+    Found repositories are memoised per directory and re-checked on each hit (the
+    git dir must still exist); directories outside any repository are looked up
+    again every time, so a later 'git init' is seen.
+
+    Args:
+        path (str): Absolute path of a directory.
+
+    Returns:
+        tuple: (work tree root, git dir), or (None, None) if path is not inside a repository.
+    """
+    with _repo_lock:
+        cached = _repo_cache.get(path)
+    if cached is not None and os.path.isdir(cached[1]):
+        return cached
+
+    work_tree, git_dir = find_git_dir(path)
+    if work_tree is None:
+        with _repo_lock:
+            _repo_cache.pop(path, None)
+        return None, None
+    result = (os.path.realpath(work_tree), git_dir)
+    if git_dir is None:
+        return result
+    with _repo_lock:
+        if len(_repo_cache) >= MAX_CACHED_REPOS:
+            _repo_cache.clear()
+        _repo_cache[path] = result
+    return result
+
+
+def clear_repo_cache():
+    """
+    Forgets the repositories found by find_repo().
+    """
+    with _repo_lock:
+        _repo_cache.clear()
+
+
+def find_repo_root(path):
+    """
+    Returns the root of the work tree that contains path, without running git.
+
+    Args:
+        path (str): Path to a directory inside (or potentially inside) a repository.
+
+    Returns:
+        str or None: Absolute path of the work tree root, or None.
+    """
+    return find_repo(os.path.abspath(path))[0]
+
+
+def _read_varint(data, offset):
+    # Inteiro de tamanho variável do índice v4 (mesmo formato dos offsets de pacotes)
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def _config_path(git_dir):
+    # Worktrees ligadas guardam a configuração no diretório comum
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r") as f:
+            git_dir = os.path.join(git_dir, f.read().strip())
+    except OSError:
+        pass
+    return os.path.join(git_dir, "config")
+
+
+def _check_object_format(git_dir):
+    config_path = _config_path(git_dir)
+    try:
+        with open(config_path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                key, _, value = line.partition("=")
+                if key.strip().lower() == "objectformat" and value.strip().lower() != "sha1":
+                    raise UnsupportedIndexError("Only SHA-1 repositories are supported")
+    except OSError:
+        pass
+
+
+def parse_index(data):
+    """
+    Parses the content of a .git/index file (versions 2, 3 and 4).
+
+    Args:
+        data (bytes): Content of the index.
+
+    Returns:
+        list of IndexEntry: Entries in index order (sorted by path, then stage).
+
+    Raises:
+        UnsupportedIndexError: For unknown versions or a split index.
+    """
+    if data[:4] != b"DIRC":
+        raise UnsupportedIndexError("Not an index file")
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in (2, 3, 4):
+        raise UnsupportedIndexError(f"Unsupported index version {version}")
+
+    entries = []
+    offset = 12
+    previous = b""
+    unpack = _ENTRY_HEADER.unpack_from
+    header_size = _ENTRY_HEADER.size
+    for _ in range(count):
+        start = offset
+        (ctime_s, ctime_ns, mtime_s, mtime_ns, dev, ino, mode, uid, gid, size,
+         sha1, flags) = unpack(data, offset)
+        offset += header_size
+        ext_flags = 0
+        if flags & FLAG_EXTENDED:
+            ext_flags, = struct.unpack_from(">H", data, offset)
+            offset += 2
+
+        if version == 4:
+            strip, offset = _read_varint(data, offset)
+            end = data.index(b"\0", offset)
+            path = previous[:len(previous) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            end = data.index(b"\0", offset)
+            path = data[offset:end]
+            # Entradas v2/v3 são completadas com NULs até múltiplo de 8 bytes
+            offset = start + ((end - start + 8) & ~7)
+        previous = path
+
+        entries.append(IndexEntry(os.fsdecode(path), ctime_s, ctime_ns, mtime_s, mtime_ns,
+                                  dev, ino, mode, uid, gid, size, sha1, flags, ext_flags))
+
+    # Extensões: apenas o índice dividido muda o significado das entradas
+    end_of_extensions = len(data) - 20
+    while offset + 8 <= end_of_extensions:
+        signature = data[offset:offset + 4]
+        length, = struct.unpack_from(">I", data, offset + 4)
+        if signature == b"link":
+            raise UnsupportedIndexError("Split index is not supported")
+        offset += 8 + length
+    return entries
+
+
+class _IndexState:
+    """
+    Parsed index plus what modified_files() derives from it, valid while the index file is unchanged.
+
+    keys[i] is the lstat key that proves entry i clean without reading the file, or None
+    for entries that need the full check (conflicts, gitlinks, racily clean entries, ...).
+    verified maps paths whose content was hashed and found clean to the lstat key seen
+    then, because this reader cannot refresh the index as git would.
+    """
+    __slots__ = ("signature", "entries", "mtime_ns", "keys", "verified")
+
+    def __init__(self, signature, entries, mtime_ns):
+        self.signature = signature
+        self.entries = entries
+        self.mtime_ns = mtime_ns
+        self.keys = [_entry_key(entry, mtime_ns) for entry in entries]
+        self.verified = {}
+
+
+_SPECIAL_FLAGS = FLAG_STAGE_MASK | FLAG_ASSUME_VALID
+_SPECIAL_EXT_FLAGS = EXT_SKIP_WORKTREE | EXT_INTENT_TO_ADD
+
+
+def _stat_key(st):
+    # Tipo + bit de execução, tamanho, tempos, inode e dono, truncados como no índice
+    return (st.st_mode & 0o170100, st.st_size & 0xFFFFFFFF, st.st_mtime_ns, st.st_ctime_ns,
+            st.st_ino & 0xFFFFFFFF, st.st_uid & 0xFFFFFFFF, st.st_gid & 0xFFFFFFFF)
+
+
+def _entry_key(entry, index_mtime_ns):
+    if entry.flags & _SPECIAL_FLAGS or entry.ext_flags & _SPECIAL_EXT_FLAGS:
+        return None
+    if entry.mode == MODE_SYMLINK:
+        mode = stat.S_IFLNK | 0o100
+    elif entry.mode & 0o170000 == stat.S_IFREG:
+        mode = stat.S_IFREG | (entry.mode & 0o100)
+    else:
+        return None
+    mtime = entry.mtime_s * 1000000000 + entry.mtime_ns
+    # Entrada "racily clean": escrita no mesmo instante que o índice
+    if mtime >= index_mtime_ns:
+        return None
+    return (mode, entry.size, mtime, entry.ctime_s * 1000000000 + entry.ctime_ns,
+            entry.ino, entry.uid, entry.gid)
+
+
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+def _index_state(git_dir):
+    index_path = os.path.join(git_dir, "index")
+    try:
+        st = os.stat(index_path)
+    except FileNotFoundError:
+        return _IndexState(None, [], 0)
+
+    signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+    with _index_lock:
+        cached = _index_cache.get(index_path)
+    if cached is not None and cached.signature == signature:
+        return cached
+
+    _check_object_format(git_dir)
+    with open(index_path, "rb") as f:
+        state = _IndexState(signature, parse_index(f.read()), st.st_mtime_ns)
+    with _index_lock:
+        _index_cache[index_path] = state
+    return state
+
+
+def read_index(git_dir):
+    """
+    Reads and parses the index of a repository, reusing the last parse while the file is unchanged.
+
+    Args:
+        git_dir (str): The .git directory.
+
+    Returns:
+        tuple: (entries, index mtime in ns). An empty list if the repository has no index.
+
+    Raises:
+        UnsupportedIndexError: If the index cannot be read in-process.
+    """
+    state = _index_state(git_dir)
+    return state.entries, state.mtime_ns
+
+
+def blob_sha1(data):
+    """
+    Returns the git object id of a blob.
+
+    Args:
+        data (bytes): Content of the blob.
+
+    Returns:
+        bytes: Binary SHA-1 (20 bytes).
+    """
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.digest()
+
+
+def _read_head(git_dir):
+    """
+    Resolves HEAD of a repository to a binary commit id, reading loose and packed refs.
+    """
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    seen = 0
+    while head.startswith("ref:") and seen < 5:
+        ref = head[4:].strip()
+        seen += 1
+        try:
+            with open(os.path.join(git_dir, ref), "r") as f:
+                head = f.read().strip()
+            continue
+        except OSError:
+            pass
+        head = None
+        try:
+            with open(os.path.join(git_dir, "packed-refs"), "r") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        head = parts[0]
+                        break
+        except OSError:
+            return None
+        if head is None:
+            return None
+    try:
+        return bytes.fromhex(head)
+    except ValueError:
+        return None
+
+
+def _gitlink_changed(full_path, entry):
+    # Submódulo: compara apenas o commit checado com o registrado no índice
+    if not os.path.exists(os.path.join(full_path, ".git")):
+        return False
+    _, git_dir = find_git_dir(full_path)
+    head = _read_head(git_dir) if git_dir else None
+    return head is not None and head != entry.sha1
+
+
+def _entry_changed(root, entry, state, trust_filemode=True, check_stat=True):
+    """
+    Decides whether an index entry differs from the working tree, as git does.
+
+    Cheap stat comparison first; the content is hashed only when the stat data is
+    ambiguous (same size but different times or inode, or a racily clean entry).
+    With check_stat False (conflict stages, whose stat data is not recorded) it always hashes.
+    """
+    full_path = os.path.join(root, entry.path)
+    try:
+        st = os.lstat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return True
+
+    mode = entry.mode
+    if mode == MODE_GITLINK:
+        return stat.S_ISDIR(st.st_mode) and _gitlink_changed(full_path, entry)
+
+    is_link = stat.S_ISLNK(st.st_mode)
+    if (mode == MODE_SYMLINK) != is_link:
+        return True
+    if not is_link and not stat.S_ISREG(st.st_mode):
+        return True
+    if trust_filemode and not is_link:
+        if bool(st.st_mode & 0o100) != bool(mode & 0o100):
+            return True
+
+    if check_stat:
+        if st.st_size & 0xFFFFFFFF != entry.size:
+            return True
+        mtime_s, mtime_ns = divmod(st.st_mtime_ns, 1000000000)
+        ctime_s, ctime_ns = divmod(st.st_ctime_ns, 1000000000)
+        same_stat = (
+            mtime_s == entry.mtime_s and mtime_ns == entry.mtime_ns and
+            ctime_s == entry.ctime_s and ctime_ns == entry.ctime_ns and
+            st.st_ino & 0xFFFFFFFF == entry.ino and
+            st.st_uid & 0xFFFFFFFF == entry.uid and st.st_gid & 0xFFFFFFFF == entry.gid
+        )
+        racy = entry.mtime_s * 1000000000 + entry.mtime_ns >= state.mtime_ns
+        if same_stat and not racy:
+            return False
+
+    key = _stat_key(st)
+    if check_stat and state.verified.get(entry.path) == key:
+        return False
+
+    try:
+        if is_link:
+            data = os.fsencode(os.readlink(full_path))
+        else:
+            with open(full_path, "rb") as f:
+                data = f.read()
+    except OSError:
+        return True
+    if blob_sha1(data) != entry.sha1:
+        return True
+    if check_stat:
+        state.verified[entry.path] = key
+    return False
+
+
+def _trust_filemode(git_dir):
+    try:
+        with open(_config_path(git_dir), "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                key, _, value = line.partition("=")
+                if key.strip().lower() == "filemode":
+                    return value.strip().lower() not in ("false", "no", "off", "0")
+    except OSError:
+        pass
+    return True
+
+
+@traced("git_status.modified_files")
+def modified_files(path):
+    """
+    Lists the files of the working tree that differ from the index, like 'git diff --name-only',
+    without running git.
+
+    Limitations: clean/smudge filters and end-of-line conversion from .gitattributes
+    are not applied, and submodules are only reported when their checked out commit
+    differs from the recorded one (not when they have local changes).
+
+    Args:
+        path (str): Path to a directory inside the repository.
+
+    Returns:
+        list of str: Paths relative to the work tree root, in git order.
+
+    Raises:
+        UnsupportedIndexError: If the index cannot be read in-process.
+        ValueError: If path is not inside a repository.
+    """
+    root, git_dir = find_repo(os.path.abspath(path))
+    if root is None or git_dir is None:
+        raise ValueError(f"Not a git repository: {path}")
+
+    state = _index_state(git_dir)
+    trust_filemode = _trust_filemode(git_dir)
+    prefix = os.path.join(root, "")
+    lstat = os.lstat
+
+    changed = []
+    unmerged = None
+    for entry, key in zip(state.entries, state.keys):
+        if key is not None:
+            # Caminho rápido: um lstat e uma comparação de tupla por arquivo
+            try:
+                st = lstat(prefix + entry.path)
+            except OSError:
+                changed.append(entry.path)
+                continue
+            if (st.st_mode & 0o170100, st.st_size & 0xFFFFFFFF, st.st_mtime_ns, st.st_ctime_ns,
+                    st.st_ino & 0xFFFFFFFF, st.st_uid & 0xFFFFFFFF, st.st_gid & 0xFFFFFFFF) == key:
+                continue
+
+        stage = (entry.flags & FLAG_STAGE_MASK) >> 12
+        if stage:
+            # Conflito: listado uma vez, e de novo se a cópia de trabalho difere de "ours"
+            if entry.path != unmerged:
+                changed.append(entry.path)
+                unmerged = entry.path
+            if stage == 2 and _entry_changed(root, entry, state, trust_filemode, check_stat=False):
+                changed.append(entry.path)
+            continue
+        if entry.ext_flags & EXT_INTENT_TO_ADD:
+            # "git add -N" sempre aparece no diff
+            changed.append(entry.path)
+            continue
+        if entry.mode == MODE_SPARSE_DIR:
+            continue
+        if entry.flags & FLAG_ASSUME_VALID or entry.ext_flags & EXT_SKIP_WORKTREE:
+            continue
+        if _entry_changed(root, entry, state, trust_filemode):
+            changed.append(entry.path)
+    return changed
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import subprocess
+
+    PATH = sys.argv[1] if len(sys.argv) > 1 else "../../"
+
+    t0 = time.perf_counter()
+    resultado = subprocess.run(["git", "diff", "--name-only", "-z"], cwd=PATH, capture_output=True, check=True)
+    via_git = [os.fsdecode(f) for f in resultado.stdout.split(b"\0") if f]
+    t1 = time.perf_counter()
+    in_process = modified_files(PATH)
+    t2 = time.perf_counter()
+    print(f"git diff:   {len(via_git)} files in {(t1 - t0) * 1000:.1f} ms")
+    print(f"in-process: {len(in_process)} files in {(t2 - t1) * 1000:.1f} ms, same result: {via_git == in_process}")
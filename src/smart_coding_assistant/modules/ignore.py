@@ -0,0 +1,330 @@
+#!/usr/bin/python3
+
+import os
+import re
+
+# Padrões no formato do .gitignore descartados por padrão nos escaneamentos
+DEFAULT_EXCLUDES = (
+    ".git/",
+    ".hg/",
+    ".svn/",
+    "node_modules/",
+    "__pycache__/",
+    ".venv/",
+    "venv/",
+    ".tox/",
+    ".nox/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    "*.egg-info/",
+    "build/",
+    "dist/",
+)
+
+
+def _glob_to_regex(pattern):
+    """
+    Translates a gitignore glob (without the leading '!' or trailing '/') to a regex fragment.
+    """
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                j = i + 2
+                if j == n:
+                    out.append(".*")
+                    i = j
+                    continue
+                if pattern[j] == "/":
+                    out.append("(?:.*/)?")
+                    i = j + 1
+                    continue
+            while i < n and pattern[i] == "*":
+                i += 1
+            out.append("[^/]*")
+            continue
+        if c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def parse_patterns(lines, base=""):
+    """
+    Parses gitignore lines into rules.
+
+    Args:
+        lines (iterable of str): Lines of a .gitignore-like file.
+        base (str): Directory of the file, relative to the scan root ("" for the root itself).
+
+    Returns:
+        list: Rules as tuples (regex, negate, dir_only), matched against paths relative to the scan root.
+    """
+    prefix = re.escape(base + "/") if base else ""
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip("\r")
+        # Espaços finais são ignorados, a menos que escapados
+        while line.endswith(" ") and not line.endswith("\\ "):
+            line = line[:-1]
+        if not line or line.startswith("#"):
+            continue
+
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+
+        anchored = "/" in line
+        line = line.lstrip("/")
+        body = _glob_to_regex(line)
+        if anchored:
+            regex = prefix + body
+        else:
+            regex = prefix + "(?:.*/)?" + body
+        rules.append((re.compile(regex + r"\Z", re.DOTALL), negate, dir_only))
+    return rules
+
+
+class IgnoreRules:
+    """
+    Ordered set of gitignore rules, evaluated with "last match wins".
+
+    Instances are immutable: extend() returns a new object, so subdirectories without
+    a .gitignore share the rules of their parent.
+
+    Args:
+        rules (list): Rules produced by parse_patterns().
+        gitignore (bool): Whether .gitignore files found during the walk extend the rules.
+    """
+    def __init__(self, rules=(), gitignore=True):
+        self.rules = list(rules)
+        self.gitignore = gitignore
+        self.key = tuple((regex.pattern, negate, dir_only) for regex, negate, dir_only in self.rules)
+        self._has_negation = any(negate for _, negate, _ in self.rules)
+        # Pré-filtro: nenhuma regra casa na grande maioria das entradas
+        self._any_file = self._combine([r for r in self.rules if not r[2]])
+        self._any_dir = self._combine(self.rules)
+
+    @staticmethod
+    def _combine(rules):
+        if not rules:
+            return None
+        return re.compile("|".join("(?:%s)" % regex.pattern for regex, _, _ in rules), re.DOTALL)
+
+    def extend(self, lines, base=""):
+        """
+        Returns new rules with the patterns of a deeper .gitignore appended.
+
+        Args:
+            lines (iterable of str): Lines of the .gitignore file.
+            base (str): Directory of the file, relative to the scan root.
+
+        Returns:
+            IgnoreRules: The combined rules (self if the file has no patterns).
+        """
+        new_rules = parse_patterns(lines, base)
+        if not new_rules:
+            return self
+        return IgnoreRules(self.rules + new_rules, self.gitignore)
+
+    def is_ignored(self, rel_path, is_dir):
+        """
+        Checks whether a path is ignored.
+
+        Args:
+            rel_path (str): Path relative to the scan root, using '/' as separator.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the last matching rule excludes the path.
+        """
+        combined = self._any_dir if is_dir else self._any_file
+        if combined is None or combined.match(rel_path) is None:
+            return False
+        if not self._has_negation:
+            return True
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negate
+        return False
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def __eq__(self, other):
+        return isinstance(other, IgnoreRules) and self.key == other.key and self.gitignore == other.gitignore
+
+    def __hash__(self):
+        return hash((self.key, self.gitignore))
+
+
+def read_ignore_file(file_path):
+    """
+    Reads the lines of a .gitignore-like file.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        list: Lines of the file, or an empty list if it cannot be read.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            return f.readlines()
+    except OSError:
+        return []
+
+
+def find_git_dir(path):
+    """
+    Walks up from path looking for a '.git' entry.
+
+    Args:
+        path (str): Path to a directory.
+
+    Returns:
+        tuple: (work tree root, git dir) or (None, None) if path is not inside a repository.
+    """
+    current = os.path.abspath(path)
+    while True:
+        dot_git = os.path.join(current, ".git")
+        if os.path.isdir(dot_git):
+            return current, dot_git
+        if os.path.isfile(dot_git):
+            # Worktrees e submódulos: arquivo com "gitdir: <caminho>"
+            for line in read_ignore_file(dot_git):
+                if line.startswith("gitdir:"):
+                    git_dir = line[len("gitdir:"):].strip()
+                    return current, os.path.normpath(os.path.join(current, git_dir))
+            return current, None
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None, None
+        current = parent
+
+
+def load_ignore_rules(path, gitignore=True, exclude=None):
+    """
+    Builds the rules that apply to the entries directly inside path.
+
+    The rules contain, in increasing priority: the exclude patterns, the repository's
+    .git/info/exclude, and every .gitignore from the repository root down to path.
+    Rules are expressed relative to path, so the walker only needs names relative to it.
+
+    Args:
+        path (str): Root of the scan.
+        gitignore (bool): If True, honours .gitignore files and .git/info/exclude.
+        exclude (iterable of str or None): Extra gitignore-style patterns, e.g. DEFAULT_EXCLUDES.
+
+    Returns:
+        IgnoreRules: Rules for the scan root.
+    """
+    root = os.path.abspath(path)
+    rules = IgnoreRules(parse_patterns(exclude or ()), gitignore)
+    if not gitignore:
+        return rules
+
+    work_tree, git_dir = find_git_dir(root)
+    if work_tree is None:
+        return rules.extend(read_ignore_file(os.path.join(root, ".gitignore")))
+
+    if git_dir is not None:
+        rules = rules.extend(_rebase(read_ignore_file(os.path.join(git_dir, "info", "exclude")),
+                                     os.path.relpath(root, work_tree)))
+
+    # .gitignore dos diretórios acima da raiz do escaneamento
+    current = work_tree
+    for part in [""] + os.path.relpath(root, work_tree).split(os.sep):
+        if part == ".":
+            continue
+        current = os.path.join(current, part) if part else current
+        lines = read_ignore_file(os.path.join(current, ".gitignore"))
+        if lines:
+            rules = rules.extend(_rebase(lines, os.path.relpath(root, current)))
+    return rules
+
+
+def _rebase(lines, rel_root):
+    """
+    Rewrites patterns of an ancestor directory so they apply relative to a deeper scan root.
+
+    Anchored patterns that cannot match below rel_root are dropped; the others lose the
+    rel_root prefix. Unanchored patterns are kept as they are.
+    """
+    if rel_root in ("", "."):
+        return lines
+
+    root_parts = rel_root.replace(os.sep, "/").split("/")
+    out = []
+    for line in lines:
+        stripped = line.rstrip("\n").rstrip("\r").rstrip(" ")
+        if not stripped or stripped.startswith("#"):
+            continue
+        negate = stripped.startswith("!")
+        body = stripped[1:] if negate else stripped
+        if "/" not in body.rstrip("/") or body.startswith("**/"):
+            out.append(stripped)
+            continue
+
+        # Padrão ancorado: mantém apenas o que fica abaixo de rel_root
+        trailing = "/" if body.endswith("/") else ""
+        parts = body.strip("/").split("/")
+        if len(parts) <= len(root_parts) or any("**" in p for p in parts[:len(root_parts)]):
+            continue
+        head = _glob_to_regex("/".join(parts[:len(root_parts)]))
+        if re.match(head + r"\Z", "/".join(root_parts), re.DOTALL):
+            rest = "/".join(parts[len(root_parts):])
+            out.append(("!" if negate else "") + "/" + rest + trailing)
+    return out
+
+
+def directory_rules(rules, dir_path, rel_dir, names):
+    """
+    Returns the rules for the entries of a directory, reading its .gitignore if present.
+
+    Args:
+        rules (IgnoreRules): Rules inherited from the parent directory.
+        dir_path (str): Absolute path of the directory.
+        rel_dir (str): Path of the directory relative to the scan root ("" for the root).
+        names (container of str): Names listed in the directory, used to avoid a useless open().
+
+    Returns:
+        IgnoreRules: The rules to apply inside the directory.
+    """
+    if not rules.gitignore or rel_dir == "" or ".gitignore" not in names:
+        return rules
+    return rules.extend(read_ignore_file(os.path.join(dir_path, ".gitignore")), rel_dir)
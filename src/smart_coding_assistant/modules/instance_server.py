@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+
+import os
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QAbstractSocket, QLocalServer, QLocalSocket
+
+from smart_coding_assistant.modules.single_instance import decode_request
+from smart_coding_assistant.modules.single_instance import socket_path
+
+# Tamanho máximo de um pedido, para ignorar clientes que não são o lançador
+MAX_REQUEST_BYTES = 64 * 1024
+
+# Espera da conexão de teste a um socket existente; o kernel aceita mesmo com a interface do dono ocupada
+PROBE_TIMEOUT_MS = 200
+
+
+class InstanceServer(QObject):
+    """
+    Local server of the resident instance. Later launches hand their requests
+    (see single_instance.send_request) to it instead of starting a new window.
+
+    Each request is one JSON line; the server answers "ok" and emits request_received
+    in the GUI thread.
+
+    Args:
+        path (str or None): Socket path. If None, uses single_instance.socket_path().
+        parent (QObject or None): Qt parent.
+    """
+    request_received = pyqtSignal(dict)
+
+    def __init__(self, path=None, parent=None):
+        super().__init__(parent)
+        self.path = path or socket_path()
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._buffers = {}
+        # True quando listen() falhou porque outra instância viva é dona do socket
+        self.in_use = False
+
+    def listen(self):
+        """
+        Starts listening, replacing a socket file left behind by an instance that crashed.
+
+        The socket file is only removed when nothing accepts connections on it: a
+        resident instance whose GUI thread is busy still owns it (see in_use).
+
+        Returns:
+            bool: True if the server is listening.
+        """
+        self.in_use = False
+        # Com UserAccessOption o Qt cria o socket em outro lugar e o renomeia por cima do
+        # existente, sem AddressInUseError: o dono precisa ser testado antes
+        if os.path.lexists(self.path):
+            probe = QLocalSocket()
+            probe.connectToServer(self.path)
+            connected = probe.waitForConnected(PROBE_TIMEOUT_MS)
+            error = probe.error()
+            probe.abort()
+            if connected or error not in (QLocalSocket.ConnectionRefusedError, QLocalSocket.ServerNotFoundError):
+                # Dono vivo, ou não dá para saber: o socket de uma instância viva não é apagado
+                self.in_use = True
+                return False
+            QLocalServer.removeServer(self.path)
+        if self.server.listen(self.path):
+            return True
+        self.in_use = self.server.serverError() == QAbstractSocket.AddressInUseError
+        return False
+
+    def close(self):
+        self.server.close()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            self._buffers[connection] = b""
+            connection.readyRead.connect(lambda connection=connection: self._on_ready_read(connection))
+            connection.disconnected.connect(lambda connection=connection: self._on_disconnected(connection))
+
+    def _on_disconnected(self, connection):
+        self._buffers.pop(connection, None)
+        connection.deleteLater()
+
+    def _on_ready_read(self, connection):
+        data = self._buffers.get(connection, b"") + bytes(connection.readAll())
+        if b"\n" not in data:
+            if len(data) > MAX_REQUEST_BYTES:
+                connection.abort()
+            else:
+                self._buffers[connection] = data
+            return
+
+        line = data.split(b"\n", 1)[0]
+        request = decode_request(line)
+        connection.write(b"ok\n" if request is not None else b"error\n")
+        connection.flush()
+        connection.disconnectFromServer()
+        if request is not None:
+            self.request_received.emit(request)
@@ -0,0 +1,332 @@
+#!/usr/bin/python3
+
+import bisect
+
+from smart_coding_assistant.modules.tracing import traced
+
+ALGORITHMS = ("myers", "patience")
+
+DEFAULT_ALGORITHM = "patience"
+
+
+def _bisect(a, a0, a1, b, b0, b1):
+    """
+    Finds the middle snake of a[a0:a1] and b[b0:b1] (Myers' linear space variant).
+
+    Both sequences must be non-empty and differ in their first and last items.
+
+    Returns:
+        tuple or None: (x, y) offsets of a split point of the shortest edit script,
+                       or None if the sequences have nothing in common.
+    """
+    n = a1 - a0
+    m = b1 - b0
+    max_d = (n + m + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    v1 = [-1] * v_length
+    v2 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2[v_offset + 1] = 0
+    delta = n - m
+    # Com delta ímpar a sobreposição é vista na busca para frente, com delta par na busca para trás
+    front = delta % 2 != 0
+    k1start = k1end = k2start = k2end = 0
+    for d in range(max_d):
+        for k1 in range(-d + k1start, d + 1 - k1end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[a0 + x1] == b[b0 + y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1end += 2
+            elif y1 > m:
+                k1start += 2
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1 and x1 >= n - v2[k2_offset]:
+                    return x1, y1
+
+        for k2 in range(-d + k2start, d + 1 - k2end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[a1 - 1 - x2] == b[b1 - 1 - y2]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2end += 2
+            elif y2 > m:
+                k2start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    if x1 >= n - x2:
+                        return x1, x1 - (delta - k2)
+    return None
+
+
+def _unique_anchors(a, a0, a1, b, b0, b1):
+    """
+    Returns the lines that occur exactly once in a[a0:a1] and in b[b0:b1], as the longest
+    list of (i, j) pairs increasing in both sequences (patience diff).
+    """
+    in_a = {}
+    for i in range(a0, a1):
+        in_a[a[i]] = -1 if a[i] in in_a else i
+    in_b = {}
+    for j in range(b0, b1):
+        in_b[b[j]] = -1 if b[j] in in_b else j
+
+    pairs = []
+    for i in range(a0, a1):
+        if in_a[a[i]] == i:
+            j = in_b.get(a[i], -1)
+            if j >= 0:
+                pairs.append((i, j))
+    if not pairs:
+        return []
+
+    # Maior subsequência crescente dos j (ordenação paciência)
+    tails = []
+    tail_index = []
+    previous = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pile = bisect.bisect_left(tails, j)
+        if pile == len(tails):
+            tails.append(j)
+            tail_index.append(k)
+        else:
+            tails[pile] = j
+            tail_index[pile] = k
+        previous[k] = tail_index[pile - 1] if pile else -1
+    anchors = []
+    k = tail_index[-1]
+    while k >= 0:
+        anchors.append(pairs[k])
+        k = previous[k]
+    anchors.reverse()
+    return anchors
+
+
+def _edit_script(a, b, algorithm):
+    """
+    Returns the runs of equal, deleted and inserted items, in order, as (tag, i1, i2, j1, j2).
+    """
+    script = []
+    stack = [("seg", 0, len(a), 0, len(b), algorithm)]
+    while stack:
+        item = stack.pop()
+        if item[0] == "op":
+            script.append(item[1:])
+            continue
+        _, a0, a1, b0, b1, algorithm = item
+
+        limit = min(a1 - a0, b1 - b0)
+        prefix = 0
+        while prefix < limit and a[a0 + prefix] == b[b0 + prefix]:
+            prefix += 1
+        if prefix:
+            script.append(("equal", a0, a0 + prefix, b0, b0 + prefix))
+            a0 += prefix
+            b0 += prefix
+        limit -= prefix
+        suffix = 0
+        while suffix < limit and a[a1 - 1 - suffix] == b[b1 - 1 - suffix]:
+            suffix += 1
+        if suffix:
+            # Empilhado antes do meio, para sair depois dele
+            stack.append(("op", "equal", a1 - suffix, a1, b1 - suffix, b1))
+            a1 -= suffix
+            b1 -= suffix
+
+        if a0 == a1 or b0 == b1:
+            script.append(("delete", a0, a1, b0, b0))
+            script.append(("insert", a1, a1, b0, b1))
+            continue
+
+        if algorithm == "patience":
+            anchors = _unique_anchors(a, a0, a1, b, b0, b1)
+            if anchors:
+                items = []
+                for i, j in anchors:
+                    items.append(("seg", a0, i, b0, j, "patience"))
+                    items.append(("op", "equal", i, i + 1, j, j + 1))
+                    a0, b0 = i + 1, j + 1
+                items.append(("seg", a0, a1, b0, b1, "patience"))
+                stack.extend(reversed(items))
+                continue
+
+        split = _bisect(a, a0, a1, b, b0, b1)
+        if split is None or split in ((0, 0), (a1 - a0, b1 - b0)):
+            script.append(("delete", a0, a1, b0, b0))
+            script.append(("insert", a1, a1, b0, b1))
+            continue
+        x, y = split
+        stack.append(("seg", a0 + x, a1, b0 + y, b1, "myers"))
+        stack.append(("seg", a0, a0 + x, b0, b0 + y, "myers"))
+    return script
+
+
+@traced("line_diff.diff_lines")
+def diff_lines(a, b, algorithm=DEFAULT_ALGORITHM):
+    """
+    Computes a line diff in linear memory, without difflib.
+
+    Lines are interned to integers first, so each comparison is an integer comparison.
+    "myers" is Myers' O((N+M)D) algorithm with the middle snake split, which gives a
+    shortest diff; "patience" first aligns the lines that are unique in both sides
+    (which keeps blank lines and braces from being matched across unrelated blocks,
+    and avoids Myers' worst case on moved code) and runs Myers between them.
+
+    Args:
+        a (list of str): Old lines.
+        b (list of str): New lines.
+        algorithm (str): "myers" or "patience".
+
+    Returns:
+        list of tuple: Opcodes (tag, i1, i2, j1, j2) like difflib.SequenceMatcher.get_opcodes(),
+                       with tag "equal", "replace", "delete" or "insert".
+
+    Raises:
+        ValueError: If the algorithm is unknown.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown diff algorithm: {algorithm}")
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+
+    opcodes = []
+    pending = None
+    for tag, i1, i2, j1, j2 in _edit_script(a_ids, b_ids, algorithm):
+        if i1 == i2 and j1 == j2:
+            continue
+        if tag != "equal":
+            if pending is None:
+                pending = [i1, i2, j1, j2]
+            else:
+                pending[1] = max(pending[1], i2)
+                pending[3] = max(pending[3], j2)
+            continue
+        if pending is not None:
+            opcodes.append((_change_tag(pending),) + tuple(pending))
+            pending = None
+        if opcodes and opcodes[-1][0] == "equal":
+            opcodes[-1] = ("equal", opcodes[-1][1], i2, opcodes[-1][3], j2)
+        else:
+            opcodes.append((tag, i1, i2, j1, j2))
+    if pending is not None:
+        opcodes.append((_change_tag(pending),) + tuple(pending))
+    return opcodes
+
+
+def _change_tag(region):
+    i1, i2, j1, j2 = region
+    if i1 < i2 and j1 < j2:
+        return "replace"
+    return "delete" if i1 < i2 else "insert"
+
+
+def grouped_opcodes(opcodes, context=3):
+    """
+    Splits opcodes into hunks with up to context unchanged lines around each change,
+    like difflib.SequenceMatcher.get_grouped_opcodes().
+
+    Yields:
+        list of tuple: The opcodes of each hunk.
+    """
+    codes = list(opcodes)
+    if not any(code[0] != "equal" for code in codes):
+        return
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = (tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = (tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * context:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _range(start, stop):
+    # Formato dos intervalos do cabeçalho @@ (o mesmo de 'diff -u')
+    length = stop - start
+    if length == 1:
+        return str(start + 1)
+    return f"{start + 1 if length else start},{length}"
+
+
+def unified_diff(a, b, fromfile="", tofile="", context=3, algorithm=DEFAULT_ALGORITHM):
+    """
+    Formats the diff of two lists of lines as a unified diff.
+
+    Args:
+        a (list of str): Old lines, without line breaks.
+        b (list of str): New lines, without line breaks.
+        fromfile (str): Name of the old file in the "---" header.
+        tofile (str): Name of the new file in the "+++" header.
+        context (int): Unchanged lines shown around each change.
+        algorithm (str): See diff_lines().
+
+    Returns:
+        str: The diff, empty if the lines are equal.
+    """
+    out = []
+    for group in grouped_opcodes(diff_lines(a, b, algorithm), context):
+        if not out:
+            out.append(f"--- {fromfile}")
+            out.append(f"+++ {tofile}")
+        out.append(f"@@ -{_range(group[0][1], group[-1][2])} +{_range(group[0][3], group[-1][4])} @@")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                out.extend(" " + line for line in a[i1:i2])
+                continue
+            out.extend("-" + line for line in a[i1:i2])
+            out.extend("+" + line for line in b[j1:j2])
+    return "".join(line + "\n" for line in out)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import difflib
+
+    PATH = sys.argv[1] if len(sys.argv) > 1 else __file__
+    with open(PATH, "r", encoding="utf-8") as f:
+        old = f.read().splitlines()
+    # Edições espalhadas e um bloco movido, como numa refatoração
+    new = [line.replace("self", "this") if i % 97 == 0 else line for i, line in enumerate(old)]
+    moved = new[len(new) // 3:len(new) // 3 + 40]
+    new = new[:len(new) // 3] + new[len(new) // 3 + 40:] + moved
+    for algorithm in ALGORITHMS:
+        t0 = time.perf_counter()
+        opcodes = diff_lines(old, new, algorithm)
+        elapsed = time.perf_counter() - t0
+        changed = sum(i2 - i1 + j2 - j1 for tag, i1, i2, j1, j2 in opcodes if tag != "equal")
+        print(f"{algorithm:<9} {elapsed * 1000:7.2f} ms, {changed} lines changed")
+    t0 = time.perf_counter()
+    opcodes = difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes()
+    elapsed = time.perf_counter() - t0
+    changed = sum(i2 - i1 + j2 - j1 for tag, i1, i2, j1, j2 in opcodes if tag != "equal")
+    print(f"{'difflib':<9} {elapsed * 1000:7.2f} ms, {changed} lines changed")
@@ -0,0 +1,288 @@
+#!/usr/bin/python3
+
+import os
+import json
+import time
+import urllib.request
+
+from smart_coding_assistant.modules.models import DEFAULT_MODEL
+from smart_coding_assistant.modules.models import DEFAULT_TASK
+from smart_coding_assistant.modules.models import model_id
+from smart_coding_assistant.modules.response_cache import cached_call
+from smart_coding_assistant.modules.response_cache import get_response_cache
+from smart_coding_assistant.modules.response_cache import make_key
+from smart_coding_assistant.modules.tokens import approximate_tokens
+from smart_coding_assistant.modules.tracing import increment
+from smart_coding_assistant.modules.tracing import is_enabled
+from smart_coding_assistant.modules.tracing import span
+
+DEFAULT_BASE_URL = "https://api.deepinfra.com/v1/openai"
+
+# Variável de ambiente com a chave usada quando nenhuma é passada
+API_KEY_ENV = "DEEPINFRA_API_KEY"
+
+DEFAULT_SYSTEM_MESSAGE = "You are a coding assistant. Answer clearly and objectively."
+
+DEFAULT_TIMEOUT = 300
+
+
+def chat_payload(api_key, model, user_msg, system_msg, stream=False):
+    """
+    Builds the body and the headers of a chat completions request.
+
+    Args:
+        api_key (str or None): Bearer token. If None, uses $DEEPINFRA_API_KEY.
+        model, user_msg, system_msg: See chat_completion().
+        stream (bool): Ask for server-sent events.
+
+    Returns:
+        tuple: (body bytes, headers dict).
+    """
+    body = json.dumps({
+        "model": model_id(model),
+        "messages": [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_msg},
+        ],
+        "stream": stream,
+    }).encode("utf-8")
+    if is_enabled():
+        increment("llm.requests")
+        increment("llm.bytes_sent", len(body))
+        increment("llm.tokens_sent", approximate_tokens(system_msg) + approximate_tokens(user_msg))
+    api_key = api_key or os.environ.get(API_KEY_ENV)
+    headers = {"Content-Type": "application/json"}
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    return body, headers
+
+
+def _chat_request(base_url, api_key, model, user_msg, system_msg, stream):
+    body, headers = chat_payload(api_key, model, user_msg, system_msg, stream)
+    return urllib.request.Request(base_url.rstrip("/") + "/chat/completions", data=body, headers=headers)
+
+
+def chat_completion(base_url, api_key, model, user_msg, system_msg, timeout=DEFAULT_TIMEOUT):
+    """
+    Asks an OpenAI-compatible chat completions endpoint, without extra dependencies.
+
+    Args:
+        base_url (str): Base URL of the API (".../v1" style), without "/chat/completions".
+        api_key (str or None): Bearer token. If None, uses $DEEPINFRA_API_KEY.
+        model (str): Model name or API id (see models.model_id).
+        user_msg (str): User message.
+        system_msg (str): System message.
+        timeout (float): Seconds to wait for the answer.
+
+    Returns:
+        str: Content of the answer.
+
+    Raises:
+        urllib.error.URLError: If the request fails.
+    """
+    request = _chat_request(base_url, api_key, model, user_msg, system_msg, stream=False)
+    with span("llm.chat", model=model):
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            raw = response.read()
+    increment("llm.bytes_received", len(raw))
+    data = json.loads(raw.decode("utf-8"))
+    return data["choices"][0]["message"]["content"]
+
+
+def stream_chat_completion(base_url, api_key, model, user_msg, system_msg, timeout=DEFAULT_TIMEOUT,
+                           cancel_event=None):
+    """
+    Asks an OpenAI-compatible endpoint with "stream": true and yields the answer as it arrives.
+
+    Args:
+        base_url, api_key, model, user_msg, system_msg, timeout: See chat_completion().
+        cancel_event (threading.Event or None): When set, the connection is closed at the next event.
+
+    Yields:
+        str: Pieces of the content of the answer, in order.
+
+    Raises:
+        urllib.error.URLError: If the request fails.
+    """
+    request = _chat_request(base_url, api_key, model, user_msg, system_msg, stream=True)
+    with span("llm.stream", model=model) as trace, urllib.request.urlopen(request, timeout=timeout) as response:
+        first = True
+        for raw_line in response:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            if first and is_enabled():
+                trace.set(first_byte_ms=(time.perf_counter_ns() - trace.start_ns) / 1e6)
+                first = False
+            increment("llm.bytes_received", len(raw_line))
+            line = raw_line.strip()
+            if not line.startswith(b"data:"):
+                continue
+            data = line[len(b"data:"):].strip()
+            if data == b"[DONE]":
+                return
+            for choice in json.loads(data.decode("utf-8")).get("choices", ()):
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    yield content
+
+
+def consult(base_url, api_key, model, user_msg, system_msg):
+    """
+    Asks the model through deep-consultation when it is installed, otherwise through chat_completion().
+
+    Args:
+        api_key (str or None): Bearer token. If None, uses $DEEPINFRA_API_KEY in both paths.
+
+    Returns:
+        str: Content of the answer.
+    """
+    # deep-consultation não lê a variável de ambiente: a chave é resolvida aqui para os dois caminhos
+    api_key = api_key or os.environ.get(API_KEY_ENV)
+    try:
+        from deep_consultation.core import consult_with_deepchat
+    except ImportError:
+        return chat_completion(base_url, api_key, model, user_msg, system_msg)
+    return consult_with_deepchat(base_url, api_key, model_id(model), user_msg, system_msg)
+
+
+def build_user_message(context, question):
+    """
+    Joins the packed project context and the question into the user message.
+    """
+    if not context:
+        return question
+    return f"{context}\n\n{question}"
+
+
+def ask(question, context="", system_msg=DEFAULT_SYSTEM_MESSAGE, model=DEFAULT_MODEL,
+        base_url=DEFAULT_BASE_URL, api_key=None, cache=None, refresh=False, bypass=False):
+    """
+    Asks a question about the project, reusing stored answers for identical requests.
+
+    Args:
+        question (str): User question.
+        context (str): Packed project context (see context_packer.pack_context).
+        system_msg (str): System message.
+        model (str): Model name or API id; answers are stored under the API id.
+        base_url (str): Base URL of the OpenAI-compatible API.
+        api_key (str or None): API key.
+        cache (ResponseCache or None): Response cache. If None, uses the shared cache.
+        refresh (bool): Ask the model again and replace the stored answer.
+        bypass (bool): Ask the model without reading or writing the cache.
+
+    Returns:
+        tuple: (answer, True if it came from the cache).
+    """
+    if cache is None:
+        cache = get_response_cache()
+    model = model_id(model)
+
+    def call(model, system_msg, context, question):
+        return consult(base_url, api_key, model, build_user_message(context, question), system_msg)
+
+    return cached_call(cache, call, model, system_msg, context, question, refresh=refresh, bypass=bypass)
+
+
+def ask_routed(question, context="", task=DEFAULT_TASK, router=None, system_msg=DEFAULT_SYSTEM_MESSAGE,
+               base_url=DEFAULT_BASE_URL, api_key=None, cache=None, refresh=False, bypass=False):
+    """
+    Asks a question with the model chosen by the model router, and records its latency and spend.
+
+    Answers served by the cache are not recorded: they cost nothing and say nothing about the model.
+
+    Args:
+        question (str): User question.
+        context (str): Packed project context.
+        task (str): Task type of the route (e.g. "completion", "analysis", "chat").
+        router (ModelRouter or None): Router. If None, uses the shared router.
+        system_msg, api_key, cache, refresh, bypass: See ask().
+        base_url (str): Endpoint used for models without a "base_url" in the router table.
+
+    Returns:
+        tuple: (answer, True if it came from the cache, model_router.Route).
+    """
+    from smart_coding_assistant.modules.model_router import get_model_router
+    from smart_coding_assistant.modules.tokens import get_token_counter
+
+    router = router or get_model_router()
+    counter = get_token_counter()
+    tokens_in = counter.count_prompt({"system": system_msg, "context": context, "question": question})["total"]
+    route = router.select(task, tokens_in)
+
+    t0 = time.perf_counter()
+    try:
+        answer, hit = ask(question, context, system_msg, router.model_id(route.model),
+                          router.base_url(route.model, base_url), api_key, cache, refresh, bypass)
+    except Exception:
+        router.record(route.model, time.perf_counter() - t0, tokens_in, ok=False)
+        raise
+    if not hit:
+        router.record(route.model, time.perf_counter() - t0, tokens_in, counter.count(answer))
+    return answer, hit, route
+
+
+def ask_stream(question, context="", system_msg=DEFAULT_SYSTEM_MESSAGE, model=DEFAULT_MODEL,
+               base_url=DEFAULT_BASE_URL, api_key=None, cache=None, refresh=False, bypass=False,
+               cancel_event=None):
+    """
+    Streaming version of ask(): yields the answer as it arrives.
+
+    A stored answer is yielded at once. A streamed answer is stored when it completes;
+    a cancelled one is not stored.
+
+    Args:
+        See ask(); cancel_event (threading.Event or None) stops the stream.
+
+    Yields:
+        str: Pieces of the answer, in order.
+    """
+    if cache is None and not bypass:
+        cache = get_response_cache()
+    model = model_id(model)
+
+    key = make_key(model, system_msg, context, question)
+    if not bypass and not refresh:
+        response = cache.get(key)
+        if response is not None:
+            yield response
+            return
+
+    t0 = time.perf_counter()
+    pieces = []
+    for piece in stream_chat_completion(base_url, api_key, model, build_user_message(context, question),
+                                        system_msg, cancel_event=cancel_event):
+        pieces.append(piece)
+        yield piece
+
+    if not bypass and not (cancel_event is not None and cancel_event.is_set()):
+        cache.put(key, model, "".join(pieces), time.perf_counter() - t0)
+
+
+def ask_project_stream(question, project_dir=None, model=DEFAULT_MODEL, cancel_event=None, diff=False, **kwargs):
+    """
+    Packs the project files most relevant to a question (see context_packer.pack_context)
+    and streams the answer to it.
+
+    Args:
+        question (str): User question.
+        project_dir (str or None): Root of the project. If None or empty, no context is sent.
+        model (str): Model name, also used for the context budget.
+        cancel_event (threading.Event or None): Stops the stream.
+        diff (bool): If True, sends only the changes against HEAD (see
+                     diff_context.pack_diff_context) instead of the files, for
+                     review and "explain my change" questions.
+        **kwargs: Other arguments of ask_stream().
+
+    Yields:
+        str: Pieces of the answer, in order.
+    """
+    context = ""
+    if project_dir and diff:
+        from smart_coding_assistant.modules.diff_context import pack_diff_context
+
+        context = pack_diff_context(project_dir, model=model, untracked=True)["text"]
+    elif project_dir:
+        from smart_coding_assistant.modules.context_packer import pack_context
+
+        context = pack_context(project_dir, model=model, question=question)["text"]
+    yield from ask_stream(question, context, model=model, cancel_event=cancel_event, **kwargs)
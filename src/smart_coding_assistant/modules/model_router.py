@@ -0,0 +1,366 @@
+#!/usr/bin/python3
+
+import os
+import json
+import math
+import time
+import threading
+from collections import deque, namedtuple
+
+from smart_coding_assistant.modules.models import DEFAULT_TASK
+from smart_coding_assistant.modules.models import MODELS
+from smart_coding_assistant.modules.models import ROUTES
+from smart_coding_assistant.modules.models import request_cost
+from smart_coding_assistant.modules.paths import cache_dir
+from smart_coding_assistant.modules.paths import config_dir
+
+CONFIG_FILE_NAME = "router.json"
+STATS_FILE_NAME = "model_stats.json"
+
+# Latências guardadas por modelo e idade máxima das que contam para o roteamento
+DEFAULT_WINDOW = 100
+DEFAULT_LATENCY_AGE = 15 * 60
+
+DEFAULT_PERCENTILE = 0.9
+
+# Uma falha conta como uma latência de pelo menos isso: um modelo que falha (até rápido,
+# com conexão recusada) perde a preferência até as amostras passarem de max_age
+FAILURE_LATENCY = 120.0
+
+Route = namedtuple("Route", ["model", "task", "reason", "tokens_in", "max_tokens_out", "estimated_cost"])
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values (list of float): Samples.
+        fraction (float): Percentile between 0 and 1 (e.g. 0.9 for p90).
+
+    Returns:
+        float or None: The percentile, or None without samples.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+def load_router_config(path=None):
+    """
+    Reads the routing table, merged over models.ROUTES and models.MODELS.
+
+    The JSON file may have the keys "routes" (task -> {"models", "max_latency",
+    "max_tokens_out"}) and "models" (name -> {"context", "price_in", "price_out",
+    and optionally "id", sent to the API, and "base_url"}). Entries of the file replace or extend the defaults
+    key by key; a new model without prices is taken as free.
+
+    Args:
+        path (str or None): JSON file. If None, uses router.json in the user configuration directory.
+
+    Returns:
+        tuple: (routes, models) dictionaries.
+
+    Raises:
+        ValueError: If a model has no positive integer "context", a price is not a
+                    non-negative number, an "id" is not a string or a route has no list of models.
+    """
+    routes = {task: dict(route) for task, route in ROUTES.items()}
+    models = {name: dict(info) for name, info in MODELS.items()}
+    path = path or os.path.join(config_dir(), CONFIG_FILE_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return routes, models
+
+    for task, route in data.get("routes", {}).items():
+        routes.setdefault(task, {"models": [], "max_latency": None, "max_tokens_out": 0}).update(route)
+    for name, info in data.get("models", {}).items():
+        models.setdefault(name, {"price_in": 0.0, "price_out": 0.0}).update(info)
+
+    # Erros do arquivo aparecem aqui, com o nome do modelo, e não como KeyError no roteamento
+    for name, info in models.items():
+        context = info.get("context")
+        if isinstance(context, bool) or not isinstance(context, int) or context <= 0:
+            raise ValueError(f"{path}: model {name!r} needs a positive integer \"context\"")
+        for key in ("price_in", "price_out"):
+            price = info.get(key)
+            if isinstance(price, bool) or not isinstance(price, (int, float)) or price < 0:
+                raise ValueError(f"{path}: model {name!r} needs a non-negative number \"{key}\"")
+        if "id" in info and not (isinstance(info["id"], str) and info["id"]):
+            raise ValueError(f"{path}: model {name!r} has an empty or non-string \"id\"")
+    for task, route in routes.items():
+        if not isinstance(route.get("models"), list):
+            raise ValueError(f"{path}: route {task!r} needs a list of \"models\"")
+    return routes, models
+
+
+class ModelStats:
+    """
+    Observed latency and spend of each model.
+
+    Totals (requests, failures, tokens and spend) cover every session; the last
+    window latencies of each model are kept for the percentiles. Only latencies
+    younger than max_age count for routing, so a model that was slow is tried
+    again after a while.
+
+    Args:
+        cache_file (str or None): JSON file where the statistics are persisted.
+        window (int): Latencies kept per model.
+        max_age (float): Seconds a latency counts for routing.
+    """
+    def __init__(self, cache_file=None, window=DEFAULT_WINDOW, max_age=DEFAULT_LATENCY_AGE):
+        self.cache_file = cache_file
+        self.window = window
+        self.max_age = max_age
+        self._totals = {}
+        self._latencies = {}
+        self._lock = threading.Lock()
+        if cache_file is not None:
+            self.load()
+
+    def _model(self, model):
+        if model not in self._totals:
+            self._totals[model] = {"requests": 0, "failures": 0, "tokens_in": 0, "tokens_out": 0, "spend": 0.0}
+            self._latencies[model] = deque(maxlen=self.window)
+        return self._totals[model]
+
+    def record(self, model, latency, tokens_in=0, tokens_out=0, cost=0.0, ok=True):
+        """
+        Records one request.
+
+        A failed request (timeout, HTTP error) is kept as a latency of at least
+        FAILURE_LATENCY, so a model that fails misses the latency target of its route.
+
+        Args:
+            model (str): Model name.
+            latency (float): Seconds until the answer was complete (or until it failed).
+            tokens_in (int): Prompt tokens.
+            tokens_out (int): Completion tokens.
+            cost (float): Price of the request, in US dollars.
+            ok (bool): False if the request failed.
+        """
+        with self._lock:
+            totals = self._model(model)
+            totals["requests"] += 1
+            totals["tokens_in"] += tokens_in
+            totals["tokens_out"] += tokens_out
+            totals["spend"] += cost
+            if not ok:
+                totals["failures"] += 1
+                latency = max(latency, FAILURE_LATENCY)
+            self._latencies[model].append((time.time(), latency))
+
+    def latencies(self, model, recent=True):
+        """
+        Returns the kept latencies of a model.
+
+        Args:
+            model (str): Model name.
+            recent (bool): If True, only latencies younger than max_age.
+
+        Returns:
+            list of float: Latencies in seconds, oldest first.
+        """
+        limit = time.time() - self.max_age if recent else float("-inf")
+        with self._lock:
+            return [latency for when, latency in self._latencies.get(model, ()) if when >= limit]
+
+    def latency_percentile(self, model, fraction, recent=True):
+        return percentile(self.latencies(model, recent), fraction)
+
+    def summary(self):
+        """
+        Returns the statistics of every model seen.
+
+        Returns:
+            dict: model -> dict with "requests", "failures", "tokens_in", "tokens_out",
+                  "spend" and the latency percentiles "p50", "p90" and "p99" (None without samples).
+        """
+        with self._lock:
+            models = {model: dict(totals) for model, totals in self._totals.items()}
+        for model, totals in models.items():
+            values = self.latencies(model, recent=False)
+            for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+                totals[name] = percentile(values, fraction)
+        return models
+
+    def save(self, cache_file=None):
+        """
+        Writes the statistics to a JSON file.
+
+        Args:
+            cache_file (str or None): Destination file. If None, uses the cache_file given at construction.
+        """
+        cache_file = cache_file or self.cache_file
+        if cache_file is None:
+            raise ValueError("No cache file given")
+
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        # A gravação fica sob a trava: duas threads nunca escrevem o mesmo arquivo temporário
+        with self._lock:
+            data = {
+                "totals": self._totals,
+                "latencies": {model: list(values) for model, values in self._latencies.items()},
+            }
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_file, cache_file)
+
+    def load(self, cache_file=None):
+        """
+        Loads statistics written by save().
+
+        Args:
+            cache_file (str or None): Source file. If None, uses the cache_file given at construction.
+
+        Returns:
+            bool: True if the file was loaded, False otherwise.
+        """
+        cache_file = cache_file or self.cache_file
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        with self._lock:
+            for model, totals in data.get("totals", {}).items():
+                self._model(model).update(totals)
+            for model, values in data.get("latencies", {}).items():
+                self._model(model)
+                self._latencies[model].extend((when, latency) for when, latency in values)
+        return True
+
+
+class ModelRouter:
+    """
+    Picks the model of each request from the task type, the prompt size and the observed latency.
+
+    Each task has a route: models in order of preference, a latency target and the
+    tokens reserved for the answer. The router takes the first model of the route
+    whose context holds the prompt and the answer and whose recent latency percentile
+    meets the target (models without recent samples are tried). If no model meets
+    the target, the fastest one is used. If the prompt fits no model of the route, it
+    falls back to the cheapest model of the table with a context large enough.
+
+    Args:
+        routes (dict or None): Task -> route. If None, uses models.ROUTES.
+        models (dict or None): Model table. If None, uses models.MODELS.
+        stats (ModelStats or None): Observed latencies and spend. If None, kept in memory only.
+        latency_percentile (float): Percentile of the recent latencies compared with the target.
+    """
+    def __init__(self, routes=None, models=None, stats=None, latency_percentile=DEFAULT_PERCENTILE):
+        self.routes = ROUTES if routes is None else routes
+        self.models = MODELS if models is None else models
+        self.stats = ModelStats() if stats is None else stats
+        self.latency_percentile = latency_percentile
+
+    def _fits(self, model, tokens):
+        info = self.models.get(model)
+        return info is not None and info["context"] >= tokens
+
+    def select(self, task=DEFAULT_TASK, tokens_in=0):
+        """
+        Chooses the model of a request.
+
+        Args:
+            task (str): Task type, a key of the routes (e.g. "completion", "analysis", "chat").
+            tokens_in (int): Tokens of the packed prompt (system message, context and question).
+
+        Returns:
+            Route: model, task, reason ("preferred", "latency" or "overflow"),
+                   tokens_in, max_tokens_out and estimated_cost (US dollars).
+
+        Raises:
+            KeyError: If the task has no route.
+            ValueError: If the prompt does not fit any model.
+        """
+        route = self.routes.get(task)
+        if route is None:
+            raise KeyError(f"Unknown task: {task}")
+        tokens_out = route.get("max_tokens_out", 0)
+        needed = tokens_in + tokens_out
+
+        def make_route(model, reason):
+            cost = request_cost(model, tokens_in, tokens_out, self.models)
+            return Route(model, task, reason, tokens_in, tokens_out, cost)
+
+        fitting = [model for model in route["models"] if self._fits(model, needed)]
+        if not fitting:
+            larger = [model for model in self.models if self._fits(model, needed)]
+            if not larger:
+                raise ValueError(f"Prompt of {tokens_in} tokens does not fit any model")
+            larger.sort(key=lambda model: (request_cost(model, tokens_in, tokens_out, self.models),
+                                           -self.models[model]["context"]))
+            return make_route(larger[0], "overflow")
+
+        max_latency = route.get("max_latency")
+        observed = {model: self.stats.latency_percentile(model, self.latency_percentile) for model in fitting}
+        for model in fitting:
+            if max_latency is None or observed[model] is None or observed[model] <= max_latency:
+                return make_route(model, "preferred" if model == fitting[0] else "latency")
+
+        # Nenhum modelo cumpre a meta: usa o mais rápido
+        return make_route(min(fitting, key=lambda model: observed[model]), "latency")
+
+    def record(self, model, latency, tokens_in=0, tokens_out=0, ok=True):
+        """
+        Records the latency and the spend of a request, and saves the statistics if they have a file.
+
+        Args:
+            model (str): Model that answered.
+            latency (float): Seconds until the answer was complete.
+            tokens_in (int): Prompt tokens.
+            tokens_out (int): Completion tokens.
+            ok (bool): False if the request failed.
+        """
+        cost = request_cost(model, tokens_in, tokens_out, self.models) if model in self.models else 0.0
+        self.stats.record(model, latency, tokens_in, tokens_out, cost, ok)
+        if self.stats.cache_file is not None:
+            self.stats.save()
+
+    def model_id(self, model):
+        """
+        Returns the id sent to the API for a model: its "id" in the model table, or its name.
+        """
+        info = self.models.get(model) or {}
+        return info.get("id") or model
+
+    def base_url(self, model, default):
+        """
+        Returns the endpoint of a model: its "base_url" in the model table, or default.
+        """
+        info = self.models.get(model) or {}
+        return info.get("base_url") or default
+
+
+_default_router = None
+_default_lock = threading.Lock()
+
+
+def get_model_router():
+    """
+    Returns the shared ModelRouter, configured by router.json in the user configuration
+    directory and with statistics persisted in the user cache directory.
+
+    Returns:
+        ModelRouter: The shared router.
+    """
+    global _default_router
+    with _default_lock:
+        if _default_router is None:
+            routes, models = load_router_config()
+            stats = ModelStats(cache_file=os.path.join(cache_dir(), STATS_FILE_NAME))
+            _default_router = ModelRouter(routes, models, stats)
+        return _default_router
+
+
+if __name__ == "__main__":
+    router = ModelRouter()
+    for task, tokens_in in (("completion", 800), ("chat", 12000), ("chat", 60000), ("analysis", 400000)):
+        print(router.select(task, tokens_in))
@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+
+# Tabela de preços do IDEAS.md: contexto em tokens e preço em US$ por milhão de tokens.
+# A chave é o nome curto (interface e configuração); "id" é o que vai no campo "model" da API.
+MODELS = {
+    "DeepSeek-V3-0324": {
+        "id": "deepseek-ai/DeepSeek-V3-0324",
+        "context": 163840,
+        "price_in": 0.40,
+        "price_out": 0.89,
+    },
+    "DeepSeek-V3": {
+        "id": "deepseek-ai/DeepSeek-V3",
+        "context": 163840,
+        "price_in": 0.40,
+        "price_out": 0.89,
+    },
+    "Llama-4-Maverick-17B-128E-Instruct-FP8": {
+        "id": "meta-llama/Llama-4-Maverick-17B-128E-Instruct-FP8",
+        "context": 1048576,
+        "price_in": 0.20,
+        "price_out": 0.60,
+    },
+    "Qwen2.5-72B-Instruct": {
+        "id": "Qwen/Qwen2.5-72B-Instruct",
+        "context": 32768,
+        "price_in": 0.13,
+        "price_out": 0.40,
+    },
+    "Qwen2.5-Coder-32B-Instruct": {
+        "id": "Qwen/Qwen2.5-Coder-32B-Instruct",
+        "context": 32768,
+        "price_in": 0.07,
+        "price_out": 0.16,
+    },
+    "phi-4": {
+        "id": "microsoft/phi-4",
+        "context": 16384,
+        "price_in": 0.07,
+        "price_out": 0.14,
+    },
+    "Meta-Llama-3.1-70B-Instruct": {
+        "id": "meta-llama/Meta-Llama-3.1-70B-Instruct",
+        "context": 131072,
+        "price_in": 0.23,
+        "price_out": 0.40,
+    },
+}
+
+DEFAULT_MODEL = "Qwen2.5-Coder-32B-Instruct"
+
+# Rotas por tipo de tarefa (ver IDEAS.md): modelos em ordem de preferência,
+# latência máxima desejada (p90, em segundos) e tokens reservados para a resposta
+ROUTES = {
+    "completion": {
+        "models": ["phi-4", "Qwen2.5-Coder-32B-Instruct"],
+        "max_latency": 2.0,
+        "max_tokens_out": 512,
+    },
+    "analysis": {
+        "models": ["DeepSeek-V3-0324", "Qwen2.5-72B-Instruct", "Meta-Llama-3.1-70B-Instruct"],
+        "max_latency": 60.0,
+        "max_tokens_out": 4096,
+    },
+    "chat": {
+        "models": ["Qwen2.5-Coder-32B-Instruct", "Qwen2.5-72B-Instruct"],
+        "max_latency": 15.0,
+        "max_tokens_out": 2048,
+    },
+}
+
+DEFAULT_TASK = "chat"
+
+
+def get_model_info(name, models=None):
+    """
+    Returns the entry of a model in the model table.
+
+    Args:
+        name (str): Model name.
+        models (dict or None): Model table. If None, uses MODELS.
+
+    Returns:
+        dict or None: The model entry, or None if the model is unknown.
+    """
+    models = MODELS if models is None else models
+    return models.get(name)
+
+
+def model_id(name, models=None):
+    """
+    Returns the id sent to the API as "model" for a model name.
+
+    Args:
+        name (str): Model name, or an API id (returned unchanged).
+        models (dict or None): Model table. If None, uses MODELS.
+
+    Returns:
+        str: The "id" of the model entry, or name if the model is unknown or has no id.
+    """
+    info = get_model_info(name, models) or {}
+    return info.get("id") or name
+
+
+def context_size(name, models=None):
+    """
+    Returns the context window of a model, in tokens.
+
+    Args:
+        name (str): Model name.
+        models (dict or None): Model table. If None, uses MODELS.
+
+    Returns:
+        int: Context size in tokens.
+
+    Raises:
+        KeyError: If the model is not in the table.
+    """
+    info = get_model_info(name, models)
+    if info is None:
+        raise KeyError(f"Unknown model: {name}")
+    return info["context"]
+
+
+def request_cost(name, tokens_in, tokens_out=0, models=None):
+    """
+    Computes the price of a request from the per-million-token prices.
+
+    Args:
+        name (str): Model name.
+        tokens_in (int): Prompt tokens.
+        tokens_out (int): Completion tokens.
+        models (dict or None): Model table. If None, uses MODELS.
+
+    Returns:
+        float: Cost in US dollars.
+    """
+    info = get_model_info(name, models)
+    if info is None:
+        raise KeyError(f"Unknown model: {name}")
+    return (tokens_in * info["price_in"] + tokens_out * info["price_out"]) / 1000000.0
@@ -0,0 +1,771 @@
+#!/usr/bin/python3
+
+import os
+import re
+import stat
+import codecs
+import shutil
+from collections import namedtuple
+
+from smart_coding_assistant.modules.file_loader import get_file_loader
+from smart_coding_assistant.modules.line_diff import DEFAULT_ALGORITHM
+from smart_coding_assistant.modules.line_diff import diff_lines
+from smart_coding_assistant.modules.line_diff import unified_diff
+from smart_coding_assistant.modules.tracing import traced
+
+# Linhas de contexto que podem ser descartadas das pontas de um trecho que não casa (como 'patch -F2')
+DEFAULT_MAX_FUZZ = 2
+
+# Na busca por âncoras, fração mínima das linhas do trecho que precisa estar no lugar
+MIN_ANCHOR_SHARE = 0.7
+
+# Linhas que se repetem mais do que isso no arquivo (chaves, "return", linhas vazias) não são âncoras
+MAX_ANCHOR_REPEATS = 20
+
+# Cabeçalho de um trecho; os modelos às vezes escrevem só "@@ ... @@", sem números
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_GIT_HEADER_RE = re.compile(r'^diff --git ("(?:[^"\\]|\\.)*"|\S+) ("(?:[^"\\]|\\.)*"|\S+)$')
+
+# Blocos de busca e substituição:
+#   caminho/do/arquivo.py
+#   <<<<<<< SEARCH
+#   linhas atuais
+#   =======
+#   linhas novas
+#   >>>>>>> REPLACE
+_SEARCH_RE = re.compile(r"^<{5,9} ?SEARCH\s*$")
+_DIVIDER_RE = re.compile(r"^={5,9}\s*$")
+_REPLACE_RE = re.compile(r"^>{5,9} ?REPLACE\s*$")
+_FILE_LABEL_RE = re.compile(r"^(?:file|arquivo)\s*:\s*", re.IGNORECASE)
+
+# lines: pares (tipo, texto) com tipo " " (contexto), "-" (removida) ou "+" (adicionada);
+# hint: índice (a partir de 0) onde o trecho começava no arquivo original, se conhecido;
+# no_newline: o arquivo novo termina sem quebra de linha
+Chunk = namedtuple("Chunk", ["lines", "hint", "no_newline"])
+
+# status: "M" (modificado), "A" (novo), "D" (removido) ou "R" (renomeado)
+FilePatch = namedtuple("FilePatch", ["path", "old_path", "status", "chunks"])
+
+# key: (inode, tamanho, mtime_ns) do arquivo lido, conferido antes de gravar;
+# data: bytes gravados (None para arquivos removidos); matches: como cada trecho casou
+FileChange = namedtuple("FileChange", ["path", "old_path", "status", "old_text", "new_text", "data", "key", "mode",
+                                       "matches"])
+
+
+class PatchError(Exception):
+    """
+    A patch could not be parsed, planned or applied. failures lists every problem found.
+    """
+    def __init__(self, message, failures=None):
+        super().__init__(message)
+        self.failures = failures or []
+
+
+def _clean_path(path, prefix):
+    # Tira o TAB (e a data, em diffs fora do git), as aspas e o prefixo a/ ou b/
+    path = path.split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None
+    if len(path) >= 2 and path[0] == path[-1] == '"':
+        path = os.fsdecode(codecs.escape_decode(path[1:-1].encode("utf-8", errors="surrogateescape"))[0])
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+
+def _is_file_header(lines, i):
+    return lines[i].startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ ")
+
+
+def _parse_hunks(lines, i):
+    """
+    Reads the hunks that follow a ---/+++ header.
+
+    With line counts in the @@ header, exactly that many lines are read; without them
+    (or when a model got them wrong and they run out early) the hunk ends at the first
+    line that cannot belong to it. Empty lines count as empty context lines, since
+    models often drop their leading space.
+
+    Returns:
+        tuple: (index of the next line, list of Chunk).
+    """
+    chunks = []
+    while i < len(lines) and lines[i].startswith("@@"):
+        match = _HUNK_RE.match(lines[i])
+        hint = None
+        old_left = new_left = None
+        if match:
+            old_start, old_count, _, new_count = match.groups()
+            old_left = 1 if old_count is None else int(old_count)
+            new_left = 1 if new_count is None else int(new_count)
+            # Sem linhas antigas, o número é o da linha depois da qual o texto entra
+            hint = int(old_start) if old_left == 0 else int(old_start) - 1
+        i += 1
+
+        body = []
+        no_newline = False
+        while i < len(lines):
+            line = lines[i]
+            if line.startswith("\\"):
+                no_newline = no_newline or (bool(body) and body[-1][0] != "-")
+                i += 1
+                continue
+            if line.startswith("@@") or line.startswith("diff --git ") or line.startswith("```"):
+                break
+            counted = old_left is not None and (old_left > 0 or new_left > 0)
+            if not counted and (old_left is not None or _is_file_header(lines, i)):
+                break
+            kind = line[:1] or " "
+            if kind not in (" ", "-", "+"):
+                break
+            body.append((kind, line[1:]))
+            if old_left is not None:
+                old_left -= kind != "+"
+                new_left -= kind != "-"
+            i += 1
+
+        if match is None:
+            # Linhas vazias no fim de um trecho sem contagens costumam ser só separação
+            while body and body[-1] == (" ", ""):
+                body.pop()
+        if body:
+            chunks.append(Chunk(body, hint, no_newline))
+    return i, chunks
+
+
+def _block_path(lines, i, last_path):
+    """
+    Finds the file name written just before a SEARCH marker (skipping the code fence).
+    A block right after another one without a name of its own is for the same file.
+    """
+    for j in range(i - 1, max(-1, i - 4), -1):
+        candidate = lines[j].strip()
+        if not candidate or candidate.startswith("```"):
+            continue
+        if _REPLACE_RE.match(candidate):
+            return last_path
+        candidate = _FILE_LABEL_RE.sub("", candidate.strip("`*#: ")).strip("`*#: ")
+        return candidate or last_path
+    return last_path
+
+
+def _block_chunk(search, replace):
+    """
+    Turns a SEARCH/REPLACE pair into a chunk, with the unchanged lines as context,
+    so fuzzy matches keep the file's own version of those lines.
+    """
+    body = []
+    for tag, i1, i2, j1, j2 in diff_lines(search, replace):
+        if tag == "equal":
+            body.extend((" ", line) for line in search[i1:i2])
+            continue
+        body.extend(("-", line) for line in search[i1:i2])
+        body.extend(("+", line) for line in replace[j1:j2])
+    return Chunk(body, None, False)
+
+
+@traced("patch_engine.parse_patch")
+def parse_patch(text):
+    """
+    Finds the edits proposed in a model answer: unified diffs (with or without the
+    'diff --git' lines, inside code fences or not) and SEARCH/REPLACE blocks.
+
+    Args:
+        text (str): The answer.
+
+    Returns:
+        list of FilePatch: The edits, in the order of the answer.
+
+    Raises:
+        PatchError: If a SEARCH/REPLACE block is not closed or has no file name.
+    """
+    lines = text.replace("\r\n", "\n").split("\n")
+    patches = []
+    pending = None
+    last_block_path = None
+
+    def flush_pending():
+        # Renomeações puras e arquivos vazios não têm linhas ---/+++
+        if pending is not None and pending["status"] != "M" and pending["path"]:
+            path = pending["old_path"] if pending["status"] == "D" else pending["path"]
+            old_path = pending["old_path"] if pending["status"] == "R" else None
+            patches.append(FilePatch(path, old_path, pending["status"], []))
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("diff --git "):
+            flush_pending()
+            pending = {"status": "M", "old_path": None, "path": None}
+            match = _GIT_HEADER_RE.match(line)
+            if match:
+                pending["old_path"] = _clean_path(match.group(1), "a/")
+                pending["path"] = _clean_path(match.group(2), "b/")
+            i += 1
+            continue
+
+        if pending is not None:
+            if line.startswith("new file mode"):
+                pending["status"] = "A"
+            elif line.startswith("deleted file mode"):
+                pending["status"] = "D"
+            elif line.startswith("rename from "):
+                pending["status"] = "R"
+                pending["old_path"] = _clean_path(line[len("rename from "):], "")
+            elif line.startswith("rename to "):
+                pending["path"] = _clean_path(line[len("rename to "):], "")
+
+        if _is_file_header(lines, i):
+            old_path = _clean_path(line[4:], "a/")
+            path = _clean_path(lines[i + 1][4:], "b/")
+            i, chunks = _parse_hunks(lines, i + 2)
+            if old_path is None:
+                patches.append(FilePatch(path, None, "A", chunks))
+            elif path is None:
+                patches.append(FilePatch(old_path, None, "D", chunks))
+            elif old_path != path:
+                patches.append(FilePatch(path, old_path, "R", chunks))
+            else:
+                patches.append(FilePatch(path, None, "M", chunks))
+            pending = None
+            last_block_path = None
+            continue
+
+        if _SEARCH_RE.match(line):
+            path = _block_path(lines, i, last_block_path)
+            if not path:
+                raise PatchError(f"SEARCH/REPLACE block without a file name at line {i + 1}")
+            search, replace = [], []
+            target = search
+            j = i + 1
+            while j < len(lines) and not _REPLACE_RE.match(lines[j]):
+                if target is search and _DIVIDER_RE.match(lines[j]):
+                    target = replace
+                else:
+                    target.append(lines[j])
+                j += 1
+            if j == len(lines) or target is search:
+                raise PatchError(f"Unterminated SEARCH/REPLACE block at line {i + 1}")
+            chunk = _block_chunk(search, replace)
+            if patches and patches[-1].path == path and patches[-1].status == "M" and last_block_path == path:
+                patches[-1].chunks.append(chunk)
+            else:
+                patches.append(FilePatch(path, None, "M", [chunk]))
+            last_block_path = path
+            i = j + 1
+            continue
+        i += 1
+    flush_pending()
+    return patches
+
+
+def _side(body, kinds):
+    return [text for kind, text in body if kind in kinds]
+
+
+def _indent(line):
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _occurrences(view, block):
+    # list.index() percorre em C; só as posições com a primeira linha igual são comparadas
+    positions = []
+    p = -1
+    first = block[0]
+    while True:
+        try:
+            p = view.index(first, p + 1)
+        except ValueError:
+            return positions
+        if view[p:p + len(block)] == block:
+            positions.append(p)
+
+
+def _choose(positions, expected, start):
+    # O mais perto de onde o trecho deveria estar; sem número de linha, o primeiro depois do anterior
+    if expected is not None:
+        return min(positions, key=lambda p: (abs(p - expected), p))
+    after = [p for p in positions if p >= start]
+    return after[0] if after else positions[0]
+
+
+class _FileMatcher:
+    """
+    Finds where the chunks of a patch go in the lines of one file, with caches of the
+    whitespace-normalised views that are rebuilt after each change.
+    """
+    def __init__(self, lines):
+        self.lines = lines
+        self._views = {}
+        self._anchors = None
+
+    def replace(self, pos, length, new):
+        self.lines[pos:pos + length] = new
+        self._views.clear()
+        self._anchors = None
+
+    def view(self, name):
+        if name == "exact":
+            return self.lines
+        view = self._views.get(name)
+        if view is None:
+            strip = str.rstrip if name == "whitespace" else str.strip
+            view = self._views[name] = [strip(line) for line in self.lines]
+        return view
+
+    def anchors(self):
+        if self._anchors is None:
+            self._anchors = {}
+            for p, line in enumerate(self.view("indent")):
+                if line:
+                    self._anchors.setdefault(line, []).append(p)
+        return self._anchors
+
+    def find(self, body, expected, start, max_fuzz):
+        """
+        Returns:
+            tuple or None: (position, body actually used, kind of match).
+        """
+        lead = 0
+        while lead < len(body) and body[lead][0] == " ":
+            lead += 1
+        trail = 0
+        while trail < len(body) - lead and body[-1 - trail][0] == " ":
+            trail += 1
+
+        previous = None
+        for fuzz in range(max_fuzz + 1):
+            cut_lead, cut_trail = min(fuzz, lead), min(fuzz, trail)
+            if (cut_lead, cut_trail) == previous:
+                # Não há mais contexto para descartar
+                break
+            previous = cut_lead, cut_trail
+            trimmed = body[cut_lead:len(body) - cut_trail]
+            old = _side(trimmed, " -")
+            if not old:
+                break
+            shifted = expected + cut_lead if expected is not None else None
+            for name, strip in (("exact", None), ("whitespace", str.rstrip), ("indent", str.strip)):
+                block = old if strip is None else [strip(line) for line in old]
+                positions = _occurrences(self.view(name), block)
+                if positions:
+                    kind = name if not fuzz else f"{name}, fuzz {fuzz}"
+                    return _choose(positions, shifted, start), trimmed, kind
+
+        return self._find_by_anchors(body, expected)
+
+    def _find_by_anchors(self, body, expected):
+        """
+        Last resort: places the chunk where most of its distinctive lines agree on the
+        same offset, tolerating a few lines the model reworded.
+        """
+        old = [line.strip() for line in _side(body, " -")]
+        distinct = [(k, line) for k, line in enumerate(old) if line]
+        if len(distinct) < 3:
+            return None
+        anchors = self.anchors()
+        votes = {}
+        for k, line in distinct:
+            positions = anchors.get(line, ())
+            if len(positions) <= MAX_ANCHOR_REPEATS:
+                for p in positions:
+                    if 0 <= p - k <= len(self.lines) - len(old):
+                        votes[p - k] = votes.get(p - k, 0) + 1
+        if not votes:
+            return None
+        best = max(votes.values())
+        if best < MIN_ANCHOR_SHARE * len(distinct):
+            return None
+        positions = sorted(p for p, count in votes.items() if count == best)
+        return _choose(positions, expected, 0), body, "anchors"
+
+
+def _apply_chunks(rel_path, lines, chunks, max_fuzz, failures):
+    """
+    Applies the chunks of one file in order, on lines (changed in place).
+
+    Returns:
+        list of str: How each chunk matched ("exact", "whitespace", "indent", "..., fuzz N", "anchors").
+    """
+    matcher = _FileMatcher(lines)
+    matches = []
+    drift = 0
+    start = 0
+    for number, chunk in enumerate(chunks, 1):
+        expected = chunk.hint + drift if chunk.hint is not None else None
+        if not _side(chunk.lines, " -"):
+            # Só linhas novas: entram na linha indicada, ou no fim do arquivo
+            pos = len(lines) if expected is None else max(0, min(expected, len(lines)))
+            new = _side(chunk.lines, "+")
+            matcher.replace(pos, 0, new)
+            matches.append("insert")
+            start = pos + len(new)
+            continue
+
+        found = matcher.find(chunk.lines, expected, start, max_fuzz)
+        if found is None:
+            failures.append(f"{rel_path}: hunk {number} does not match the file")
+            continue
+        pos, body, kind = found
+
+        # Com a indentação ignorada, as linhas novas seguem a indentação real do arquivo
+        reindent = None
+        if kind.startswith("indent"):
+            for k, line in enumerate(_side(body, " -")):
+                if line.strip() and _indent(line) != _indent(lines[pos + k]):
+                    reindent = (_indent(line), _indent(lines[pos + k]))
+                    break
+
+        new = []
+        k = pos
+        for line_kind, text in body:
+            if line_kind == " ":
+                new.append(lines[k])
+                k += 1
+            elif line_kind == "-":
+                k += 1
+            elif reindent is not None and text.startswith(reindent[0]):
+                new.append(reindent[1] + text[len(reindent[0]):])
+            else:
+                new.append(text)
+        length = k - pos
+        if chunk.hint is not None:
+            trimmed = len(chunk.lines) - len(body)
+            drift = (pos - trimmed) - chunk.hint + len(new) - length
+        matcher.replace(pos, length, new)
+        matches.append(kind)
+        start = pos + len(new)
+    return matches
+
+
+def _resolve(root, rel_path):
+    """
+    Returns the absolute path of a patch path, refusing paths outside the project or inside .git.
+    """
+    if not rel_path or "\0" in rel_path or os.path.isabs(rel_path):
+        raise PatchError(f"Invalid path in patch: {rel_path!r}")
+    path = os.path.normpath(os.path.join(root, rel_path))
+    real_root = os.path.realpath(root)
+    if os.path.commonpath([real_root, os.path.realpath(path)]) != real_root:
+        raise PatchError(f"Path outside the project: {rel_path}")
+    if os.path.relpath(path, root).split(os.sep)[0] == ".git":
+        raise PatchError(f"Refusing to patch inside .git: {rel_path}")
+    return path
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns), st.st_mode
+
+
+def _load_lines(path, rel_path):
+    """
+    Reads a file to be patched.
+
+    Returns:
+        dict: "text" (with \\n line breaks), "lines", "newline", "eol" (ends with a line
+              break), "encoding", "key" and "mode".
+    """
+    key, mode = _stat_key(path)
+    loaded = get_file_loader().load(path)
+    if loaded is None:
+        raise PatchError(f"{rel_path}: cannot be read")
+    if loaded.binary:
+        raise PatchError(f"{rel_path}: binary file")
+    if loaded.truncated:
+        raise PatchError(f"{rel_path}: file too large to patch")
+    if loaded.lossy:
+        # Decodificado com substituições: gravar de volta corromperia até as linhas fora dos trechos
+        raise PatchError(f"{rel_path}: not valid {loaded.encoding} (writing it back would replace bytes)")
+
+    text = loaded.text
+    newline = "\r\n" if "\r\n" in text else "\n"
+    if newline != "\n":
+        text = text.replace("\r\n", "\n")
+    lines = text.split("\n") if text else []
+    eol = text.endswith("\n")
+    if eol:
+        lines.pop()
+    return {"text": text, "lines": lines, "newline": newline, "eol": eol, "encoding": loaded.encoding,
+            "key": key, "mode": mode}
+
+
+@traced("patch_engine.plan_patches")
+def plan_patches(project_dir, patches, max_fuzz=DEFAULT_MAX_FUZZ):
+    """
+    Computes the new content of every file touched by the patches, without writing anything.
+
+    Each chunk is matched against the current file: exactly, then ignoring trailing
+    whitespace, then ignoring indentation (re-indenting the new lines), then dropping
+    up to max_fuzz context lines from its ends, and finally by the offset where most of
+    its distinctive lines agree. Chunks with line numbers prefer the match nearest to
+    them (shifted by the earlier chunks); SEARCH blocks take the first match after the
+    previous one. Several patches of the same file are applied one after the other.
+
+    Args:
+        project_dir (str): Root the patch paths are relative to.
+        patches (list of FilePatch): Result of parse_patch().
+        max_fuzz (int): Context lines that may be ignored at each end of a chunk.
+
+    Returns:
+        list of FileChange: The planned changes, for preview() and apply_plan().
+
+    Raises:
+        PatchError: If any chunk does not match or any file cannot be patched; its
+                    failures attribute lists every problem.
+    """
+    root = os.path.abspath(project_dir)
+    states = {}
+    failures = []
+    for patch in patches:
+        try:
+            target = _resolve(root, patch.path)
+            source_rel = patch.old_path or patch.path
+            source = _resolve(root, source_rel)
+            state = states.get(source_rel)
+            if state is not None and state["status"] == "D":
+                raise PatchError(f"{source_rel}: patched after being deleted")
+
+            if patch.status == "A" or (state is None and not os.path.lexists(source) and all(
+                    not _side(chunk.lines, " -") for chunk in patch.chunks)):
+                # Arquivo novo (também um bloco SEARCH vazio para um arquivo que não existe)
+                if state is not None or os.path.lexists(target):
+                    raise PatchError(f"{patch.path}: already exists")
+                state = {"text": "", "lines": [], "newline": "\n", "eol": True, "encoding": "utf-8",
+                         "key": None, "mode": None, "status": "A", "old_path": None, "matches": []}
+            elif state is None:
+                if not os.path.lexists(source):
+                    raise PatchError(f"{source_rel}: not found")
+                state = _load_lines(source, source_rel)
+                state.update(status=patch.status, old_path=patch.old_path, matches=[])
+
+            if patch.status == "D":
+                state["status"] = "D"
+            else:
+                if patch.status == "R" and patch.path != source_rel:
+                    if patch.path in states or os.path.lexists(target):
+                        raise PatchError(f"{patch.path}: already exists")
+                    states.pop(source_rel, None)
+                    if state["status"] != "A":
+                        state["status"] = "R"
+                        state["old_path"] = state["old_path"] or source_rel
+                state["matches"] += _apply_chunks(patch.path, state["lines"], patch.chunks, max_fuzz, failures)
+                if patch.chunks and patch.chunks[-1].no_newline:
+                    state["eol"] = False
+            states[patch.path] = state
+        except PatchError as e:
+            failures.append(str(e))
+
+    if failures:
+        raise PatchError(f"Patch does not apply ({len(failures)} problems); nothing was changed", failures)
+
+    changes = []
+    for rel_path, state in states.items():
+        lines = state["lines"]
+        new_text = "\n".join(lines) + ("\n" if state["eol"] and lines else "")
+        if state["status"] == "D":
+            changes.append(FileChange(rel_path, None, "D", state["text"], "", None, state["key"], state["mode"],
+                                      state["matches"]))
+            continue
+        if state["status"] == "M" and new_text == state["text"]:
+            continue
+        try:
+            data = new_text.replace("\n", state["newline"]).encode(state["encoding"])
+        except UnicodeEncodeError:
+            failures.append(f"{rel_path}: the new text cannot be written in {state['encoding']}")
+            continue
+        changes.append(FileChange(rel_path, state["old_path"], state["status"], state["text"], new_text, data,
+                                  state["key"], state["mode"], state["matches"]))
+    if failures:
+        raise PatchError(f"Patch does not apply ({len(failures)} problems); nothing was changed", failures)
+    return changes
+
+
+def preview(changes, context=3, algorithm=DEFAULT_ALGORITHM):
+    """
+    Formats planned changes as a unified diff, to be shown before applying them.
+
+    Args:
+        changes (list of FileChange): Result of plan_patches().
+        context (int): Unchanged lines shown around each change.
+        algorithm (str): See line_diff.diff_lines().
+
+    Returns:
+        str: The diff of every file.
+    """
+    out = []
+    for change in changes:
+        old_name = "/dev/null" if change.status == "A" else "a/" + (change.old_path or change.path)
+        new_name = "/dev/null" if change.status == "D" else "b/" + change.path
+        text = unified_diff(change.old_text.splitlines(), change.new_text.splitlines(), old_name, new_name,
+                            context=context, algorithm=algorithm)
+        if not text:
+            # Renomeação sem mudança de conteúdo
+            text = f"--- {old_name}\n+++ {new_name}\n"
+        out.append(text)
+    return "".join(out)
+
+
+def _backup(path, suffix):
+    backup = path + suffix
+    try:
+        # Um hard link basta: o arquivo novo entra com outro inode
+        os.link(path, backup)
+    except OSError:
+        shutil.copy2(path, backup)
+    return backup
+
+
+@traced("patch_engine.apply_plan")
+def apply_plan(project_dir, changes):
+    """
+    Writes planned changes all together, or not at all.
+
+    Every new content is first written to a temporary file next to its target, and
+    every file is checked to be unchanged since the plan. Only then are the files
+    swapped in with os.replace(), keeping a backup of each original; if anything
+    fails, the swapped files are restored and the temporary files removed.
+
+    Args:
+        project_dir (str): Root the paths of the changes are relative to.
+        changes (list of FileChange): Result of plan_patches().
+
+    Returns:
+        list of str: Paths written, created or deleted.
+
+    Raises:
+        PatchError: If a file changed since the plan or a new file already exists.
+        OSError: If writing fails (the tree is left as it was).
+    """
+    root = os.path.abspath(project_dir)
+    suffix = f".{os.getpid()}.patch"
+    temps = {}
+    created_dirs = []
+    undo = []
+    try:
+        for change in changes:
+            target = _resolve(root, change.path)
+            source_rel = change.old_path or change.path
+            if change.key is not None:
+                try:
+                    key = _stat_key(_resolve(root, source_rel))[0]
+                except OSError:
+                    key = None
+                if key != change.key:
+                    raise PatchError(f"{source_rel}: changed since the patch was planned")
+            if change.status in ("A", "R") and os.path.lexists(target):
+                raise PatchError(f"{change.path}: already exists")
+            if change.data is None:
+                continue
+
+            parent = os.path.dirname(target)
+            missing = []
+            while not os.path.isdir(parent):
+                missing.append(parent)
+                parent = os.path.dirname(parent)
+            for directory in reversed(missing):
+                os.mkdir(directory)
+                created_dirs.append(directory)
+            temps[target] = target + suffix + ".tmp"
+            with open(temps[target], "wb") as f:
+                f.write(change.data)
+            if change.mode is not None:
+                os.chmod(temps[target], stat.S_IMODE(change.mode))
+
+        for change in changes:
+            target = _resolve(root, change.path)
+            if change.status == "M":
+                undo.append(("restore", _backup(target, suffix + ".orig"), target))
+                os.replace(temps[target], target)
+                del temps[target]
+            elif change.status == "A":
+                os.replace(temps[target], target)
+                del temps[target]
+                undo.append(("remove", None, target))
+            elif change.status == "D":
+                backup = target + suffix + ".orig"
+                os.replace(target, backup)
+                undo.append(("restore", backup, target))
+            else:
+                source = _resolve(root, change.old_path)
+                backup = source + suffix + ".orig"
+                os.replace(source, backup)
+                undo.append(("restore", backup, source))
+                os.replace(temps[target], target)
+                del temps[target]
+                undo.append(("remove", None, target))
+    except BaseException:
+        for action, backup, target in reversed(undo):
+            try:
+                if action == "restore":
+                    os.replace(backup, target)
+                    if os.path.lexists(backup):
+                        # Cópia por hard link de um arquivo que ainda não tinha sido trocado
+                        os.remove(backup)
+                else:
+                    os.remove(target)
+            except OSError:
+                pass
+        for tmp in temps.values():
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        for directory in reversed(created_dirs):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+        raise
+
+    for _, backup, _ in undo:
+        if backup is not None:
+            try:
+                os.remove(backup)
+            except OSError:
+                pass
+    return [change.path for change in changes]
+
+
+def apply_patch(project_dir, text, max_fuzz=DEFAULT_MAX_FUZZ, dry_run=False):
+    """
+    Parses, plans and applies the edits of a model answer.
+
+    Args:
+        project_dir (str): Root the patch paths are relative to.
+        text (str): The answer, with unified diffs or SEARCH/REPLACE blocks.
+        max_fuzz (int): See plan_patches().
+        dry_run (bool): Only plan the changes.
+
+    Returns:
+        list of FileChange: The changes (applied unless dry_run).
+
+    Raises:
+        PatchError: If the answer has no edits or they do not apply.
+    """
+    patches = parse_patch(text)
+    if not patches:
+        raise PatchError("No unified diff or SEARCH/REPLACE block found")
+    changes = plan_patches(project_dir, patches, max_fuzz=max_fuzz)
+    if not dry_run:
+        apply_plan(project_dir, changes)
+    return changes
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if len(sys.argv) < 3:
+        print(f"usage: {sys.argv[0]} PROJECT_DIR PATCH_FILE [--apply]")
+        sys.exit(1)
+    with open(sys.argv[2], "r", encoding="utf-8") as f:
+        patch_text = f.read()
+    t0 = time.perf_counter()
+    try:
+        planned = apply_patch(sys.argv[1], patch_text, dry_run="--apply" not in sys.argv)
+    except PatchError as e:
+        print(e, *e.failures, sep="\n  ")
+        sys.exit(1)
+    elapsed = time.perf_counter() - t0
+    print(preview(planned), end="")
+    print(f"{len(planned)} files in {elapsed * 1000:.1f} ms",
+          "(applied)" if "--apply" in sys.argv else "(dry run, use --apply to write)")
@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+
+import os
+
+from smart_coding_assistant.about import __package__ as PACKAGE_NAME
+
+
+def cache_dir(*parts):
+    """
+    Returns a directory inside the user cache of the program, creating it if needed.
+
+    Uses $XDG_CACHE_HOME when defined, otherwise ~/.cache.
+
+    Args:
+        *parts (str): Subdirectories below the program cache directory.
+
+    Returns:
+        str: Absolute path of the directory.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, PACKAGE_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def config_dir(*parts):
+    """
+    Returns a directory inside the user configuration of the program, creating it if needed.
+
+    Uses $XDG_CONFIG_HOME when defined, otherwise ~/.config.
+
+    Args:
+        *parts (str): Subdirectories below the program configuration directory.
+
+    Returns:
+        str: Absolute path of the directory.
+    """
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    path = os.path.join(base, PACKAGE_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
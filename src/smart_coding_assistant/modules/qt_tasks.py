@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+
+import time
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# Intervalo mínimo entre dois sinais de progresso (~60 FPS)
+PROGRESS_INTERVAL = 1.0 / 60
+
+DEFAULT_MAX_CONCURRENCY = 2
+
+
+class TaskSignals(QObject):
+    """
+    Signals of a Task. They are emitted from the worker thread and delivered
+    to the receivers in the GUI thread through queued connections.
+    """
+    progress = pyqtSignal(int, int)
+    message = pyqtSignal(str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class Task(QRunnable):
+    """
+    Runs a blocking function (e.g. git_meld.meld_head_vs_current) in a QThreadPool.
+
+    The function receives three extra keyword arguments: func_msg, func_progress and
+    cancel_event, which are bridged to the signals of the task. Progress signals are
+    throttled to PROGRESS_INTERVAL so that a fast loop never floods the event loop.
+
+    Args:
+        func (callable): Function to be executed.
+        *args: Positional arguments of func.
+        **kwargs: Keyword arguments of func.
+    """
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self.cancel_event = threading.Event()
+        self._last_progress = 0.0
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        """
+        Asks the function to stop; it checks cancel_event between steps.
+        """
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def _progress(self, done, total):
+        now = time.monotonic()
+        if done >= total or now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.signals.progress.emit(done, total)
+
+    def run(self):
+        if self.cancel_event.is_set():
+            self.signals.cancelled.emit()
+            return
+        try:
+            result = self.func(
+                *self.args,
+                func_msg=self.signals.message.emit,
+                func_progress=self._progress,
+                cancel_event=self.cancel_event,
+                **self.kwargs
+            )
+        except Exception:
+            self.signals.failed.emit(traceback.format_exc())
+            return
+        if self.cancel_event.is_set():
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskRunner(QObject):
+    """
+    Pool of background tasks with a concurrency limit, for use from the GUI thread.
+
+    Args:
+        max_concurrency (int): Maximum number of tasks running at the same time;
+                               the others wait in the queue of the pool.
+        parent (QObject or None): Qt parent.
+    """
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_concurrency)
+        self._tasks = set()
+
+    def submit(self, func, *args, on_progress=None, on_message=None, on_finished=None,
+               on_failed=None, on_cancelled=None, **kwargs):
+        """
+        Queues func(*args, **kwargs) and connects the given slots to its signals.
+
+        Args:
+            func (callable): Function accepting func_msg, func_progress and cancel_event.
+            on_progress (callable or None): Slot (done, total).
+            on_message (callable or None): Slot (str).
+            on_finished (callable or None): Slot (result).
+            on_failed (callable or None): Slot (traceback text).
+            on_cancelled (callable or None): Slot without arguments.
+
+        Returns:
+            Task: The queued task, which can be cancelled.
+        """
+        task = Task(func, *args, **kwargs)
+        for signal, slot in ((task.signals.progress, on_progress),
+                             (task.signals.message, on_message),
+                             (task.signals.finished, on_finished),
+                             (task.signals.failed, on_failed),
+                             (task.signals.cancelled, on_cancelled)):
+            if slot is not None:
+                signal.connect(slot)
+            if signal is not task.signals.progress and signal is not task.signals.message:
+                signal.connect(lambda *_, task=task: self._tasks.discard(task))
+        self._tasks.add(task)
+        self.pool.start(task)
+        return task
+
+    def running(self):
+        """
+        Returns the number of tasks that are queued or running.
+        """
+        return len(self._tasks)
+
+    def cancel_all(self):
+        """
+        Cancels every queued or running task.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+
+    def shutdown(self, timeout_ms=5000):
+        """
+        Cancels every task and waits for the running ones to stop.
+
+        Args:
+            timeout_ms (int): Maximum time to wait, in milliseconds.
+
+        Returns:
+            bool: True if every task stopped in time.
+        """
+        self.cancel_all()
+        return self.pool.waitForDone(timeout_ms)
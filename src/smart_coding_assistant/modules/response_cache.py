@@ -0,0 +1,247 @@
+#!/usr/bin/python3
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from smart_coding_assistant.modules.paths import cache_dir
+
+CACHE_FILE_NAME = "responses.sqlite3"
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+def make_key(model, system_prompt, context, question):
+    """
+    Returns the cache key of a request: a hash of everything that defines the answer.
+
+    Each field is length-prefixed, so moving text from one field to another
+    (e.g. from the context to the question) changes the key.
+
+    Args:
+        model (str): Model name.
+        system_prompt (str): System message.
+        context (str): Packed project context (see context_packer.pack_context).
+        question (str): User question.
+
+    Returns:
+        str: Hexadecimal digest.
+    """
+    h = hashlib.sha256()
+    for field in (model, system_prompt, context, question):
+        data = (field or "").encode("utf-8", errors="surrogatepass")
+        h.update(b"%d:" % len(data))
+        h.update(data)
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of model answers, in a SQLite file.
+
+    Entries unused for longer than max_age are removed, and the least recently used
+    ones are removed while the stored answers exceed max_bytes. Lookups, hits and the
+    model time saved by the hits (the latency recorded when each answer was fetched)
+    are kept in the same file, so stats() covers every session.
+
+    Args:
+        path (str or None): SQLite file. If None, uses the user cache directory.
+        max_bytes (int): Maximum total size of the stored answers (UTF-8 bytes).
+        max_age (float): Maximum time, in seconds, since an entry was last used.
+    """
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.path = path or os.path.join(cache_dir(), CACHE_FILE_NAME)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _add_stat(self, name, value):
+        self._db.execute(
+            "INSERT INTO stats(name, value) VALUES(?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, value)
+        )
+
+    def get(self, key):
+        """
+        Returns the stored answer of a key and marks it as recently used.
+
+        Args:
+            key (str): Key from make_key().
+
+        Returns:
+            str or None: The answer, or None if it is not stored or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, latency, last_used FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._add_stat("lookups", 1)
+            if row is None:
+                return None
+            response, latency, last_used = row
+            if now - last_used > self.max_age:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._add_stat("hits", 1)
+            self._add_stat("time_saved", latency)
+        return response
+
+    def put(self, key, model, response, latency=0.0):
+        """
+        Stores an answer, then evicts entries if the cache is over its limits.
+
+        Args:
+            key (str): Key from make_key().
+            model (str): Model name, kept for statistics.
+            response (str): The answer.
+            latency (float): Seconds the model took to answer; a hit saves this time.
+        """
+        now = time.time()
+        size = len(response.encode("utf-8", errors="surrogatepass"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses(key, model, response, size, latency, created, last_used, hits) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, model, response, size, latency, now, now)
+            )
+        self.evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def evict(self):
+        """
+        Removes expired entries, then the least recently used ones until the cache fits in max_bytes.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        removed = 0
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM responses WHERE last_used < ?", (time.time() - self.max_age,))
+            removed += cursor.rowcount
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                victims = []
+                for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((key,))
+                    total -= size
+                self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+                removed += len(victims)
+        return removed
+
+    def clear(self):
+        """
+        Removes every entry and resets the statistics.
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.execute("DELETE FROM stats")
+            self._db.execute("VACUUM")
+
+    def stats(self):
+        """
+        Returns cache statistics.
+
+        Returns:
+            dict: Keys "entries", "bytes", "lookups", "hits", "hit_rate" and
+                  "time_saved" (seconds of model latency avoided by hits).
+        """
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            values = dict(self._db.execute("SELECT name, value FROM stats"))
+        lookups = int(values.get("lookups", 0))
+        hits = int(values.get("hits", 0))
+        return {
+            "entries": entries,
+            "bytes": size,
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "time_saved": values.get("time_saved", 0.0),
+        }
+
+
+def cached_call(cache, call, model, system_prompt, context, question, refresh=False, bypass=False):
+    """
+    Returns the answer of a model call through the cache.
+
+    Args:
+        cache (ResponseCache): The cache.
+        call (callable): Function (model, system_prompt, context, question) -> str that asks the model.
+        model (str): Model name.
+        system_prompt (str): System message.
+        context (str): Packed project context.
+        question (str): User question.
+        refresh (bool): Ask the model even if the answer is stored, and store the new answer.
+        bypass (bool): Ask the model without reading or writing the cache.
+
+    Returns:
+        tuple: (answer, True if it came from the cache).
+    """
+    if bypass:
+        return call(model, system_prompt, context, question), False
+
+    key = make_key(model, system_prompt, context, question)
+    if not refresh:
+        response = cache.get(key)
+        if response is not None:
+            return response, True
+
+    t0 = time.perf_counter()
+    response = call(model, system_prompt, context, question)
+    cache.put(key, model, response, time.perf_counter() - t0)
+    return response, False
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Returns the shared ResponseCache in the user cache directory.
+
+    Returns:
+        ResponseCache: The shared cache.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
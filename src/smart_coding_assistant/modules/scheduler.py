@@ -0,0 +1,419 @@
+#!/usr/bin/python3
+
+import json
+import time
+import queue
+import random
+import itertools
+import threading
+import http.client
+import urllib.parse
+from collections import namedtuple
+
+from smart_coding_assistant.modules.llm_client import DEFAULT_BASE_URL
+from smart_coding_assistant.modules.llm_client import DEFAULT_SYSTEM_MESSAGE
+from smart_coding_assistant.modules.llm_client import DEFAULT_TIMEOUT
+from smart_coding_assistant.modules.llm_client import build_user_message
+from smart_coding_assistant.modules.llm_client import chat_payload
+from smart_coding_assistant.modules.models import DEFAULT_TASK
+from smart_coding_assistant.modules.models import model_id
+from smart_coding_assistant.modules.response_cache import make_key
+from smart_coding_assistant.modules.tracing import increment
+from smart_coding_assistant.modules.tracing import span
+
+DEFAULT_MAX_WORKERS = 8
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+
+# Respostas HTTP que valem uma nova tentativa
+RETRY_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+Job = namedtuple(
+    "Job",
+    ["question", "context", "model", "task", "system_msg", "priority", "tag"],
+    defaults=("", None, DEFAULT_TASK, DEFAULT_SYSTEM_MESSAGE, 0, None)
+)
+Job.__doc__ = """
+One model call of a multi-file job. Jobs with a lower priority run first; jobs
+with the same priority run in submission order. Without a model, the model
+router chooses one from the task. tag is free for the caller (e.g. a file path).
+"""
+
+JobResult = namedtuple("JobResult", ["job", "answer", "error", "model", "latency", "attempts", "cached"])
+
+
+class RequestError(Exception):
+    """
+    Failed HTTP request. status is None for connection errors.
+    """
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retriable(self):
+        return self.status is None or self.status in RETRY_STATUSES
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP connections to one endpoint, shared by threads.
+
+    Connections are reused most recently used first. A reused connection closed by
+    the server is replaced once by a new one.
+
+    Args:
+        base_url (str): Base URL of the endpoint (scheme, host, port and path prefix).
+        max_connections (int): Maximum number of open connections; further requests wait.
+        timeout (float): Socket timeout, in seconds.
+    """
+    def __init__(self, base_url, max_connections=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT):
+        parts = urllib.parse.urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.created = 0
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self):
+        with self._lock:
+            self.created += 1
+        increment("http.connections")
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """
+        Sends a request and reads the whole answer.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path below the prefix of the base URL.
+            body (bytes or None): Request body.
+            headers (dict or None): Request headers.
+
+        Returns:
+            tuple: (status, headers dict with lower-case names, body bytes).
+
+        Raises:
+            RequestError: If the connection fails.
+        """
+        with self._slots:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            reused = conn is not None
+            if conn is None:
+                conn = self._connect()
+            while True:
+                try:
+                    conn.request(method, self.prefix + path, body=body, headers=headers or {})
+                    response = conn.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    conn.close()
+                    if not reused:
+                        raise RequestError(f"{type(e).__name__}: {e}") from e
+                    # O servidor fechou a conexão ociosa: tenta uma vez com uma nova
+                    conn = self._connect()
+                    reused = False
+
+            if response.will_close:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+        return response.status, {name.lower(): value for name, value in response.getheaders()}, data
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class TokenBucket:
+    """
+    Rate limiter: rate requests per second on average, with bursts of up to burst requests.
+
+    Args:
+        rate (float): Requests per second.
+        burst (int or None): Bucket capacity. If None, one second of requests (at least 1).
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cancel_event=None):
+        """
+        Waits for a token.
+
+        Args:
+            cancel_event (threading.Event or None): Stops waiting when set.
+
+        Returns:
+            bool: True if a token was taken, False if cancelled.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if cancel_event is None:
+                time.sleep(wait)
+            elif cancel_event.wait(wait):
+                return False
+
+
+class RequestScheduler:
+    """
+    Runs many independent model calls concurrently and returns the results as they finish.
+
+    Worker threads take jobs from a priority queue and send them over keep-alive
+    connection pools, one per endpoint. Requests to the same provider (host of the
+    endpoint) pass through its rate limiter. Connection errors, 429 and 5xx answers
+    are retried with exponential backoff and jitter, honouring Retry-After.
+
+    Args:
+        base_url (str): Endpoint of models without a "base_url" in the router table.
+        api_key (str or None): API key. If None, uses $DEEPINFRA_API_KEY.
+        max_workers (int): Concurrent requests.
+        rate_limits (dict or None): Provider host -> (requests per second, burst).
+        retries (int): Maximum extra attempts per job.
+        backoff (float): First retry delay, in seconds; doubled at each attempt.
+        max_backoff (float): Maximum retry delay, in seconds.
+        cache (response_cache.ResponseCache or None): If given, stored answers are reused and new ones stored.
+        router (model_router.ModelRouter or None): Router of jobs without a model. If None, uses the shared router.
+        timeout (float): Socket timeout, in seconds.
+    """
+    def __init__(self, base_url=DEFAULT_BASE_URL, api_key=None, max_workers=DEFAULT_MAX_WORKERS,
+                 rate_limits=None, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF, cache=None, router=None, timeout=DEFAULT_TIMEOUT):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
+        self.router = router
+        self.timeout = timeout
+        self.cancel_event = threading.Event()
+        self._buckets = {host: TokenBucket(rate, burst) for host, (rate, burst) in (rate_limits or {}).items()}
+        self._pools = {}
+        self._jobs = queue.PriorityQueue()
+        self._results = queue.Queue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._workers = []
+
+    def _start_workers(self):
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, job):
+        """
+        Queues a job.
+
+        Args:
+            job (Job): The job.
+        """
+        with self._lock:
+            self._pending += 1
+            self._start_workers()
+        self._jobs.put((job.priority, next(self._seq), job))
+
+    def pending(self):
+        """
+        Returns the number of submitted jobs whose result was not yet taken by as_completed().
+        """
+        with self._lock:
+            return self._pending
+
+    def as_completed(self, timeout=None):
+        """
+        Yields the results of the submitted jobs in the order they finish.
+
+        Args:
+            timeout (float or None): Maximum wait for each result, in seconds.
+
+        Yields:
+            JobResult: job, answer (None on error), error (exception or None), model,
+                       latency (seconds, including retries), attempts and cached.
+
+        Raises:
+            queue.Empty: If a result takes longer than timeout.
+        """
+        while self.pending():
+            result = self._results.get(timeout=timeout)
+            with self._lock:
+                self._pending -= 1
+            yield result
+
+    def map(self, jobs, timeout=None):
+        """
+        Submits every job and yields their results as they finish.
+        """
+        for job in jobs:
+            self.submit(job)
+        yield from self.as_completed(timeout)
+
+    def cancel(self):
+        """
+        Cancels the queued jobs and stops the retries; running requests finish.
+        Cancelled jobs are returned with a JobCancelled error.
+        """
+        self.cancel_event.set()
+
+    def close(self):
+        """
+        Cancels the remaining jobs, stops the workers and closes the connections.
+        The results of the cancelled jobs can still be taken by as_completed().
+        """
+        self.cancel()
+        # Marcadores de parada depois de todos os trabalhos da fila
+        for _ in self._workers:
+            self._jobs.put((float("inf"), next(self._seq), None))
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        for pool in self._pools.values():
+            pool.close()
+
+    def connections(self):
+        """
+        Returns the number of connections opened so far, over every pool.
+        """
+        return sum(pool.created for pool in self._pools.values())
+
+    def _pool(self, base_url):
+        with self._lock:
+            pool = self._pools.get(base_url)
+            if pool is None:
+                pool = self._pools[base_url] = ConnectionPool(base_url, self.max_workers, self.timeout)
+            return pool
+
+    def _work(self):
+        while True:
+            _, _, job = self._jobs.get()
+            if job is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                answer, model, attempts, cached = self._run(job)
+            except Exception as e:
+                self._results.put(JobResult(job, None, e, job.model, time.perf_counter() - t0, 0, False))
+            else:
+                self._results.put(JobResult(job, answer, None, model, time.perf_counter() - t0, attempts, cached))
+
+    def _run(self, job):
+        if self.cancel_event.is_set():
+            raise JobCancelled("Job cancelled")
+
+        model = job.model
+        router = self.router
+        route = None
+        if model is None:
+            from smart_coding_assistant.modules.model_router import get_model_router
+            from smart_coding_assistant.modules.tokens import get_token_counter
+
+            router = router or get_model_router()
+            counter = get_token_counter()
+            tokens_in = counter.count_prompt({"system": job.system_msg, "context": job.context,
+                                              "question": job.question})["total"]
+            route = router.select(job.task, tokens_in)
+            model = route.model
+        base_url = router.base_url(model, self.base_url) if router is not None else self.base_url
+        # Respostas guardadas e requisições usam o id da API, como ask()
+        api_model = router.model_id(model) if router is not None else model_id(model)
+
+        key = None
+        if self.cache is not None:
+            key = make_key(api_model, job.system_msg, job.context, job.question)
+            answer = self.cache.get(key)
+            if answer is not None:
+                return answer, model, 0, True
+
+        user_msg = build_user_message(job.context, job.question)
+        t0 = time.perf_counter()
+        try:
+            answer, attempts = self._post(base_url, api_model, user_msg, job.system_msg)
+        except Exception:
+            if route is not None:
+                router.record(model, time.perf_counter() - t0, route.tokens_in, ok=False)
+            raise
+        latency = time.perf_counter() - t0
+
+        if route is not None:
+            router.record(model, latency, route.tokens_in, counter.count(answer))
+        if key is not None:
+            self.cache.put(key, api_model, answer, latency)
+        return answer, model, attempts, False
+
+    def _post(self, base_url, model, user_msg, system_msg):
+        pool = self._pool(base_url)
+        bucket = self._buckets.get(urllib.parse.urlsplit(base_url).netloc)
+        body, headers = chat_payload(self.api_key, model, user_msg, system_msg)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if bucket is not None and not bucket.acquire(self.cancel_event):
+                raise JobCancelled("Job cancelled")
+            try:
+                with span("scheduler.request", model=model, attempt=attempt):
+                    status, response_headers, data = pool.request("POST", "/chat/completions", body, headers)
+                increment("llm.bytes_received", len(data))
+                if status != 200:
+                    raise RequestError(f"HTTP {status}: {data[:200].decode('utf-8', 'replace')}", status,
+                                       _retry_after(response_headers.get("retry-after")))
+                return json.loads(data.decode("utf-8"))["choices"][0]["message"]["content"], attempt
+            except RequestError as e:
+                if not e.retriable or attempt > self.retries:
+                    raise
+                increment("scheduler.retries")
+                delay = e.retry_after
+                if delay is None:
+                    # Espera exponencial com variação aleatória, para as threads não voltarem juntas
+                    delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+                if self.cancel_event.wait(delay):
+                    raise JobCancelled("Job cancelled")
+
+
+if __name__ == "__main__":
+    import sys
+
+    scheduler = RequestScheduler(max_workers=4)
+    jobs = [Job(f"Summarize the file {path}.", model="phi-4", tag=path) for path in sys.argv[1:]]
+    for result in scheduler.map(jobs):
+        print(result.job.tag, result.error or result.answer[:80])
+    scheduler.close()
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+
+import os
+import json
+import socket
+
+from smart_coding_assistant.about import __package__ as PACKAGE_NAME
+from smart_coding_assistant.modules.paths import cache_dir
+
+# Ações aceitas pela instância residente
+ACTIONS = ("show", "files", "edit", "settings", "help", "stats", "meld", "quit")
+
+CONNECT_TIMEOUT = 0.5
+
+# Segunda tentativa, quando o socket tem dono vivo mas a interface dele estava ocupada
+HANDOVER_TIMEOUT = 5.0
+
+
+def socket_path():
+    """
+    Returns the path of the local socket of the resident instance, private to the user.
+
+    Uses $XDG_RUNTIME_DIR when defined, otherwise a directory in the user cache
+    whose permissions are restricted to the owner.
+
+    Returns:
+        str: Absolute path of the socket.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir or not os.path.isdir(runtime_dir):
+        runtime_dir = cache_dir("run")
+        os.chmod(runtime_dir, 0o700)
+    return os.path.join(runtime_dir, f"{PACKAGE_NAME}.sock")
+
+
+def make_request(project=None, action="show"):
+    """
+    Builds the request sent to the resident instance.
+
+    Args:
+        project (str or None): Project directory, resolved against the current directory.
+        action (str): One of ACTIONS.
+
+    Returns:
+        dict: Keys "project" (absolute path or None) and "action".
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action: {action}")
+    return {
+        "project": os.path.abspath(project) if project else None,
+        "action": action,
+    }
+
+
+def encode_request(request):
+    return json.dumps(request).encode("utf-8") + b"\n"
+
+
+def decode_request(data):
+    """
+    Parses a request line; returns None if it is not a valid request.
+    """
+    try:
+        request = json.loads(data.decode("utf-8"))
+    except ValueError:
+        return None
+    if not isinstance(request, dict) or request.get("action") not in ACTIONS:
+        return None
+    return request
+
+
+def send_request(request, path=None, timeout=CONNECT_TIMEOUT):
+    """
+    Hands a request over to the resident instance, if there is one.
+
+    Uses a plain Unix socket (no Qt import), so a relaunch costs only the Python start.
+
+    Args:
+        request (dict): Request from make_request().
+        path (str or None): Socket path. If None, uses socket_path().
+        timeout (float): Seconds to wait for the connection and the reply.
+
+    Returns:
+        bool: True if the resident instance accepted the request, False if none is running.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    path = path or socket_path()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(encode_request(request))
+            reply = sock.recv(16)
+    except OSError:
+        return False
+    return reply.startswith(b"ok")
@@ -0,0 +1,294 @@
+#!/usr/bin/python3
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import contextlib
+
+from smart_coding_assistant.modules.paths import cache_dir
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sem trava entre processos; o prazo de OBJECT_GRACE_SECONDS ainda protege objetos novos
+    fcntl = None
+
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Objetos sem manifesto mais novos que isso são de um snapshot ainda sendo escrito
+OBJECT_GRACE_SECONDS = 3600
+
+
+class SnapshotStore:
+    """
+    On-disk store of HEAD snapshots, keyed by repository and commit id.
+
+    Blob contents are kept once in a content-addressed object directory and hardlinked
+    into every snapshot that uses them, so a snapshot of a commit that was already seen
+    is reused as is, and a new commit only costs the blobs that changed. Files are made
+    read-only because the hardlinks share the same inode.
+
+    Several processes may share the store: snapshots are written inside writing(),
+    which holds a shared lock on the store, and evict() takes it exclusively.
+
+    Layout below root:
+        objects/<oid[:2]>/<oid>        blob contents
+        snapshots/<key>/<path>         hardlinks to the objects
+        manifests/<key>.json           {path: oid} of each snapshot, mtime = last use
+        lock                           flock() of writers (shared) and evict() (exclusive)
+
+    Args:
+        root (str or None): Store directory. If None, uses the user cache directory.
+        max_age (float): Snapshots unused for longer than this (seconds) are removed.
+        max_bytes (int): Maximum total size of the objects; least recently used snapshots are removed first.
+    """
+    def __init__(self, root=None, max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or cache_dir("snapshots")
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        for sub in ("objects", "snapshots", "manifests"):
+            os.makedirs(os.path.join(self.root, sub), exist_ok=True)
+
+    @contextlib.contextmanager
+    def _store_lock(self, exclusive):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, "lock"), "a+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def writing(self):
+        """
+        Context manager to hold while a snapshot is written (add_object(), link() and
+        save_manifest()), so that evict() in another process or thread does not collect
+        objects that no manifest references yet. Do not call evict() inside it.
+        """
+        return self._store_lock(exclusive=False)
+
+    @staticmethod
+    def key(repo, commit):
+        """
+        Returns the snapshot key of a commit of a repository.
+
+        Args:
+            repo (str): Root of the repository.
+            commit (str): Commit id.
+
+        Returns:
+            str: Key used for the snapshot directory and its manifest.
+        """
+        repo_hash = hashlib.sha1(os.path.abspath(repo).encode("utf-8", errors="surrogateescape")).hexdigest()
+        return f"{repo_hash[:12]}-{commit}"
+
+    def latest_key(self, repo, exclude=None):
+        """
+        Returns the key of the most recently used snapshot of a repository.
+
+        Args:
+            repo (str): Root of the repository.
+            exclude (str or None): Key to ignore (usually the current one).
+
+        Returns:
+            str or None: The key, or None if the repository has no other snapshot.
+        """
+        prefix = self.key(repo, "")
+        manifests_dir = os.path.join(self.root, "manifests")
+        best = None
+        for name in os.listdir(manifests_dir):
+            if not name.startswith(prefix) or not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            if key == exclude:
+                continue
+            try:
+                last_use = os.stat(os.path.join(manifests_dir, name)).st_mtime
+            except FileNotFoundError:
+                continue
+            if best is None or last_use > best[0]:
+                best = (last_use, key)
+        return best[1] if best is not None else None
+
+    def snapshot_dir(self, key):
+        """
+        Returns the directory of a snapshot (it may not exist yet).
+        """
+        return os.path.join(self.root, "snapshots", key)
+
+    def _manifest_path(self, key):
+        return os.path.join(self.root, "manifests", key + ".json")
+
+    def _object_path(self, oid):
+        return os.path.join(self.root, "objects", oid[:2], oid)
+
+    def load_manifest(self, key):
+        """
+        Returns the {path: oid} manifest of a snapshot, or an empty dict if it does not exist.
+        """
+        try:
+            with open(self._manifest_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, key, manifest):
+        """
+        Writes the manifest of a snapshot, which also marks it as recently used.
+        """
+        path = self._manifest_path(key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def has_object(self, oid):
+        return os.path.exists(self._object_path(oid))
+
+    def add_object(self, oid, content):
+        """
+        Stores a blob, read-only. Writing is atomic, so concurrent writers are harmless.
+        """
+        path = self._object_path(oid)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, path)
+
+    def link(self, key, rel_path, oid):
+        """
+        Places a stored blob in a snapshot, as a hardlink (or a copy across file systems).
+        """
+        destination = os.path.join(self.snapshot_dir(key), rel_path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        if os.path.lexists(destination):
+            os.remove(destination)
+        try:
+            os.link(self._object_path(oid), destination)
+        except OSError:
+            shutil.copy2(self._object_path(oid), destination)
+
+    def total_bytes(self):
+        """
+        Returns the size of every stored object.
+        """
+        total = 0
+        objects_dir = os.path.join(self.root, "objects")
+        for prefix in os.listdir(objects_dir):
+            with os.scandir(os.path.join(objects_dir, prefix)) as it:
+                for entry in it:
+                    total += entry.stat(follow_symlinks=False).st_size
+        return total
+
+    def remove(self, key):
+        """
+        Deletes a snapshot and its manifest. Objects are collected by evict().
+        """
+        try:
+            os.remove(self._manifest_path(key))
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self.snapshot_dir(key), ignore_errors=True)
+
+    def evict(self, keep=()):
+        """
+        Removes snapshots unused for longer than max_age, then the least recently used
+        ones until the objects fit in max_bytes, and finally deletes orphan objects.
+        Waits for the snapshots being written (see writing()).
+
+        Args:
+            keep (iterable of str): Keys that are never removed (e.g. the snapshot in use).
+
+        Returns:
+            list of str: Keys of the removed snapshots.
+        """
+        keep = set(keep)
+        removed = []
+        with self._lock, self._store_lock(exclusive=True):
+            manifests_dir = os.path.join(self.root, "manifests")
+            snapshots = []
+            for name in os.listdir(manifests_dir):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    last_use = os.stat(os.path.join(manifests_dir, name)).st_mtime
+                except FileNotFoundError:
+                    continue
+                snapshots.append((last_use, name[:-len(".json")]))
+            snapshots.sort()
+
+            now = time.time()
+            for last_use, key in list(snapshots):
+                if key not in keep and now - last_use > self.max_age:
+                    self.remove(key)
+                    removed.append(key)
+                    snapshots.remove((last_use, key))
+
+            # Objetos de cada manifesto restante, lidos uma vez só
+            manifests = {key: set(self.load_manifest(key).values()) for _, key in snapshots}
+            total = self._collect_objects(set().union(*manifests.values()))
+            for last_use, key in snapshots:
+                if total <= self.max_bytes:
+                    break
+                if key in keep:
+                    continue
+                self.remove(key)
+                removed.append(key)
+                del manifests[key]
+                total = self._collect_objects(set().union(*manifests.values()))
+        return removed
+
+    def _collect_objects(self, referenced):
+        """
+        Deletes the objects that no manifest references and returns the size of the others.
+
+        Link counts are not used: where link() had to copy, every object has one link.
+        Unreferenced objects (and temporary files) younger than OBJECT_GRACE_SECONDS are
+        kept, in case a writer that does not use writing() is about to link them.
+
+        Args:
+            referenced (set of str): Object ids of the remaining manifests.
+        """
+        total = 0
+        limit = time.time() - OBJECT_GRACE_SECONDS
+        objects_dir = os.path.join(self.root, "objects")
+        for prefix in os.listdir(objects_dir):
+            prefix_dir = os.path.join(objects_dir, prefix)
+            with os.scandir(prefix_dir) as it:
+                for entry in it:
+                    st = entry.stat(follow_symlinks=False)
+                    if entry.name not in referenced and st.st_mtime < limit:
+                        try:
+                            os.remove(entry.path)
+                        except FileNotFoundError:
+                            pass
+                    else:
+                        total += st.st_size
+        return total
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_snapshot_store():
+    """
+    Returns the shared SnapshotStore in the user cache directory.
+
+    Returns:
+        SnapshotStore: The shared store.
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = SnapshotStore()
+        return _default_store
@@ -0,0 +1,546 @@
+#!/usr/bin/python3
+
+import os
+import ast
+import json
+import hashlib
+import threading
+import importlib.util
+import concurrent.futures
+from collections import Counter
+
+from smart_coding_assistant.modules.files import directory_structure
+from smart_coding_assistant.modules.files import iter_tree_files
+from smart_coding_assistant.modules.ignore import DEFAULT_EXCLUDES
+from smart_coding_assistant.modules.paths import cache_dir
+from smart_coding_assistant.modules.tracing import traced
+
+INDEX_VERSION = 2
+
+# Abaixo disso os arquivos são analisados no próprio processo
+PARALLEL_MIN_FILES = 256
+CHUNK_FILES = 128
+
+# Classes aninhadas até esse nível; funções dentro de funções nunca entram
+MAX_DEPTH = 2
+
+# Tamanho máximo de anotações, valores padrão e docstrings no mapa
+MAX_EXPR_CHARS = 24
+MAX_DOC_CHARS = 80
+
+
+def _short(text, limit=MAX_EXPR_CHARS):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _doc_line(node):
+    doc = ast.get_docstring(node, clean=True)
+    if not doc:
+        return ""
+    for line in doc.splitlines():
+        if line.strip():
+            return _short(line.strip(), MAX_DOC_CHARS)
+    return ""
+
+
+def _expr(source, node):
+    # Trecho do próprio código (ast.unparse só existe a partir do Python 3.9)
+    return _short(ast.get_source_segment(source, node) or "...")
+
+
+def _format_arg(source, arg, default=None):
+    text = arg.arg
+    if arg.annotation is not None:
+        text += ": " + _expr(source, arg.annotation)
+    if default is not None:
+        text += ("=" if arg.annotation is None else " = ") + _expr(source, default)
+    return text
+
+
+def _format_args(source, args):
+    positional = args.posonlyargs + args.args
+    defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    parts = []
+    for i, (arg, default) in enumerate(zip(positional, defaults)):
+        parts.append(_format_arg(source, arg, default))
+        if args.posonlyargs and i == len(args.posonlyargs) - 1:
+            parts.append("/")
+    if args.vararg is not None:
+        parts.append("*" + _format_arg(source, args.vararg))
+    elif args.kwonlyargs:
+        parts.append("*")
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        parts.append(_format_arg(source, arg, default))
+    if args.kwarg is not None:
+        parts.append("**" + _format_arg(source, args.kwarg))
+    return ", ".join(parts)
+
+
+def _walk(source, body, prefix, depth, symbols):
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            bases = ", ".join(_expr(source, base) for base in node.bases)
+            signature = f"{node.name}({bases})" if bases else node.name
+            symbols.append(["class", prefix + node.name, signature, _doc_line(node), node.lineno, depth])
+            if depth + 1 < MAX_DEPTH:
+                _walk(source, node.body, prefix + node.name + ".", depth + 1, symbols)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            kind = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+            signature = f"{node.name}({_format_args(source, node.args)})"
+            if node.returns is not None:
+                signature += " -> " + _expr(source, node.returns)
+            symbols.append([kind, prefix + node.name, signature, _doc_line(node), node.lineno, depth])
+        elif depth == 0 and isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target = node.targets[0]
+            if isinstance(target, ast.Name) and target.id.isupper():
+                symbols.append(["const", target.id, target.id, "", node.lineno, depth])
+
+
+def parse_module(source):
+    """
+    Extracts the symbols and the imports of a Python module.
+
+    Args:
+        source (str or bytes): Source code.
+
+    Returns:
+        dict: Keys "doc" (first line of the module docstring), "symbols" (list of
+              [kind, qualified name, signature, first docstring line, line, depth], where
+              kind is "class", "def", "async def" or "const"), "imports" (list of
+              [module, level, names] as written, including deferred imports) and
+              "error" (syntax error message or None).
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        return {"doc": "", "symbols": [], "imports": [], "error": str(e)}
+
+    if isinstance(source, bytes):
+        # Respeita a declaração de codificação, como ast.parse fez
+        source = importlib.util.decode_source(source)
+    symbols = []
+    _walk(source, tree.body, "", 0, symbols)
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend([alias.name, 0, []] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.module or "", node.level, [alias.name for alias in node.names]])
+    return {"doc": _doc_line(tree), "symbols": symbols, "imports": imports, "error": None}
+
+
+def _parse_files(root, items):
+    """
+    Reads, hashes and parses files; runs in worker processes.
+
+    Args:
+        root (str): Root directory.
+        items (list of tuple): (relative path, set of digests already parsed, or None).
+
+    Returns:
+        list of tuple: (rel_path, mtime_ns, size, digest, record). mtime_ns is None for
+                       unreadable files and record is None when the digest was already parsed.
+    """
+    results = []
+    for rel_path, known in items:
+        try:
+            with open(os.path.join(root, rel_path), "rb") as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            results.append((rel_path, None, None, None, None))
+            continue
+        digest = hashlib.sha1(data).hexdigest()
+        record = None if known and digest in known else parse_module(data)
+        results.append((rel_path, st.st_mtime_ns, st.st_size, digest, record))
+    return results
+
+
+def module_name(rel_path):
+    """
+    Returns the dotted module name of a relative path ("pkg/sub/__init__.py" -> "pkg.sub").
+    """
+    parts = rel_path[:-len(".py")].split("/") if rel_path.endswith(".py") else rel_path.split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+class SymbolIndex:
+    """
+    Index of the modules, classes, functions and imports of the Python files of a project.
+
+    Parsed modules are cached by content hash, so a file is parsed again only when its
+    contents change (and renamed or copied files are not parsed at all). Files are only
+    read again when their mtime or size changed. Many changed files are parsed in a
+    process pool.
+
+    Args:
+        root (str): Root directory of the project.
+        cache_file (str or None): JSON file where the index is persisted.
+    """
+    def __init__(self, root, cache_file=None):
+        self.root = os.path.abspath(root)
+        self.cache_file = cache_file
+        # caminho relativo -> (mtime_ns, size, digest)
+        self.files = {}
+        # digest -> registro de parse_module()
+        self.records = {}
+        self.dirty = False
+        self._graph = None
+        self._lock = threading.RLock()
+        if cache_file is not None:
+            self.load()
+
+    def __len__(self):
+        return len(self.files)
+
+    def python_files(self):
+        """
+        Lists the .py files of the project, honouring .gitignore and the default excludes.
+
+        Returns:
+            list of str: Relative paths.
+        """
+        structure = directory_structure(self.root, cache=True, gitignore=True, exclude=DEFAULT_EXCLUDES)
+        return [rel_path for rel_path in iter_tree_files(structure) if rel_path.endswith(".py")]
+
+    @traced("symbol_index.update")
+    def update(self, paths=None, workers=None):
+        """
+        Brings the index up to date with the project files.
+
+        Args:
+            paths (list of str or None): Relative paths of the .py files. If None, uses python_files().
+            workers (int or None): Processes used to parse many changed files. None uses the number of CPUs.
+
+        Returns:
+            dict: Counts of "parsed", "reused" (known contents), "removed" and "unchanged" files.
+        """
+        if paths is None:
+            paths = self.python_files()
+
+        with self._lock:
+            stats = Counter()
+            todo = []
+            for rel_path in paths:
+                try:
+                    st = os.stat(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                meta = self.files.get(rel_path)
+                if meta is not None and meta[0] == st.st_mtime_ns and meta[1] == st.st_size:
+                    stats["unchanged"] += 1
+                    continue
+                todo.append(rel_path)
+
+            wanted = set(paths)
+            for rel_path in [rel_path for rel_path in self.files if rel_path not in wanted]:
+                del self.files[rel_path]
+                stats["removed"] += 1
+
+            known = set(self.records)
+            chunks = [[(rel_path, known) for rel_path in todo[i:i + CHUNK_FILES]]
+                      for i in range(0, len(todo), CHUNK_FILES)]
+            if workers is None:
+                workers = os.cpu_count() or 1
+            if workers > 1 and len(todo) >= PARALLEL_MIN_FILES:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = executor.map(_parse_files, [self.root] * len(chunks), chunks)
+                    for result in results:
+                        stats.update(self._merge(result))
+            else:
+                for chunk in chunks:
+                    stats.update(self._merge(_parse_files(self.root, chunk)))
+
+            if todo or stats["removed"]:
+                self.dirty = True
+                self._graph = None
+        return {key: stats[key] for key in ("parsed", "reused", "removed", "unchanged")}
+
+    def _merge(self, results):
+        stats = Counter()
+        for rel_path, mtime_ns, size, digest, record in results:
+            if mtime_ns is None:
+                if self.files.pop(rel_path, None) is not None:
+                    stats["removed"] += 1
+                continue
+            if record is not None:
+                self.records[digest] = record
+                stats["parsed"] += 1
+            else:
+                stats["reused"] += 1
+            self.files[rel_path] = (mtime_ns, size, digest)
+        return stats
+
+    def modules(self):
+        """
+        Returns the parsed modules.
+
+        Returns:
+            dict: relative path -> record (see parse_module()).
+        """
+        with self._lock:
+            return {rel_path: self.records[meta[2]] for rel_path, meta in self.files.items()}
+
+    def _resolve(self, names, suffixes, importer, module, level, imported):
+        if level:
+            package = module_name(importer).split(".")
+            if not importer.endswith("__init__.py"):
+                package = package[:-1]
+            if level > 1:
+                package = package[:-(level - 1)] if level - 1 <= len(package) else []
+            base = ".".join(package + ([module] if module else []))
+        else:
+            base = module
+
+        targets = []
+        for name in [f"{base}.{name}" if base else name for name in imported] + [base]:
+            if not name:
+                continue
+            target = names.get(name)
+            if target is None and "." in name:
+                target = suffixes.get(name)
+            if target is not None:
+                targets.append(target)
+                if name != base:
+                    continue
+            if targets:
+                break
+        return targets
+
+    def import_graph(self):
+        """
+        Returns the imports between modules of the project.
+
+        Imports are matched to project files by dotted name. Names with at least two
+        parts also match a unique module whose name ends with them, so projects with a
+        "src/" layout resolve too.
+
+        Returns:
+            dict: relative path -> set of relative paths it imports.
+        """
+        with self._lock:
+            if self._graph is not None:
+                return self._graph
+            modules = self.modules()
+            names = {}
+            suffixes = {}
+            for rel_path in modules:
+                name = module_name(rel_path)
+                names[name] = rel_path
+                parts = name.split(".")
+                for i in range(1, len(parts) - 1):
+                    suffix = ".".join(parts[i:])
+                    # Sufixos ambíguos não resolvem
+                    suffixes[suffix] = rel_path if suffix not in suffixes else None
+            suffixes = {suffix: rel_path for suffix, rel_path in suffixes.items() if rel_path is not None}
+
+            graph = {}
+            for rel_path, record in modules.items():
+                edges = set()
+                for module, level, imported in record["imports"]:
+                    edges.update(self._resolve(names, suffixes, rel_path, module, level, imported))
+                edges.discard(rel_path)
+                graph[rel_path] = edges
+            self._graph = graph
+            return graph
+
+    def find(self, name):
+        """
+        Finds symbols by name or by the end of their qualified name.
+
+        Args:
+            name (str): e.g. "TreeCache", "structure" or "TreeCache.structure".
+
+        Returns:
+            list of tuple: (relative path, symbol) for every match.
+        """
+        matches = []
+        for rel_path, record in sorted(self.modules().items()):
+            for symbol in record["symbols"]:
+                qualname = symbol[1]
+                if qualname == name or qualname.endswith("." + name):
+                    matches.append((rel_path, symbol))
+        return matches
+
+    def save(self, cache_file=None):
+        """
+        Writes the index to a JSON file, keeping only the records of current files.
+
+        Args:
+            cache_file (str or None): Destination file. If None, uses the cache_file given at construction.
+        """
+        cache_file = cache_file or self.cache_file
+        if cache_file is None:
+            raise ValueError("No cache file given")
+
+        with self._lock:
+            used = {meta[2] for meta in self.files.values()}
+            self.records = {digest: record for digest, record in self.records.items() if digest in used}
+            data = {"version": INDEX_VERSION, "root": self.root, "files": self.files, "records": self.records}
+            os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+            tmp_file = cache_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_file, cache_file)
+            self.dirty = False
+
+    def save_if_dirty(self):
+        """
+        Calls save() if the index changed since it was loaded or saved and a cache file is set.
+        """
+        if self.dirty and self.cache_file is not None:
+            self.save()
+
+    def load(self, cache_file=None):
+        """
+        Loads an index written by save() for the same root.
+
+        Args:
+            cache_file (str or None): Source file. If None, uses the cache_file given at construction.
+
+        Returns:
+            bool: True if the index was loaded, False otherwise.
+        """
+        cache_file = cache_file or self.cache_file
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return False
+
+        with self._lock:
+            self.files = {rel_path: tuple(meta) for rel_path, meta in data["files"].items()}
+            self.records = data["records"]
+            self._graph = None
+        return True
+
+
+def _module_block(rel_path, record, level):
+    """
+    Renders one module of the repo map. Level 2 shows every symbol with its docstring line,
+    level 1 the public symbols without docstrings, level 0 only the module line.
+    """
+    header = f"{rel_path}: {record['doc']}" if record["doc"] else rel_path
+    lines = [header]
+    if level == 0:
+        return header + "\n"
+    for kind, qualname, signature, doc, _, depth in record["symbols"]:
+        name = qualname.rpartition(".")[2]
+        if level == 1 and (kind == "const" or (name.startswith("_") and name != "__init__")):
+            continue
+        if level == 1 and name == "__init__" and signature == "__init__(self)":
+            continue
+        line = "  " * (depth + 1) + (signature if kind == "const" else f"{kind} {signature}")
+        if level == 2 and doc:
+            line += f"  # {doc}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def rank_modules(index, focus=None):
+    """
+    Orders the modules by importance: the focus files first, in the given order, then the
+    modules imported by more project modules, then shallower and shorter paths.
+
+    Args:
+        index (SymbolIndex): Updated index.
+        focus (list of str or None): Relative paths to put first (e.g. BM25 results).
+
+    Returns:
+        list of str: Relative paths.
+    """
+    graph = index.import_graph()
+    in_degree = Counter(target for targets in graph.values() for target in targets)
+    focus_rank = {rel_path: i for i, rel_path in enumerate(focus or ()) if rel_path in graph}
+    return sorted(graph, key=lambda rel_path: (
+        focus_rank.get(rel_path, len(focus_rank)),
+        -in_degree[rel_path],
+        rel_path.count("/"),
+        rel_path,
+    ))
+
+
+@traced("symbol_index.render_repo_map")
+def render_repo_map(index, max_tokens=2048, count_tokens=None, focus=None):
+    """
+    Renders a compact map of the project (modules, classes, functions and signatures) that fits a token budget.
+
+    Modules are taken in rank_modules() order. Focus modules show every symbol with its
+    docstring line, the others only their public signatures; a module that does not fit
+    is reduced to its path, and the map stops when not even the path fits. The modules
+    are listed by path.
+
+    Args:
+        index (SymbolIndex): Updated index.
+        max_tokens (int): Token budget.
+        count_tokens (callable or None): Function str -> int. If None, uses the shared tokens.TokenCounter.
+        focus (list of str or None): Relative paths to put first and to show in full.
+
+    Returns:
+        str: The map; the last line says how many modules were left out, if any.
+    """
+    if count_tokens is None:
+        from smart_coding_assistant.modules.tokens import get_token_counter
+        count_tokens = get_token_counter().count
+
+    modules = index.modules()
+    ranked = rank_modules(index, focus)
+    focus = set(focus or ())
+    # Espaço para a linha final com os módulos omitidos
+    used = count_tokens(f"[... {len(ranked)} more modules]\n")
+    blocks = {}
+    for rel_path in ranked:
+        for level in ((2, 1, 0) if rel_path in focus else (1, 0)):
+            block = _module_block(rel_path, modules[rel_path], level)
+            cost = count_tokens(block)
+            if used + cost <= max_tokens:
+                blocks[rel_path] = block
+                used += cost
+                break
+        else:
+            break
+
+    text = "".join(blocks[rel_path] for rel_path in sorted(blocks))
+    left_out = len(ranked) - len(blocks)
+    if left_out:
+        text += f"[... {left_out} more modules]\n"
+    return text
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(project_dir):
+    """
+    Returns the shared SymbolIndex of a project, persisted in the user cache directory.
+
+    Args:
+        project_dir (str): Root directory of the project.
+
+    Returns:
+        SymbolIndex: The index, loaded from disk if it was saved before (call update() before using it).
+    """
+    root = os.path.abspath(project_dir)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            name = hashlib.sha1(root.encode("utf-8", errors="surrogatepass")).hexdigest()[:16] + ".json"
+            index = SymbolIndex(root, cache_file=os.path.join(cache_dir("symbols"), name))
+            _indexes[root] = index
+        return index
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    index = SymbolIndex(sys.argv[1] if len(sys.argv) > 1 else "../../")
+    t0 = time.perf_counter()
+    print(index.update(), f"{time.perf_counter() - t0:.2f} s")
+    print(render_repo_map(index, max_tokens=int(sys.argv[2]) if len(sys.argv) > 2 else 1024))
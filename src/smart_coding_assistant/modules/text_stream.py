@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+
+import threading
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+
+# Intervalo entre duas descargas no widget (~1 quadro a 60 FPS)
+FLUSH_INTERVAL_MS = 16
+
+
+class TextStreamAppender(QObject):
+    """
+    Appends a stream of text pieces (e.g. model tokens) to a QTextEdit without stalling the interface.
+
+    The pieces are produced in a worker thread (see qt_tasks.TaskRunner) and kept in a buffer;
+    a timer in the GUI thread moves the buffer into the widget at most once per frame, with a
+    single insertion at the end of the document. The timer is restarted after each insertion,
+    so a slow insertion (a very long paragraph) makes the batches larger instead of keeping the
+    GUI thread busy. The document is never set again as a whole,
+    so the layout only grows by the appended text. The view follows the end of the text only
+    while the user has not scrolled away from it.
+
+    Args:
+        text_edit (QTextEdit or QPlainTextEdit): Widget that receives the text.
+        task_runner (qt_tasks.TaskRunner): Pool where the stream is consumed.
+        interval_ms (int): Minimum time between two insertions, in milliseconds.
+        parent (QObject or None): Qt parent.
+    """
+    # Texto completo recebido, emitido ao final (também após cancelamento)
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    # Primeira inserção visível de um fluxo
+    first_text = pyqtSignal()
+
+    def __init__(self, text_edit, task_runner, interval_ms=FLUSH_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self.task_runner = task_runner
+        self.task = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._received = []
+        self._done = False
+        self._error = None
+        self._first = True
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def is_running(self):
+        return self.task is not None
+
+    def start(self, chunks_func, *args, **kwargs):
+        """
+        Consumes chunks_func(*args, cancel_event=..., **kwargs) in the task runner and appends its pieces.
+
+        Args:
+            chunks_func (callable): Generator function yielding str pieces; it must accept cancel_event.
+
+        Returns:
+            qt_tasks.Task or None: The task, or None if a stream is already running.
+        """
+        if self.task is not None:
+            return None
+        self._pending = []
+        self._received = []
+        self._done = False
+        self._error = None
+        self._first = True
+        self.task = self.task_runner.submit(
+            self._consume, chunks_func, args, kwargs,
+            on_finished=self._on_done,
+            on_cancelled=self._on_done,
+            on_failed=self._on_failed
+        )
+        self._timer.start()
+        return self.task
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def _consume(self, chunks_func, args, kwargs, func_msg=None, func_progress=None, cancel_event=None):
+        for piece in chunks_func(*args, cancel_event=cancel_event, **kwargs):
+            # Só a troca de listas ocorre sob a trava; a thread da interface nunca espera o gerador
+            with self._lock:
+                self._pending.append(piece)
+            if cancel_event is not None and cancel_event.is_set():
+                break
+
+    def _on_done(self, result=None):
+        self._done = True
+        self.flush()
+
+    def _on_failed(self, error):
+        self._done = True
+        self._error = error
+        self.flush()
+
+    def flush(self):
+        """
+        Moves the buffered pieces into the widget with one insertion.
+        """
+        with self._lock:
+            pieces, self._pending = self._pending, []
+
+        if pieces:
+            text = "".join(pieces)
+            self._received.append(text)
+            scroll_bar = self.text_edit.verticalScrollBar()
+            at_end = scroll_bar.value() >= scroll_bar.maximum()
+
+            cursor = QTextCursor(self.text_edit.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(text)
+
+            if at_end:
+                scroll_bar.setValue(scroll_bar.maximum())
+            if self._first:
+                self._first = False
+                self.first_text.emit()
+
+        if self.task is None:
+            return
+        if not self._done:
+            self._timer.start()
+        else:
+            self._timer.stop()
+            self.task = None
+            if self._error is not None:
+                self.failed.emit(self._error)
+            else:
+                self.finished.emit("".join(self._received))
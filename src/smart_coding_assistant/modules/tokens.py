@@ -0,0 +1,361 @@
+#!/usr/bin/python3
+
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+from smart_coding_assistant.modules.paths import cache_dir
+from smart_coding_assistant.modules.files import iter_tree_files
+
+# Palavras, símbolos isolados e quebras de linha: aproximação de tokenizadores BPE
+_PIECE_RE = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|\n")
+
+# Palavras longas costumam ser divididas a cada ~6 caracteres
+_LONG_WORD = 6
+
+DEFAULT_MAX_ENTRIES = 200000
+
+CACHE_FILE_NAME = "token_counts.log"
+
+# O log é reescrito (só com as contagens em memória) quando passa de tantas vezes max_entries linhas
+COMPACT_FACTOR = 2
+
+
+def approximate_tokens(text):
+    """
+    Fast offline token estimate, close to BPE tokenizers for source code and English text.
+
+    Counts words, numbers (split every 3 digits), single symbols and line breaks,
+    adding one token for every 6 extra characters of long words.
+
+    Args:
+        text (str): Text to be measured.
+
+    Returns:
+        int: Approximate number of tokens.
+    """
+    total = 0
+    for piece in _PIECE_RE.findall(text):
+        length = len(piece)
+        total += 1 if length <= _LONG_WORD else 1 + (length - 1) // _LONG_WORD
+    return total
+
+
+def content_hash(text):
+    """
+    Returns the key used to cache the token count of a text.
+
+    Args:
+        text (str): Text to be hashed.
+
+    Returns:
+        str: Hexadecimal digest.
+    """
+    return hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=16).hexdigest()
+
+
+class TokenCounter:
+    """
+    Token counter with a cache of counts keyed by content hash.
+
+    The cache is an LRU limited to max_entries counts and can be persisted to disk,
+    so unchanged files are never tokenised again across sessions. The file is an
+    append-only log: save() appends the counts computed since the previous save, so it
+    is cheap after every prompt, and rewrites the file only when the log grows beyond
+    COMPACT_FACTOR * max_entries lines.
+
+    Args:
+        tokenizer (callable or None): Exact tokenizer, function str -> int. If None, uses approximate_tokens().
+        name (str or None): Name of the tokenizer, stored with the counts so that
+                            counts of different tokenizers never mix.
+        batch_tokenizer (callable or None): Optional function list[str] -> list[int], used by count_many().
+        cache_file (str or None): Log file where counts are persisted by save().
+        max_entries (int): Maximum number of cached counts.
+    """
+    def __init__(self, tokenizer=None, name=None, batch_tokenizer=None, cache_file=None,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.tokenizer = tokenizer or approximate_tokens
+        self.name = name or getattr(self.tokenizer, "__name__", "tokenizer")
+        self.batch_tokenizer = batch_tokenizer
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Contagens ainda não gravadas no log, e linhas de contagem que o log já tem
+        self._pending = []
+        self._log_lines = None
+        if cache_file is not None:
+            self.load()
+
+    def _get(self, key):
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+            return count
+
+    def _put(self, key, count):
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            self.misses += 1
+            if self.cache_file is not None:
+                self._pending.append((key, count))
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def count(self, text, key=None):
+        """
+        Counts the tokens of a text.
+
+        Args:
+            text (str): Text to be measured.
+            key (str or None): Precomputed content hash of the text (e.g. a file digest).
+
+        Returns:
+            int: Number of tokens.
+        """
+        key = key or content_hash(text)
+        count = self._get(key)
+        if count is None:
+            count = self.tokenizer(text)
+            self._put(key, count)
+        return count
+
+    __call__ = count
+
+    def count_many(self, texts, keys=None):
+        """
+        Counts the tokens of many texts, tokenising only the unseen contents, in one batch.
+
+        Args:
+            texts (list of str): Texts to be measured.
+            keys (list of str or None): Precomputed content hashes, one per text.
+
+        Returns:
+            list of int: Number of tokens of each text.
+        """
+        if keys is None:
+            keys = [content_hash(text) for text in texts]
+
+        counts = [self._get(key) for key in keys]
+        missing = {}
+        for i, count in enumerate(counts):
+            if count is None:
+                missing.setdefault(keys[i], i)
+
+        if not missing:
+            return counts
+
+        indexes = list(missing.values())
+        batch = [texts[i] for i in indexes]
+        if self.batch_tokenizer is not None:
+            results = self.batch_tokenizer(batch)
+        else:
+            results = [self.tokenizer(text) for text in batch]
+        computed = {}
+        for i, result in zip(indexes, results):
+            self._put(keys[i], result)
+            computed[keys[i]] = result
+        return [count if count is not None else computed[key] for key, count in zip(keys, counts)]
+
+    def count_files(self, paths):
+        """
+        Counts the tokens of text files, reusing the content cache of the context packer.
+
+        Args:
+            paths (list of str): Absolute paths.
+
+        Returns:
+            dict: path -> number of tokens, for every readable text file.
+        """
+        from smart_coding_assistant.modules.context_packer import read_files
+
+        contents = read_files(paths)
+        readable = [path for path in paths if path in contents]
+        counts = self.count_many([contents[path][1] for path in readable],
+                                 keys=[contents[path][0] for path in readable])
+        return dict(zip(readable, counts))
+
+    def count_tree(self, structure, root, paths=None):
+        """
+        Totals the tokens of the files of a directory_structure tree, per file and per directory.
+
+        Args:
+            structure (dict): Nested dictionary {root_name: tree} from directory_structure.
+            root (str): Path of the directory that was scanned.
+            paths (list of str or None): Relative paths to count. If None, counts every file of the tree.
+
+        Returns:
+            dict: Keys "files" (relative path -> tokens) and "dirs"
+                  (relative directory -> tokens, "" for the root).
+        """
+        if paths is None:
+            paths = list(iter_tree_files(structure))
+        abs_counts = self.count_files([os.path.join(root, rel_path) for rel_path in paths])
+
+        file_counts = {}
+        dir_counts = {"": 0}
+        for rel_path in paths:
+            count = abs_counts.get(os.path.join(root, rel_path))
+            if count is None:
+                continue
+            file_counts[rel_path] = count
+            dir_counts[""] += count
+            parent = rel_path.rpartition("/")[0]
+            while parent:
+                dir_counts[parent] = dir_counts.get(parent, 0) + count
+                parent = parent.rpartition("/")[0]
+        return {"files": file_counts, "dirs": dir_counts}
+
+    def count_prompt(self, parts):
+        """
+        Counts the tokens of the parts of a prompt.
+
+        Args:
+            parts (dict): Part name -> text (e.g. system prompt, context, question).
+
+        Returns:
+            dict: Keys "parts" (name -> tokens) and "total".
+        """
+        names = list(parts)
+        counts = self.count_many([parts[name] for name in names])
+        per_part = dict(zip(names, counts))
+        return {"parts": per_part, "total": sum(counts)}
+
+    def _header(self):
+        return f"tokenizer\t{self.name}\n"
+
+    def save(self):
+        """
+        Appends the counts computed since the last save to cache_file, or rewrites the
+        file with the cached counts (most recently used last) if it does not exist yet,
+        belongs to another tokenizer or has grown beyond COMPACT_FACTOR * max_entries lines.
+
+        Raises:
+            ValueError: If the counter has no cache_file.
+        """
+        if self.cache_file is None:
+            raise ValueError("No cache file given")
+
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            compact = self._log_lines is None or self._log_lines + len(pending) > COMPACT_FACTOR * self.max_entries
+            if compact:
+                lines = [f"{key}\t{count}\n" for key, count in self._counts.items()]
+                self._log_lines = len(lines)
+            else:
+                lines = [f"{key}\t{count}\n" for key, count in pending]
+                self._log_lines += len(lines)
+
+        if compact:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+            # Um arquivo temporário por processo: os processos do modo em lote gravam o mesmo cache
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(self._header())
+                f.writelines(lines)
+            os.replace(tmp_file, self.cache_file)
+        elif lines:
+            # Uma só escrita em modo append, para não intercalar com outro processo
+            with open(self.cache_file, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+
+    def load(self):
+        """
+        Loads the counts of cache_file written with the same tokenizer name.
+
+        Returns:
+            bool: True if the file was loaded, False otherwise.
+        """
+        if self.cache_file is None:
+            return False
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                if f.readline() != self._header():
+                    return False
+                # O último elemento é "" ou uma linha cortada por uma escrita interrompida
+                lines = f.read().split("\n")[:-1]
+        except (OSError, ValueError):
+            return False
+
+        with self._lock:
+            for line in lines:
+                key, _, count = line.partition("\t")
+                if count.isdigit():
+                    self._counts[key] = int(count)
+                    self._counts.move_to_end(key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+            self._log_lines = len(lines)
+        return True
+
+    def save_if_dirty(self):
+        """
+        Calls save() if counts were added since the last save and a cache file is set.
+        """
+        if self._pending and self.cache_file is not None:
+            self.save()
+
+    def stats(self):
+        """
+        Returns cache statistics.
+
+        Returns:
+            dict: Keys "entries", "hits" and "misses".
+        """
+        with self._lock:
+            return {"entries": len(self._counts), "hits": self.hits, "misses": self.misses}
+
+
+_default_counter = None
+_default_lock = threading.Lock()
+
+
+def get_token_counter():
+    """
+    Returns the shared approximate TokenCounter, persisted in the user cache directory.
+
+    Returns:
+        TokenCounter: The shared counter.
+    """
+    global _default_counter
+    with _default_lock:
+        if _default_counter is None:
+            _default_counter = TokenCounter(cache_file=os.path.join(cache_dir(), CACHE_FILE_NAME))
+        return _default_counter
+
+
+def count_tokens(text):
+    """
+    Counts the tokens of a text with the shared counter.
+
+    Args:
+        text (str): Text to be measured.
+
+    Returns:
+        int: Approximate number of tokens.
+    """
+    return get_token_counter().count(text)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from smart_coding_assistant.modules.files import directory_structure
+
+    PATH = sys.argv[1] if len(sys.argv) > 1 else "../../"
+    counter = TokenCounter()
+    estrutura = directory_structure(PATH, gitignore=True, exclude=[".git/"])
+    for label in ("cold", "warm"):
+        t0 = time.perf_counter()
+        totals = counter.count_tree(estrutura, PATH)
+        print(f"{label}: {totals['dirs']['']} tokens in {len(totals['files'])} files, "
+              f"{(time.perf_counter() - t0) * 1000:.1f} ms, {counter.stats()}")
@@ -0,0 +1,325 @@
+#!/usr/bin/python3
+
+import os
+import json
+import time
+import functools
+import threading
+from collections import deque
+from collections import namedtuple
+
+# Com essa variável de ambiente (qualquer valor menos "0"), o rastreamento começa ligado
+TRACE_ENV = "SMART_CODING_ASSISTANT_TRACE"
+
+# Spans e amostras de contadores guardados (os mais antigos são descartados)
+DEFAULT_MAX_SPANS = 20000
+DEFAULT_MAX_SAMPLES = 20000
+
+SpanRecord = namedtuple("SpanRecord", ["name", "start_ns", "duration_ns", "thread_id", "attrs"])
+
+# Lido a cada span/contador: com o rastreamento desligado, o custo é só essa verificação
+_enabled = os.environ.get(TRACE_ENV, "0") not in ("", "0")
+
+
+def enable(flag=True):
+    """
+    Turns tracing on or off for the whole process.
+    """
+    global _enabled
+    _enabled = bool(flag)
+
+
+def is_enabled():
+    """
+    Returns True if spans and counters are being recorded.
+    """
+    return _enabled
+
+
+class _NullSpan:
+    """
+    Span returned while tracing is off: does nothing.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    Times a block of code; use it as a context manager (see Tracer.span).
+    """
+    __slots__ = ("tracer", "name", "attrs", "start_ns")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = None
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._finish(self, end_ns)
+        return False
+
+    def set(self, **attrs):
+        """
+        Adds attributes to the span (e.g. the number of files found).
+        """
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """
+    Collects timed spans and counters in memory, in bounded buffers.
+
+    Spans are recorded with perf_counter_ns(), per thread, and can be exported as JSON
+    or in the Chrome trace event format (chrome://tracing, Perfetto). Counters keep a
+    running total and a sample of each change, exported as counter tracks.
+
+    Args:
+        max_spans (int): Number of spans kept.
+        max_samples (int): Number of counter changes kept for the export.
+    """
+    def __init__(self, max_spans=DEFAULT_MAX_SPANS, max_samples=DEFAULT_MAX_SAMPLES):
+        self._spans = deque(maxlen=max_spans)
+        self._samples = deque(maxlen=max_samples)
+        self._counters = {}
+        self._threads = {}
+        self._lock = threading.Lock()
+        self.epoch_ns = time.perf_counter_ns()
+
+    def span(self, name, **attrs):
+        """
+        Returns a context manager that records how long its block takes.
+
+        Args:
+            name (str): Operation name, e.g. "git.ls-tree".
+            **attrs: Attributes stored with the span.
+
+        Returns:
+            Span: The span, or a shared no-op span while tracing is off.
+        """
+        if not _enabled:
+            return _NULL_SPAN
+        return Span(self, name, attrs)
+
+    def _finish(self, span, end_ns):
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+            self._spans.append(SpanRecord(span.name, span.start_ns, end_ns - span.start_ns, thread.ident, span.attrs))
+
+    def increment(self, name, value=1):
+        """
+        Adds value to a counter (e.g. "subprocess.spawn", "bytes.read", "llm.tokens_sent").
+        """
+        if not _enabled:
+            return
+        now_ns = time.perf_counter_ns()
+        with self._lock:
+            total = self._counters.get(name, 0) + value
+            self._counters[name] = total
+            self._samples.append((now_ns, name, total))
+
+    def spans(self):
+        """
+        Returns the recorded spans, oldest first.
+
+        Returns:
+            list of SpanRecord: Copies of the buffer contents.
+        """
+        with self._lock:
+            return list(self._spans)
+
+    def counters(self):
+        """
+        Returns the totals of the counters.
+
+        Returns:
+            dict: name -> total.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def clear(self):
+        """
+        Drops every span and counter.
+        """
+        with self._lock:
+            self._spans.clear()
+            self._samples.clear()
+            self._counters.clear()
+
+    def summary(self, window=200):
+        """
+        Summarizes the latest spans of each operation.
+
+        Args:
+            window (int): Number of latest spans of each name that are considered.
+
+        Returns:
+            dict: name -> {"count" (spans recorded), "last", "p50", "p90", "max" (milliseconds
+                  over the window), "errors" (spans that raised, over the window)}.
+        """
+        recent = {}
+        counts = {}
+        for record in self.spans():
+            counts[record.name] = counts.get(record.name, 0) + 1
+            recent.setdefault(record.name, deque(maxlen=window)).append(record)
+
+        result = {}
+        for name, records in recent.items():
+            durations = sorted(record.duration_ns / 1e6 for record in records)
+            result[name] = {
+                "count": counts[name],
+                "last": records[-1].duration_ns / 1e6,
+                "p50": durations[min(len(durations) - 1, len(durations) // 2)],
+                "p90": durations[min(len(durations) - 1, int(len(durations) * 0.9))],
+                "max": durations[-1],
+                "errors": sum("error" in record.attrs for record in records),
+            }
+        return result
+
+    def to_dict(self):
+        """
+        Returns the spans and counters as plain data (times in milliseconds since the tracer was created).
+        """
+        with self._lock:
+            threads = dict(self._threads)
+        return {
+            "spans": [
+                {
+                    "name": record.name,
+                    "start_ms": (record.start_ns - self.epoch_ns) / 1e6,
+                    "duration_ms": record.duration_ns / 1e6,
+                    "thread": threads.get(record.thread_id, str(record.thread_id)),
+                    "attrs": record.attrs,
+                }
+                for record in self.spans()
+            ],
+            "counters": self.counters(),
+        }
+
+    def chrome_trace(self):
+        """
+        Returns the spans and counters in the Chrome trace event format.
+
+        Returns:
+            dict: {"traceEvents": [...]} with complete ("X") events for the spans, counter
+                  ("C") events for the counters and the names of the threads.
+        """
+        pid = os.getpid()
+        with self._lock:
+            threads = dict(self._threads)
+            samples = list(self._samples)
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in threads.items()]
+        for record in self.spans():
+            events.append({
+                "name": record.name,
+                "ph": "X",
+                "ts": (record.start_ns - self.epoch_ns) / 1e3,
+                "dur": record.duration_ns / 1e3,
+                "pid": pid,
+                "tid": record.thread_id,
+                "args": record.attrs,
+            })
+        for now_ns, name, total in samples:
+            events.append({"name": name, "ph": "C", "ts": (now_ns - self.epoch_ns) / 1e3, "pid": pid,
+                           "args": {"value": total}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_json(self, path):
+        """
+        Writes to_dict() to a JSON file.
+        """
+        _write_json(path, self.to_dict())
+
+    def export_chrome_trace(self, path):
+        """
+        Writes chrome_trace() to a JSON file that chrome://tracing and Perfetto open.
+        """
+        _write_json(path, self.chrome_trace())
+
+
+def _write_json(path, data):
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_file, path)
+
+
+_default_tracer = Tracer()
+
+
+def get_tracer():
+    """
+    Returns the tracer shared by the whole program.
+    """
+    return _default_tracer
+
+
+def span(name, **attrs):
+    """
+    Times a block with the shared tracer (see Tracer.span).
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(_default_tracer, name, attrs)
+
+
+def increment(name, value=1):
+    """
+    Adds value to a counter of the shared tracer (see Tracer.increment).
+    """
+    if _enabled:
+        _default_tracer.increment(name, value)
+
+
+def traced(name=None):
+    """
+    Decorator that records every call of a function as a span of the shared tracer.
+
+    Args:
+        name (str or None): Span name. If None, uses module.function.
+    """
+    def decorator(func):
+        span_name = name or f"{func.__module__.rpartition('.')[2]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(_default_tracer, span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if __name__ == "__main__":
+    import timeit
+
+    enable(False)
+    off = timeit.timeit("with span('x'): pass", globals=globals(), number=200000) / 200000
+    enable(True)
+    on = timeit.timeit("with span('x'): pass", globals=globals(), number=200000) / 200000
+    print(f"span overhead: off {off * 1e9:.0f} ns, on {on * 1e9:.0f} ns")
+    increment("demo", 3)
+    print(get_tracer().summary()["x"], get_tracer().counters())
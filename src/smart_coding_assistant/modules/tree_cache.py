@@ -0,0 +1,558 @@
+#!/usr/bin/python3
+
+import os
+import json
+import time
+import errno
+import struct
+import select
+import threading
+
+from smart_coding_assistant.modules.files import list_directory
+from smart_coding_assistant.modules.ignore import load_ignore_rules
+from smart_coding_assistant.modules.ignore import directory_rules
+
+# Diretórios modificados há menos que isso não têm o mtime confiável
+# (sistemas de arquivos com resolução grosseira de tempo).
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+CACHE_VERSION = 2
+
+
+class _DirRecord:
+    __slots__ = ("mtime_ns", "tree", "rel", "depth", "rules", "ignore_mtime_ns")
+
+    def __init__(self, tree, rel, depth):
+        self.mtime_ns = None
+        self.tree = tree
+        self.rel = rel
+        self.depth = depth
+        self.rules = None
+        self.ignore_mtime_ns = None
+
+
+class TreeCache:
+    """
+    Persistent cache of a directory tree that only rescans directories whose mtime changed.
+
+    The cached tree has the same shape as files.directory_structure: nested dictionaries
+    where directories map to dictionaries and files map to None. The dictionaries are
+    patched in place, so callers must treat the returned structure as read-only.
+
+    Args:
+        path (str): Path to the root directory.
+        cache_file (str or None): JSON file used to persist the cache between sessions.
+        gitignore (bool): If True, honours .gitignore files and .git/info/exclude.
+        exclude (iterable of str or None): Extra gitignore-style patterns to prune.
+        max_depth (int or None): Number of directory levels to list.
+    """
+    def __init__(self, path, cache_file=None, gitignore=False, exclude=None, max_depth=None):
+        self.root = os.path.abspath(path)
+        self.base_name = os.path.basename(self.root)
+        self.cache_file = cache_file
+        self.gitignore = gitignore
+        self.exclude = tuple(exclude or ())
+        self.max_depth = max_depth
+
+        # caminho absoluto do diretório -> _DirRecord
+        self._dirs = {}
+        self._tree = None
+        self._lock = threading.RLock()
+        self._watcher = None
+        self._root_rules = None
+        if gitignore or self.exclude:
+            self._root_rules = load_ignore_rules(self.root, gitignore=gitignore, exclude=self.exclude)
+
+        if cache_file is not None and os.path.isfile(cache_file):
+            self.load(cache_file)
+
+    def structure(self):
+        """
+        Returns the nested dictionary of the tree, rescanning only what changed.
+
+        Returns:
+            dict: Nested dictionary representing the file/folder structure.
+        """
+        with self._lock:
+            if self._tree is None:
+                self._tree = {}
+                self._scan_dir(_DirRecord(self._tree, "", 0), self.root, self._root_rules)
+            elif self._watcher is None or not self._watcher.is_alive():
+                self._revalidate()
+            return {self.base_name: self._tree}
+
+    def directories(self):
+        """
+        Returns the absolute paths of the cached directories.
+
+        Returns:
+            list: Paths of every directory that was listed.
+        """
+        with self._lock:
+            return list(self._dirs)
+
+    def invalidate(self):
+        """
+        Forgets the recorded mtimes so the next call to structure() rescans every directory.
+        """
+        with self._lock:
+            for record in self._dirs.values():
+                record.mtime_ns = None
+
+    def _parent_rules(self, dir_path):
+        if dir_path == self.root:
+            return self._root_rules
+        parent = self._dirs.get(os.path.dirname(dir_path))
+        return parent.rules if parent is not None else self._root_rules
+
+    def _scan_dir(self, record, dir_path, inherited_rules):
+        """
+        Lists a directory and updates its dictionary in place.
+
+        Subdirectories already known keep their dictionaries (they are revalidated on their
+        own mtime); new subdirectories are scanned recursively. If the ignore rules in effect
+        changed, the whole subtree is rescanned with the new rules.
+        """
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except FileNotFoundError:
+            self._forget(dir_path)
+            return
+
+        if time.time_ns() - mtime_ns < RACY_WINDOW_NS:
+            mtime_ns = None
+
+        # A watch vem antes da listagem para não perder eventos
+        if self._watcher is not None:
+            self._watcher.add(dir_path)
+
+        try:
+            new_tree, subdirs, rules = list_directory(dir_path, record.rel, inherited_rules)
+        except FileNotFoundError:
+            self._forget(dir_path)
+            return
+
+        rules_changed = record.rules != rules
+        tree = record.tree
+        scan_children = self.max_depth is None or record.depth + 1 < self.max_depth
+
+        new_dirs = []
+        for sub_path, rel_path in subdirs:
+            name = os.path.basename(sub_path)
+            child = self._dirs.get(sub_path)
+            if child is not None and not rules_changed:
+                new_tree[name] = child.tree
+            elif scan_children:
+                new_dirs.append((sub_path, rel_path, name))
+
+        # Remove do cache os subdiretórios que desapareceram ou serão re-escaneados
+        for name, subtree in tree.items():
+            if subtree is not None and new_tree.get(name) is not subtree:
+                self._forget(os.path.join(dir_path, name))
+
+        tree.clear()
+        tree.update(new_tree)
+        record.mtime_ns = mtime_ns
+        record.rules = rules
+        record.ignore_mtime_ns = self._ignore_mtime(dir_path, tree)
+        self._dirs[dir_path] = record
+
+        for sub_path, rel_path, name in new_dirs:
+            self._scan_dir(_DirRecord(tree[name], rel_path, record.depth + 1), sub_path, rules)
+
+    def _ignore_mtime(self, dir_path, tree):
+        if not self.gitignore or ".gitignore" not in tree:
+            return None
+        try:
+            return os.stat(os.path.join(dir_path, ".gitignore")).st_mtime_ns
+        except OSError:
+            return None
+
+    def _forget(self, dir_path):
+        record = self._dirs.pop(dir_path, None)
+        if self._watcher is not None:
+            self._watcher.remove(dir_path)
+        if record is None:
+            return
+        for name, subtree in record.tree.items():
+            if subtree is not None:
+                self._forget(os.path.join(dir_path, name))
+
+    def _revalidate(self):
+        # Pais antes dos filhos: um pai re-escaneado já descarta filhos removidos
+        for dir_path in sorted(self._dirs):
+            record = self._dirs.get(dir_path)
+            if record is None:
+                continue
+            try:
+                mtime_ns = os.stat(dir_path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if (record.mtime_ns is None or record.mtime_ns != mtime_ns or
+                    record.ignore_mtime_ns != self._ignore_mtime(dir_path, record.tree)):
+                self._scan_dir(record, dir_path, self._parent_rules(dir_path))
+
+    def save(self, cache_file=None):
+        """
+        Writes the cache to a JSON file.
+
+        Args:
+            cache_file (str or None): Destination file. If None, uses the cache_file given at construction.
+        """
+        cache_file = cache_file or self.cache_file
+        if cache_file is None:
+            raise ValueError("No cache file given")
+
+        with self._lock:
+            if self._tree is None:
+                self.structure()
+            dirs = {}
+            for dir_path, record in self._dirs.items():
+                files = sorted(name for name, sub in record.tree.items() if sub is None)
+                dirs[record.rel or "."] = [record.mtime_ns, record.ignore_mtime_ns, files]
+            data = {
+                "version": CACHE_VERSION,
+                "root": self.root,
+                "options": self._options(),
+                "dirs": dirs,
+            }
+
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_file, cache_file)
+
+    def _options(self):
+        return [self.gitignore, list(self.exclude), self.max_depth]
+
+    def load(self, cache_file=None):
+        """
+        Restores the cache from a JSON file written by save().
+
+        Stale or incompatible files are ignored; the next call to structure() revalidates
+        every directory against its current mtime anyway.
+
+        Args:
+            cache_file (str or None): Source file. If None, uses the cache_file given at construction.
+
+        Returns:
+            bool: True if the file was loaded, False otherwise.
+        """
+        cache_file = cache_file or self.cache_file
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if (data.get("version") != CACHE_VERSION or data.get("root") != self.root or
+                data.get("options") != self._options()):
+            return False
+
+        dirs = {}
+        for rel, (mtime_ns, ignore_mtime_ns, files) in data["dirs"].items():
+            rel = "" if rel == "." else rel
+            dir_path = os.path.join(self.root, rel) if rel else self.root
+            record = _DirRecord(dict.fromkeys(files), rel, rel.count("/") + 1 if rel else 0)
+            record.mtime_ns = mtime_ns
+            record.ignore_mtime_ns = ignore_mtime_ns
+            dirs[dir_path] = record
+
+        if self.root not in dirs:
+            return False
+
+        # Liga cada diretório ao dicionário do seu pai (pais antes dos filhos)
+        for dir_path in sorted(dirs):
+            record = dirs[dir_path]
+            if dir_path != self.root:
+                parent = dirs.get(os.path.dirname(dir_path))
+                if parent is None:
+                    return False
+                parent.tree[os.path.basename(dir_path)] = record.tree
+
+        # As regras não são gravadas: são refeitas a partir dos .gitignore listados
+        if self._root_rules is not None:
+            for dir_path in sorted(dirs):
+                record = dirs[dir_path]
+                if dir_path == self.root:
+                    inherited = self._root_rules
+                else:
+                    inherited = dirs[os.path.dirname(dir_path)].rules
+                record.rules = directory_rules(inherited, dir_path, record.rel, record.tree)
+
+        with self._lock:
+            self._dirs = dirs
+            self._tree = dirs[self.root].tree
+        return True
+
+    def start_watcher(self):
+        """
+        Starts an inotify watcher that patches the cached tree in place.
+
+        While the watcher is running, structure() does no file system access at all.
+        If inotify is not available (non-Linux systems, watch limit reached), the cache
+        keeps working through mtime revalidation.
+
+        Returns:
+            bool: True if the watcher is running, False otherwise.
+        """
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return True
+            if self._tree is None:
+                self.structure()
+            try:
+                watcher = InotifyWatcher(self)
+            except OSError:
+                return False
+            self._watcher = watcher
+            try:
+                for dir_path in list(self._dirs):
+                    watcher.add(dir_path)
+            except OSError:
+                self._watcher = None
+                watcher.close()
+                return False
+            # Captura mudanças ocorridas antes das watches existirem
+            self._revalidate()
+            watcher.start()
+            return True
+
+    def stop_watcher(self):
+        """
+        Stops the inotify watcher, if any. The cache falls back to mtime revalidation.
+        """
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.stop()
+
+    def _on_created(self, dir_path, name, is_dir):
+        record = self._dirs.get(dir_path)
+        if record is None:
+            return
+        if name == ".gitignore" and self.gitignore:
+            # Regras novas: re-escaneia a subárvore inteira
+            self._scan_dir(record, dir_path, self._parent_rules(dir_path))
+            return
+
+        rel_path = record.rel + "/" + name if record.rel else name
+        if record.rules and record.rules.is_ignored(rel_path, is_dir):
+            return
+        if not is_dir:
+            record.tree[name] = None
+            return
+
+        path = os.path.join(dir_path, name)
+        if path in self._dirs:
+            return
+        subtree = {}
+        record.tree[name] = subtree
+        if self.max_depth is None or record.depth + 1 < self.max_depth:
+            self._scan_dir(_DirRecord(subtree, rel_path, record.depth + 1), path, record.rules)
+
+    def _on_deleted(self, dir_path, name):
+        record = self._dirs.get(dir_path)
+        if record is None:
+            return
+        if name == ".gitignore" and self.gitignore:
+            self._scan_dir(record, dir_path, self._parent_rules(dir_path))
+            return
+        subtree = record.tree.pop(name, None)
+        if subtree is not None:
+            self._forget(os.path.join(dir_path, name))
+
+    def _on_overflow(self):
+        # Eventos perdidos: revalida tudo pelo mtime
+        self.invalidate()
+        self._revalidate()
+
+
+# Constantes de <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+_WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR | IN_DONT_FOLLOW
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    import ctypes
+    import ctypes.util
+
+    libc_name = ctypes.util.find_library("c")
+    if libc_name is None:
+        raise OSError(errno.ENOSYS, "libc not found")
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError(errno.ENOSYS, "inotify not available")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return libc
+
+
+class InotifyWatcher(threading.Thread):
+    """
+    Background thread that forwards inotify events to a TreeCache.
+
+    Args:
+        cache (TreeCache): Cache whose tree is patched. Every callback runs under the cache lock.
+
+    Raises:
+        OSError: If inotify is not available on this system.
+    """
+    def __init__(self, cache):
+        super().__init__(daemon=True, name="TreeCacheWatcher")
+        self._libc = _load_libc()
+        self._cache = cache
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            import ctypes
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._wd_to_path = {}
+        self._path_to_wd = {}
+        self._stop_event = threading.Event()
+
+    def add(self, dir_path):
+        """
+        Adds a watch for a single directory.
+
+        Raises:
+            OSError: If the watch limit (fs.inotify.max_user_watches) is reached.
+        """
+        if dir_path in self._path_to_wd:
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), _WATCH_MASK)
+        if wd < 0:
+            import ctypes
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return
+            raise OSError(err, os.strerror(err))
+        self._wd_to_path[wd] = dir_path
+        self._path_to_wd[dir_path] = wd
+
+    def remove(self, dir_path):
+        wd = self._path_to_wd.pop(dir_path, None)
+        if wd is not None:
+            self._wd_to_path.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                ready, _, _ = select.select([self._fd], [], [], 0.2)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                with self._cache._lock:
+                    try:
+                        self._dispatch(data)
+                    except OSError:
+                        # Limite de watches atingido: o cache volta ao modo por mtime
+                        self._cache.invalidate()
+                        break
+        finally:
+            self.close()
+
+    def _dispatch(self, data):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self._cache._on_overflow()
+                continue
+            if mask & IN_IGNORED:
+                path = self._wd_to_path.pop(wd, None)
+                if path is not None:
+                    self._path_to_wd.pop(path, None)
+                continue
+
+            dir_path = self._wd_to_path.get(wd)
+            if dir_path is None or not name:
+                continue
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self._cache._on_created(dir_path, name, bool(mask & IN_ISDIR))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._cache._on_deleted(dir_path, name)
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        else:
+            self.close()
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_tree_cache(path, cache_file=None, gitignore=False, exclude=None, max_depth=None):
+    """
+    Returns the shared TreeCache for a root directory and scan options, creating it on first use.
+
+    Args:
+        path (str): Path to the root directory.
+        cache_file (str or None): JSON file used to persist the cache between sessions.
+        gitignore (bool): If True, honours .gitignore files and .git/info/exclude.
+        exclude (iterable of str or None): Extra gitignore-style patterns to prune.
+        max_depth (int or None): Number of directory levels to list.
+
+    Returns:
+        TreeCache: The cache associated with the absolute path and options.
+    """
+    root = os.path.abspath(path)
+    key = (root, gitignore, tuple(exclude or ()), max_depth)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = TreeCache(root, cache_file=cache_file, gitignore=gitignore,
+                              exclude=exclude, max_depth=max_depth)
+            _caches[key] = cache
+        return cache
+
+
+if __name__ == "__main__":
+    import sys
+
+    PATH = sys.argv[1] if len(sys.argv) > 1 else "../../"
+    cache = TreeCache(PATH)
+
+    t0 = time.perf_counter()
+    cache.structure()
+    t1 = time.perf_counter()
+    cache.structure()
+    t2 = time.perf_counter()
+    print(f"first scan:   {(t1 - t0) * 1000:.2f} ms ({len(cache._dirs)} directories)")
+    print(f"revalidation: {(t2 - t1) * 1000:.2f} ms")
+
+    if cache.start_watcher():
+        t3 = time.perf_counter()
+        cache.structure()
+        print(f"with watcher: {(time.perf_counter() - t3) * 1000:.3f} ms")
+        cache.stop_watcher()
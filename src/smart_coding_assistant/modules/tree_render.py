@@ -0,0 +1,219 @@
+#!/usr/bin/python3
+
+import os
+import math
+
+from smart_coding_assistant.modules.tracing import traced
+
+# Caracteres por token usados na estimativa padrão
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate used when no tokenizer is given.
+
+    Args:
+        text (str): Text to be measured.
+
+    Returns:
+        int: Approximate number of tokens.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _sorted_items(tree):
+    # Diretórios primeiro, depois arquivos, ambos em ordem alfabética
+    return sorted(tree.items(), key=lambda item: (item[1] is None, item[0]))
+
+
+def _count(tree, counts):
+    """
+    Fills counts with id(tree) -> (files, dirs) for every directory, recursively.
+    """
+    files = 0
+    dirs = 0
+    for subtree in tree.values():
+        if subtree is None:
+            files += 1
+        else:
+            sub_files, sub_dirs = _count(subtree, counts)
+            files += sub_files
+            dirs += sub_dirs + 1
+    counts[id(tree)] = (files, dirs)
+    return files, dirs
+
+
+def _summary(tree, counts):
+    files, dirs = counts[id(tree)]
+    parts = [f"{files} file" + ("s" if files != 1 else "")]
+    if dirs:
+        parts.append(f"{dirs} dir" + ("s" if dirs != 1 else ""))
+    return "(" + ", ".join(parts) + ")"
+
+
+def _file_labels(names, collapse_over):
+    """
+    Returns the labels of the files of a directory, grouping them by extension when there are too many.
+    """
+    if collapse_over is None or len(names) <= collapse_over:
+        return list(names)
+
+    groups = {}
+    for name in names:
+        groups.setdefault(os.path.splitext(name)[1], []).append(name)
+
+    labels = []
+    singles = []
+    for ext in sorted(groups):
+        members = groups[ext]
+        if len(members) >= 3:
+            pattern = f"*{ext}" if ext else "(no extension)"
+            labels.append(f"{len(members)} {pattern} files")
+        else:
+            singles.extend(members)
+
+    room = max(collapse_over - len(labels), 0)
+    if len(singles) > room:
+        labels.extend(sorted(singles)[:room])
+        labels.append(f"{len(singles) - room} other files")
+    else:
+        labels.extend(sorted(singles))
+    return labels
+
+
+def _render_indent(name, tree, depth_limit, collapse_over, counts, indent):
+    lines = [name + "/"]
+
+    def walk(tree, depth):
+        prefix = indent * depth
+        files = []
+        for child, subtree in _sorted_items(tree):
+            if subtree is None:
+                files.append(child)
+            elif depth_limit is not None and depth >= depth_limit and subtree:
+                lines.append(f"{prefix}{child}/ {_summary(subtree, counts)}")
+            else:
+                lines.append(f"{prefix}{child}/")
+                walk(subtree, depth + 1)
+        for label in _file_labels(files, collapse_over):
+            lines.append(prefix + label)
+
+    walk(tree, 1)
+    return lines
+
+
+def _render_paths(name, tree, depth_limit, collapse_over, counts):
+    lines = [name + "/"]
+
+    def walk(tree, rel, depth):
+        files = [child for child, subtree in _sorted_items(tree) if subtree is None]
+        if files:
+            label = rel + ": " if rel else ""
+            lines.append(label + ", ".join(_file_labels(files, collapse_over)))
+        for child, subtree in _sorted_items(tree):
+            if subtree is None:
+                continue
+            child_rel = f"{rel}{child}/"
+            if depth_limit is not None and depth >= depth_limit and subtree:
+                lines.append(f"{child_rel} {_summary(subtree, counts)}")
+            elif not subtree:
+                lines.append(child_rel)
+            else:
+                walk(subtree, child_rel, depth + 1)
+
+    walk(tree, "", 1)
+    return lines
+
+
+@traced("tree_render.render_tree")
+def render_tree(structure, style="indent", max_chars=None, max_tokens=None,
+                count_tokens=None, collapse_over=40, indent=" "):
+    """
+    Renders the output of files.directory_structure as compact text for LLM prompts.
+
+    Directories with more than collapse_over files have their files grouped by
+    extension ("412 *.png files"). When a budget is given, the deepest rendering
+    that fits is used, with deeper directories replaced by a summary of their
+    content; if even the first level does not fit, the listing is cut and a
+    marker says how many lines were omitted. The result never exceeds the budget.
+
+    Args:
+        structure (dict): Nested dictionary {root_name: tree} from directory_structure.
+        style (str): "indent" (one entry per line, indented by depth) or
+                     "paths" (one line per directory, prefixed by its path).
+        max_chars (int or None): Hard limit of characters.
+        max_tokens (int or None): Hard limit of tokens, measured with count_tokens.
+        count_tokens (callable or None): Function str -> int. If None, uses estimate_tokens().
+        collapse_over (int or None): Maximum number of files listed per directory.
+        indent (str): Indentation unit of the "indent" style.
+
+    Returns:
+        str: The rendered tree.
+    """
+    if count_tokens is None:
+        count_tokens = estimate_tokens
+
+    def fits(text):
+        if max_chars is not None and len(text) > max_chars:
+            return False
+        if max_tokens is not None and count_tokens(text) > max_tokens:
+            return False
+        return True
+
+    (name, tree), = structure.items()
+    counts = {}
+    _count(tree, counts)
+
+    def render(depth_limit):
+        if style == "paths":
+            return _render_paths(name, tree, depth_limit, collapse_over, counts)
+        if style == "indent":
+            return _render_indent(name, tree, depth_limit, collapse_over, counts, indent)
+        raise ValueError(f"Unknown style: {style}")
+
+    lines = render(None)
+    text = "\n".join(lines)
+    if fits(text):
+        return text
+
+    # Profundidade máxima que cabe no orçamento
+    for depth_limit in range(_depth(tree) - 1, 0, -1):
+        lines = render(depth_limit)
+        text = "\n".join(lines)
+        if fits(text):
+            return text
+
+    # Nem o primeiro nível cabe: corta as linhas e avisa quantas foram omitidas
+    low, high = 0, len(lines)
+    while low < high:
+        middle = (low + high + 1) // 2
+        candidate = "\n".join(lines[:middle] + [f"... ({len(lines) - middle} more lines)"])
+        if fits(candidate):
+            low = middle
+        else:
+            high = middle - 1
+    text = "\n".join(lines[:low] + [f"... ({len(lines) - low} more lines)"])
+    if fits(text):
+        return text
+    return ""
+
+
+def _depth(tree):
+    depths = [_depth(subtree) for subtree in tree.values() if subtree]
+    return 1 + max(depths, default=0)
+
+
+if __name__ == "__main__":
+    import sys
+    import json
+
+    from smart_coding_assistant.modules.files import directory_structure
+
+    PATH = sys.argv[1] if len(sys.argv) > 1 else "../../"
+    estrutura = directory_structure(PATH, gitignore=True, exclude=[".git/"])
+    as_json = json.dumps(estrutura, indent=4)
+    for style in ("indent", "paths"):
+        text = render_tree(estrutura, style=style)
+        print(text)
+        print(f"--- {style}: {len(text)} chars vs {len(as_json)} chars of JSON\n")
@@ -1,10 +1,14 @@
+import os
 import sys
 import math
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QPushButton, QLabel, QStackedWidget, QHBoxLayout,
-                             QLineEdit, QTextEdit, QCheckBox, QComboBox, QFrame)
+                             QLineEdit, QTextEdit, QCheckBox, QComboBox, QFrame,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox)
 from PyQt5.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve, QRect, QTimer, pyqtProperty
-from PyQt5.QtGui import QIcon, QColor, QPainter, QPen, QFont, QFontMetrics
+from PyQt5.QtGui import QIcon, QColor, QPainter, QPen, QFont, QFontMetrics, QPixmap
+
+from smart_coding_assistant.modules.tracing import traced
 
 
 class CircularProgressBar(QWidget):
@@ -23,6 +27,17 @@ class CircularProgressBar(QWidget):
         self._background_color = QColor("#3E3E42")
         self._text_color = QColor("#FFFFFF")
         
+        # Objetos de pintura criados uma única vez
+        self._font = QFont("Arial", 10, QFont.Bold)
+        self._metrics = QFontMetrics(self._font)
+        self._pen = QPen(self._active_color)
+        self._pen.setWidth(self._line_width)
+        self._pen.setCapStyle(Qt.RoundCap)
+        
+        # Camada estática (círculo de fundo), regenerada só no redimensionamento
+        self._background = None
+        self._circle_rect = QRect()
+        
         # Configurar tamanho mínimo
         self.setMinimumSize(self._size, self._size)
         
@@ -31,6 +46,7 @@ class CircularProgressBar(QWidget):
         self._timer.timeout.connect(self._update_animation)
         self._animated_progress = 0
         self._target_progress = 0
+        self._painted_state = None
         
     def _update_animation(self):
         if abs(self._animated_progress - self._target_progress) < 0.5:
@@ -41,61 +57,94 @@ class CircularProgressBar(QWidget):
             delta = (self._target_progress - self._animated_progress) / 10.0
             self._animated_progress += delta
         
-        self.update()  # Redesenhar o widget
+        # Redesenhar só a área do círculo, e só se o arco ou o texto mudaram
+        if self._paint_state() != self._painted_state:
+            self.update(self._circle_rect)
+    
+    def _span_angle(self):
+        return -int(360 * 16 * self._animated_progress / self._max_progress)
+    
+    def _paint_state(self):
+        return (self._span_angle(), int(self._animated_progress))
     
     def sizeHint(self):
         return QSize(self._size, self._size)
     
-    def paintEvent(self, event):
-        painter = QPainter(self)
+    def resizeEvent(self, event):
+        self._background = None
+        super().resizeEvent(event)
+    
+    def showEvent(self, event):
+        # Retomar a animação interrompida enquanto o widget estava oculto
+        if self._animated_progress != self._target_progress and not self._timer.isActive():
+            self._timer.start(16)
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        # Nada é desenhado enquanto oculto: o temporizador fica parado
+        self._timer.stop()
+        super().hideEvent(event)
+    
+    def _render_background(self):
+        # Calcular o retângulo do círculo a partir do widget inteiro (não da região suja)
+        rect = self.rect()
+        size = min(rect.width(), rect.height())
+        x = (rect.width() - size) // 2
+        y = (rect.height() - size) // 2
+        self._circle_rect = QRect(x, y, size, size)
+        
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(rect.width() * ratio), int(rect.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        
+        painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Calcular o retângulo para desenhar o círculo
-        rect = event.rect()
-        width = rect.width()
-        height = rect.height()
-        size = min(width, height)
-        
-        # Centralizar o círculo
-        x = (width - size) // 2
-        y = (height - size) // 2
-        
-        # Desenhar círculo de fundo
         painter.setPen(Qt.NoPen)
         painter.setBrush(self._background_color)
         painter.drawEllipse(x + self._line_width//2, y + self._line_width//2, 
                            size - self._line_width, size - self._line_width)
+        painter.end()
+        self._background = pixmap
+    
+    @traced("ui.progress_paint")
+    def paintEvent(self, event):
+        if self._background is None:
+            self._render_background()
+        
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        # Círculo de fundo já desenhado
+        painter.drawPixmap(0, 0, self._background)
         
         # Desenhar arco de progresso
-        pen = QPen(self._active_color)
-        pen.setWidth(self._line_width)
-        pen.setCapStyle(Qt.RoundCap)
-        painter.setPen(pen)
+        painter.setPen(self._pen)
         painter.setBrush(Qt.NoBrush)
         
         # Calcular ângulos em graus
         start_angle = 90 * 16  # Começa em 90 graus (topo)
-        span_angle = -int(360 * 16 * self._animated_progress / self._max_progress)
+        span_angle = self._span_angle()
         
         # Ajustar retângulo para linha de progresso
-        adjusted_size = size - self._line_width
-        painter.drawArc(x + self._line_width//2, y + self._line_width//2, 
+        circle = self._circle_rect
+        adjusted_size = circle.width() - self._line_width
+        painter.drawArc(circle.x() + self._line_width//2, circle.y() + self._line_width//2, 
                       adjusted_size, adjusted_size, 
                       start_angle, span_angle)
         
         # Desenhar texto com o percentual
         percentage = int(self._animated_progress)
         painter.setPen(self._text_color)
-        font = QFont("Arial", 10, QFont.Bold)
-        painter.setFont(font)
+        painter.setFont(self._font)
         
         text = f"{percentage}%"
-        metrics = QFontMetrics(font)
-        text_width = metrics.width(text)
-        text_height = metrics.height()
+        text_width = self._metrics.width(text)
+        text_height = self._metrics.height()
         
-        painter.drawText((width - text_width) // 2, 
-                       (height + text_height) // 2 - 2, text)
+        painter.drawText((self.width() - text_width) // 2, 
+                       (self.height() + text_height) // 2 - 2, text)
+        self._painted_state = (span_angle, percentage)
         
     def get_progress(self):
         return self._progress
@@ -104,24 +153,73 @@ class CircularProgressBar(QWidget):
         self._progress = max(0, min(value, self._max_progress))
         self._target_progress = self._progress
         
-        # Iniciar animação
-        if not self._timer.isActive():
+        # Iniciar animação (oculto, o valor é aplicado direto)
+        if not self.isVisible():
+            self._animated_progress = self._target_progress
+        elif not self._timer.isActive():
             self._timer.start(16)  # ~60 FPS
-        
-        self.update()
     
     # Definir uma propriedade para uso em animações
     progress = pyqtProperty(float, get_progress, set_progress)
 
 
+# Página aberta por cada ação recebida da linha de comando
+PAGE_ACTIONS = {"files": 0, "meld": 0, "edit": 1, "settings": 2, "help": 3, "stats": 4}
+
+# Intervalo de atualização da página de desempenho
+STATS_REFRESH_MS = 1000
+
+
 class ExpandableSidebar(QMainWindow):
-    def __init__(self):
+    def __init__(self, resident=False):
         super().__init__()
         
+        # Instância residente: fechar só esconde a janela (ver quit_application)
+        self.resident = resident
+        self._quitting = False
+        
         # Configurar a janela como uma barra lateral
         self.setWindowTitle("Barra Lateral Expansível")
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         
+        # Estilizar a janela antes de criar os filhos (cada widget é polido uma única vez)
+        self.setStyleSheet("""
+            QMainWindow {
+                background-color: #2D2D30;
+                border: 1px solid #3E3E42;
+                border-radius: 5px;
+            }
+            QPushButton {
+                background-color: #3E3E42;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 5px;
+            }
+            QPushButton:hover {
+                background-color: #505054;
+            }
+            QPushButton:pressed {
+                background-color: #007ACC;
+            }
+            QLabel {
+                color: white;
+            }
+            QLineEdit, QTextEdit, QComboBox, QTableWidget {
+                background-color: #252526;
+                color: white;
+                border: 1px solid #3E3E42;
+                border-radius: 3px;
+                padding: 3px;
+            }
+            QCheckBox {
+                color: white;
+            }
+            QFrame {
+                color: #3E3E42;
+            }
+        """)
+        
         # Define tamanho e posição inicial
         screen_geometry = QApplication.desktop().screenGeometry()
         self.sidebar_collapsed_width = 80
@@ -183,6 +281,10 @@ class ExpandableSidebar(QMainWindow):
         self.btn_help.clicked.connect(lambda: self.on_button_clicked(3))
         icons_layout.addWidget(self.btn_help)
         
+        self.btn_stats = self.create_sidebar_button("Desempenho", "SP_ComputerIcon")
+        self.btn_stats.clicked.connect(lambda: self.on_button_clicked(4))
+        icons_layout.addWidget(self.btn_stats)
+        
         # Adicionar o Progress Bar Circular
         self.progress_bar = CircularProgressBar()
         icons_layout.addWidget(self.progress_bar, 0, Qt.AlignCenter)
@@ -216,29 +318,253 @@ class ExpandableSidebar(QMainWindow):
         self.stacked_widget = QStackedWidget()
         content_layout.addWidget(self.stacked_widget)
         
-        # Adicionar diferentes páginas ao stacked widget
+        # Páginas são construídas na primeira visita (ver show_page)
+        self.page_builders = [
+            self.build_files_page,
+            self.build_edit_page,
+            self.build_settings_page,
+            self.build_help_page,
+            self.build_stats_page,
+        ]
+        self.pages = {}
+        
+        # Adicionar widgets ao layout principal
+        main_layout.addWidget(self.icons_bar)
+        main_layout.addWidget(self.content_widget)
+        
+        # Separador entre barra de ícones e conteúdo
+        self.separator = QFrame()
+        self.separator.setFrameShape(QFrame.VLine)
+        self.separator.setFrameShadow(QFrame.Sunken)
+        self.separator.setFixedWidth(1)
+        self.separator.setVisible(False)  # Inicialmente oculto
+        main_layout.insertWidget(1, self.separator)
+        
+        
+        # Permitir mover a janela com o mouse
+        self.oldPos = None
+
+        # Operações git/Meld rodam fora da thread da interface (pool criado no primeiro uso)
+        self.task_runner = None
+        self.meld_task = None
+        self.answer_stream = None
+
+    def start_meld(self):
+        if self.meld_task is not None:
+            return
+        # Importações adiadas: só carregadas quando o usuário pede a comparação
+        from smart_coding_assistant.modules.git_meld import meld_head_vs_current
+        from smart_coding_assistant.modules.qt_tasks import TaskRunner
+        if self.task_runner is None:
+            self.task_runner = TaskRunner(parent=self)
+        self.btn_meld.setEnabled(False)
+        self.btn_cancel_meld.setEnabled(True)
+        self.files_status.setText("Preparando snapshot do HEAD...")
+        self.progress_bar.set_progress(0)
+        self.meld_task = self.task_runner.submit(
+            meld_head_vs_current,
+            self.files_path.text().strip() or ".",
+            on_progress=self.on_meld_progress,
+            on_message=self.files_status.setText,
+            on_finished=self.on_meld_done,
+            on_failed=self.on_meld_failed,
+            on_cancelled=self.on_meld_cancelled
+        )
+
+    def cancel_meld(self):
+        if self.meld_task is not None:
+            self.meld_task.cancel()
+            self.btn_cancel_meld.setEnabled(False)
+
+    def on_meld_progress(self, done, total):
+        if total > 0:
+            self.progress_bar.set_progress(100 * done // total)
+
+    def on_meld_done(self, result=None):
+        self.meld_task = None
+        self.btn_meld.setEnabled(True)
+        self.btn_cancel_meld.setEnabled(False)
+        if result is not None:
+            self.progress_bar.set_progress(100)
+
+    def on_meld_cancelled(self):
+        self.files_status.setText("Operação cancelada.")
+        self.on_meld_done()
+
+    def on_meld_failed(self, error):
+        self.files_status.setText(error.strip().splitlines()[-1])
+        self.on_meld_done()
+
+    def ask_question(self):
+        question = self.question_input.text().strip()
+        if not question or (self.answer_stream is not None and self.answer_stream.is_running()):
+            return
+        # Importações adiadas: só carregadas quando o usuário faz uma pergunta
+        from smart_coding_assistant.modules.llm_client import ask_project_stream
+        from smart_coding_assistant.modules.qt_tasks import TaskRunner
+        from smart_coding_assistant.modules.text_stream import TextStreamAppender
+        if self.task_runner is None:
+            self.task_runner = TaskRunner(parent=self)
+        if self.answer_stream is None:
+            self.answer_stream = TextStreamAppender(self.editor, self.task_runner, parent=self)
+            self.answer_stream.finished.connect(self.on_answer_done)
+            self.answer_stream.failed.connect(self.on_answer_failed)
+        project = self.files_path.text().strip() if 0 in self.pages else ""
+        self.editor.clear()
+        self.btn_ask.setEnabled(False)
+        self.btn_cancel_ask.setEnabled(True)
+        self.answer_stream.start(ask_project_stream, question, project, diff=self.diff_only.isChecked())
+
+    def cancel_question(self):
+        if self.answer_stream is not None:
+            self.answer_stream.cancel()
+            self.btn_cancel_ask.setEnabled(False)
+
+    def on_answer_done(self, text=None):
+        self.btn_ask.setEnabled(True)
+        self.btn_cancel_ask.setEnabled(False)
+
+    def on_answer_failed(self, error):
+        self.editor.append(error.strip().splitlines()[-1])
+        self.on_answer_done()
+
+    def apply_changes(self):
+        if self.answer_stream is not None and self.answer_stream.is_running():
+            return
+        # Importação adiada: só carregada quando o usuário aplica uma resposta
+        from smart_coding_assistant.modules.patch_engine import PatchError
+        from smart_coding_assistant.modules.patch_engine import apply_plan
+        from smart_coding_assistant.modules.patch_engine import parse_patch
+        from smart_coding_assistant.modules.patch_engine import plan_patches
+        from smart_coding_assistant.modules.patch_engine import preview
+        project = (self.files_path.text().strip() if 0 in self.pages else "") or "."
+        try:
+            patches = parse_patch(self.editor.toPlainText())
+            if not patches:
+                self.edit_status.setText("Nenhum diff ou bloco SEARCH/REPLACE na resposta.")
+                return
+            changes = plan_patches(project, patches)
+        except PatchError as e:
+            self.edit_status.setText("Nada foi alterado:\n" + "\n".join(e.failures or [str(e)]))
+            return
+        if not changes:
+            self.edit_status.setText("Os arquivos já estão com essas mudanças.")
+            return
+
+        # Prévia antes de gravar; nada é escrito se o usuário recusar
+        fuzzy = sum(kind != "exact" for change in changes for kind in change.matches)
+        summary = "\n".join(f"{change.status} {change.path}" for change in changes)
+        box = QMessageBox(self)
+        box.setWindowTitle("Aplicar Mudanças")
+        box.setText(f"Aplicar mudanças em {len(changes)} arquivos?")
+        box.setInformativeText(summary + (f"\n\n{fuzzy} trechos casaram de forma aproximada." if fuzzy else ""))
+        box.setDetailedText(preview(changes))
+        box.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+        if box.exec_() != QMessageBox.Yes:
+            return
+        try:
+            written = apply_plan(project, changes)
+        except (PatchError, OSError) as e:
+            self.edit_status.setText(f"Nada foi alterado: {e}")
+            return
+        self.edit_status.setText(f"{len(written)} arquivos atualizados.")
+
+    def closeEvent(self, event):
+        if self.resident and not self._quitting:
+            # Continua residente com os caches quentes; o próximo lançamento só mostra a janela
+            event.ignore()
+            self.hide()
+            return
+        if self.task_runner is not None:
+            self.task_runner.shutdown()
+        super().closeEvent(event)
+    
+    def quit_application(self):
+        self._quitting = True
+        self.close()
+        QApplication.instance().quit()
+    
+    def handle_request(self, request):
+        # Pedido de um novo lançamento (ver launcher.py): projeto e ação
+        action = request.get("action", "show")
+        if action == "quit":
+            self.quit_application()
+            return
+        
+        project = request.get("project")
+        if project:
+            self.show_page(0)
+            self.files_path.setText(project)
+        
+        page = PAGE_ACTIONS.get(action)
+        if page is not None:
+            self.on_button_clicked(page)
+        
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        
+        if action == "meld":
+            self.start_meld()
+    
+    def build_files_page(self):
         # Página 1: Arquivos
         files_page = QWidget()
         files_layout = QVBoxLayout(files_page)
         files_layout.addWidget(QLabel("<b>Arquivos</b>"))
         files_layout.addWidget(QLabel("Diretório:"))
-        files_path = QLineEdit()
-        files_path.setPlaceholderText("/caminho/para/diretório")
-        files_layout.addWidget(files_path)
+        self.files_path = QLineEdit()
+        self.files_path.setPlaceholderText("/caminho/para/diretório")
+        files_layout.addWidget(self.files_path)
         files_layout.addWidget(QPushButton("Navegar..."))
         files_layout.addWidget(QCheckBox("Incluir subdiretórios"))
         files_layout.addWidget(QCheckBox("Somente leitura"))
+        self.btn_meld = QPushButton("Comparar com HEAD (Meld)")
+        self.btn_meld.clicked.connect(self.start_meld)
+        files_layout.addWidget(self.btn_meld)
+        self.btn_cancel_meld = QPushButton("Cancelar")
+        self.btn_cancel_meld.setEnabled(False)
+        self.btn_cancel_meld.clicked.connect(self.cancel_meld)
+        files_layout.addWidget(self.btn_cancel_meld)
+        self.files_status = QLabel("")
+        self.files_status.setWordWrap(True)
+        files_layout.addWidget(self.files_status)
         files_layout.addStretch()
-        self.stacked_widget.addWidget(files_page)
-        
+        return files_page
+    
+    def build_edit_page(self):
         # Página 2: Editar
         edit_page = QWidget()
         edit_layout = QVBoxLayout(edit_page)
         edit_layout.addWidget(QLabel("<b>Editor</b>"))
-        edit_layout.addWidget(QTextEdit())
-        edit_layout.addWidget(QPushButton("Aplicar Mudanças"))
-        self.stacked_widget.addWidget(edit_page)
-        
+        self.question_input = QLineEdit()
+        self.question_input.setPlaceholderText("Pergunta sobre o projeto")
+        self.question_input.returnPressed.connect(self.ask_question)
+        edit_layout.addWidget(self.question_input)
+        ask_layout = QHBoxLayout()
+        self.btn_ask = QPushButton("Perguntar")
+        self.btn_ask.clicked.connect(self.ask_question)
+        ask_layout.addWidget(self.btn_ask)
+        self.btn_cancel_ask = QPushButton("Parar")
+        self.btn_cancel_ask.setEnabled(False)
+        self.btn_cancel_ask.clicked.connect(self.cancel_question)
+        ask_layout.addWidget(self.btn_cancel_ask)
+        self.diff_only = QCheckBox("Só as mudanças (diff)")
+        self.diff_only.setToolTip("Envia só os trechos alterados desde o último commit, em vez dos arquivos")
+        ask_layout.addWidget(self.diff_only)
+        edit_layout.addLayout(ask_layout)
+        self.editor = QTextEdit()
+        edit_layout.addWidget(self.editor)
+        self.btn_apply = QPushButton("Aplicar Mudanças")
+        self.btn_apply.setToolTip("Aplica os diffs ou blocos SEARCH/REPLACE da resposta aos arquivos do projeto")
+        self.btn_apply.clicked.connect(self.apply_changes)
+        edit_layout.addWidget(self.btn_apply)
+        self.edit_status = QLabel("")
+        self.edit_status.setWordWrap(True)
+        edit_layout.addWidget(self.edit_status)
+        return edit_page
+    
+    def build_settings_page(self):
         # Página 3: Opções
         settings_page = QWidget()
         settings_layout = QVBoxLayout(settings_page)
@@ -254,8 +580,9 @@ class ExpandableSidebar(QMainWindow):
         settings_layout.addWidget(QCheckBox("Iniciar com o sistema"))
         settings_layout.addWidget(QCheckBox("Verificar atualizações"))
         settings_layout.addStretch()
-        self.stacked_widget.addWidget(settings_page)
-        
+        return settings_page
+    
+    def build_help_page(self):
         # Página 4: Ajuda
         help_page = QWidget()
         help_layout = QVBoxLayout(help_page)
@@ -268,60 +595,97 @@ class ExpandableSidebar(QMainWindow):
         help_layout.addWidget(help_text)
         help_layout.addWidget(QPushButton("Verificar Atualizações"))
         help_layout.addWidget(QPushButton("Sobre"))
-        self.stacked_widget.addWidget(help_page)
-        
-        # Adicionar widgets ao layout principal
-        main_layout.addWidget(self.icons_bar)
-        main_layout.addWidget(self.content_widget)
-        
-        # Separador entre barra de ícones e conteúdo
-        self.separator = QFrame()
-        self.separator.setFrameShape(QFrame.VLine)
-        self.separator.setFrameShadow(QFrame.Sunken)
-        self.separator.setFixedWidth(1)
-        self.separator.setVisible(False)  # Inicialmente oculto
-        main_layout.insertWidget(1, self.separator)
-        
-        # Estilizar a janela
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #2D2D30;
-                border: 1px solid #3E3E42;
-                border-radius: 5px;
-            }
-            QPushButton {
-                background-color: #3E3E42;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 5px;
-            }
-            QPushButton:hover {
-                background-color: #505054;
-            }
-            QPushButton:pressed {
-                background-color: #007ACC;
-            }
-            QLabel {
-                color: white;
-            }
-            QLineEdit, QTextEdit, QComboBox {
-                background-color: #252526;
-                color: white;
-                border: 1px solid #3E3E42;
-                border-radius: 3px;
-                padding: 3px;
-            }
-            QCheckBox {
-                color: white;
-            }
-            QFrame {
-                color: #3E3E42;
-            }
-        """)
-        
-        # Permitir mover a janela com o mouse
-        self.oldPos = None
+        return help_page
+    
+    def build_stats_page(self):
+        # Página 5: Desempenho (tempos das operações recentes e contadores)
+        from smart_coding_assistant.modules.tracing import is_enabled
+        stats_page = QWidget()
+        stats_layout = QVBoxLayout(stats_page)
+        stats_layout.addWidget(QLabel("<b>Desempenho</b>"))
+        self.trace_enabled = QCheckBox("Registrar tempos")
+        self.trace_enabled.setChecked(is_enabled())
+        self.trace_enabled.toggled.connect(self.on_trace_toggled)
+        stats_layout.addWidget(self.trace_enabled)
+        self.stats_table = QTableWidget(0, 4)
+        self.stats_table.setHorizontalHeaderLabels(["Operação", "n", "p50 ms", "máx ms"])
+        self.stats_table.verticalHeader().setVisible(False)
+        self.stats_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.stats_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in (1, 2, 3):
+            self.stats_table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        stats_layout.addWidget(self.stats_table)
+        self.counters_label = QLabel()
+        self.counters_label.setWordWrap(True)
+        stats_layout.addWidget(self.counters_label)
+        export_layout = QHBoxLayout()
+        btn_export_json = QPushButton("JSON")
+        btn_export_json.setToolTip("Exportar os tempos em JSON")
+        btn_export_json.clicked.connect(lambda: self.export_trace(chrome=False))
+        export_layout.addWidget(btn_export_json)
+        btn_export_chrome = QPushButton("Chrome")
+        btn_export_chrome.setToolTip("Exportar no formato do chrome://tracing e do Perfetto")
+        btn_export_chrome.clicked.connect(lambda: self.export_trace(chrome=True))
+        export_layout.addWidget(btn_export_chrome)
+        btn_clear = QPushButton("Limpar")
+        btn_clear.clicked.connect(self.clear_trace)
+        export_layout.addWidget(btn_clear)
+        stats_layout.addLayout(export_layout)
+        # Atualizada só enquanto está visível (ver refresh_stats)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_stats)
+        self.stats_timer.start(STATS_REFRESH_MS)
+        self.stats_page = stats_page
+        return stats_page
+    
+    def refresh_stats(self):
+        if not self.stats_page.isVisible():
+            return
+        from smart_coding_assistant.modules.tracing import get_tracer
+        tracer = get_tracer()
+        summary = sorted(tracer.summary().items(), key=lambda item: -item[1]["last"])
+        self.stats_table.setRowCount(len(summary))
+        for row, (name, stats) in enumerate(summary):
+            values = [name, str(stats["count"]), f"{stats['p50']:.1f}", f"{stats['max']:.1f}"]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.stats_table.setItem(row, column, item)
+        counters = tracer.counters()
+        self.counters_label.setText("\n".join(f"{name}: {value:,}" for name, value in sorted(counters.items())))
+    
+    def on_trace_toggled(self, checked):
+        from smart_coding_assistant.modules.tracing import enable
+        enable(checked)
+    
+    def clear_trace(self):
+        from smart_coding_assistant.modules.tracing import get_tracer
+        get_tracer().clear()
+        self.refresh_stats()
+    
+    def export_trace(self, chrome=False):
+        from smart_coding_assistant.modules.tracing import get_tracer
+        default_name = "trace.chrome.json" if chrome else "trace.json"
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar tempos", default_name, "JSON (*.json)")
+        if not path:
+            return
+        try:
+            if chrome:
+                get_tracer().export_chrome_trace(path)
+            else:
+                get_tracer().export_json(path)
+        except OSError as e:
+            self.counters_label.setText(f"Erro ao exportar: {e}")
+    
+    def show_page(self, index):
+        # Construir a página na primeira visita
+        page = self.pages.get(index)
+        if page is None:
+            page = self.page_builders[index]()
+            self.pages[index] = page
+            self.stacked_widget.addWidget(page)
+        self.stacked_widget.setCurrentWidget(page)
     
     def increment_progress(self):
         # Obter o progresso atual
@@ -356,6 +720,8 @@ class ExpandableSidebar(QMainWindow):
         
         # Atualizar botão de expansão
         if self.is_expanded:
+            if self.stacked_widget.count() == 0:
+                self.show_page(0)
             self.btn_expand.setIcon(self.style().standardIcon(self.style().SP_ArrowLeft))
             self.content_widget.setVisible(True)
             self.separator.setVisible(True)
@@ -383,9 +749,9 @@ class ExpandableSidebar(QMainWindow):
     
     def on_button_clicked(self, index):
         # Mudar para a página correspondente e expandir se necessário
+        self.show_page(index)
         if not self.is_expanded:
             self.toggle_sidebar()
-        self.stacked_widget.setCurrentIndex(index)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -410,9 +776,67 @@ class ExpandableSidebar(QMainWindow):
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton:
             self.oldPos = None
-            
-if __name__ == "__main__":
+
+
+def create_tray_icon(sidebar):
+    from PyQt5.QtWidgets import QSystemTrayIcon, QMenu
+    
+    if not QSystemTrayIcon.isSystemTrayAvailable():
+        return None
+    icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons", "logo.png")
+    tray = QSystemTrayIcon(QIcon(icon_path), sidebar)
+    menu = QMenu(sidebar)
+    menu.addAction("Mostrar", lambda: sidebar.handle_request({"action": "show"}))
+    menu.addAction("Sair", sidebar.quit_application)
+    tray.setContextMenu(menu)
+    tray.activated.connect(lambda reason: sidebar.handle_request({"action": "show"}))
+    tray.show()
+    return tray
+
+
+def main(request=None, resident=False):
+    """
+    Starts the window.
+
+    Args:
+        request (dict or None): First request (see single_instance.make_request).
+        resident (bool): If True, serves later launches through a local socket and, when
+                         there is a system tray to quit from, the process stays alive with
+                         the window hidden after it is closed.
+    """
     app = QApplication(sys.argv)
-    sidebar = ExpandableSidebar()
-    sidebar.show()
-    sys.exit(app.exec_())
+    sidebar = ExpandableSidebar(resident=resident)
+    
+    if resident:
+        from smart_coding_assistant.modules.instance_server import InstanceServer
+        
+        from smart_coding_assistant.modules.single_instance import HANDOVER_TIMEOUT
+        from smart_coding_assistant.modules.single_instance import make_request
+        from smart_coding_assistant.modules.single_instance import send_request
+
+        server = InstanceServer(parent=sidebar)
+        if server.listen():
+            server.request_received.connect(sidebar.handle_request)
+            app.aboutToQuit.connect(server.close)
+            sidebar.tray_icon = create_tray_icon(sidebar)
+            if sidebar.tray_icon is not None:
+                app.setQuitOnLastWindowClosed(False)
+            else:
+                # Sem bandeja não haveria como sair pela interface: fechar encerra,
+                # e o socket atende os lançamentos até lá
+                sidebar.resident = False
+        elif server.in_use and send_request(request or make_request(), timeout=HANDOVER_TIMEOUT):
+            # A instância residente estava ocupada na primeira tentativa do lançador
+            return 0
+        else:
+            sidebar.resident = False
+    
+    if request is not None:
+        sidebar.handle_request(request)
+    else:
+        sidebar.show()
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main())